@@ -1,4 +1,11 @@
-from hotel.models import UserRole, Permission
+from django.utils.functional import SimpleLazyObject
+from hotel.authorization import (
+    is_admin_request,
+    get_user_permissions,
+    request_permission_codenames,
+    get_user_role_names,
+)
+from hotel.models import UserRole
 
 
 def user_initial_context(request):
@@ -23,9 +30,13 @@ def user_initial_context(request):
 
 def user_permissions_context(request):
     """
-    Context processor to add user permissions and roles to all templates
+    Context processor to add user permissions and roles to admin panel templates
+
+    Values are lazy and backed by the cached permission set, so they cost
+    nothing unless a template uses them. Pages outside the admin panel get
+    empty defaults without touching the user or the database.
     """
-    if not hasattr(request, 'user') or not request.user.is_authenticated:
+    if not is_admin_request(request) or not hasattr(request, 'user') or not request.user.is_authenticated:
         return {
             'user_roles': [],
             'user_permissions': [],
@@ -38,32 +49,15 @@ def user_permissions_context(request):
     
     # Check if user is superuser (Django admin)
     if user.is_superuser:
-        return {
-            'user_roles': [],
-            'user_permissions': Permission.objects.all(),
-            'user_permission_codenames': list(Permission.objects.values_list('codename', flat=True)),
-            'is_admin_user': True,
-            'user_role_names': ['Administrator'],
-        }
-    
-    # Get user roles (custom admin panel roles)
-    user_roles = UserRole.objects.filter(user=user, role__is_active=True).select_related('role')
-    
-    # Get all permissions for the user's roles
-    permission_ids = []
-    role_names = []
-    
-    for user_role in user_roles:
-        permission_ids.extend(user_role.role.permissions.values_list('id', flat=True))
-        role_names.append(user_role.role.name)
-    
-    user_permissions = Permission.objects.filter(id__in=permission_ids).distinct()
-    user_permission_codenames = list(user_permissions.values_list('codename', flat=True))
+        user_roles = []
+    else:
+        # Querysets are lazy; only evaluated if a template iterates them
+        user_roles = UserRole.objects.filter(user=user, role__is_active=True).select_related('role')
     
     return {
         'user_roles': user_roles,
-        'user_permissions': user_permissions,
-        'user_permission_codenames': user_permission_codenames,
-        'is_admin_user': False,
-        'user_role_names': role_names,
+        'user_permissions': SimpleLazyObject(lambda: get_user_permissions(user)),
+        'user_permission_codenames': SimpleLazyObject(lambda: list(request_permission_codenames(request))),
+        'is_admin_user': user.is_superuser,
+        'user_role_names': SimpleLazyObject(lambda: get_user_role_names(user)),
     }
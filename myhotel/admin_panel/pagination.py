@@ -0,0 +1,115 @@
+"""
+Keyset (seek) pagination for newest-first admin lists.
+
+Pages are addressed by the (created_at, id) of the row they continue after
+or stop before, so any page costs one index range scan of per_page + 1 rows.
+OFFSET pagination reads and throws away every earlier row, which makes deep
+pages slower the further back they are.
+
+Ranked lists (search results) are ordered best first by a rank annotation
+and then newest first, and their cursors carry the rank as well.
+"""
+import base64
+from datetime import datetime
+from django.db.models import Q
+
+
+def encode_cursor(obj, rank=None):
+    raw = f'{obj.created_at.isoformat()}|{obj.pk}'
+    if rank is not None:
+        raw = f'{getattr(obj, rank)}|{raw}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode(cursor):
+    return base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor, or None if it is malformed"""
+    try:
+        created_at, pk = _decode(cursor).rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def decode_ranked_cursor(cursor):
+    """(rank, created_at, id) from a ranked cursor, or None if it is malformed"""
+    try:
+        rank, created_at, pk = _decode(cursor).split('|', 2)
+        return int(rank), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """One page of rows plus the cursors of its neighbours"""
+    def __init__(self, items, has_next, has_previous, rank=None):
+        self.items = items
+        self.next_cursor = encode_cursor(items[-1], rank) if items and has_next else None
+        self.previous_cursor = encode_cursor(items[0], rank) if items and has_previous else None
+
+    @property
+    def has_other_pages(self):
+        return bool(self.next_cursor or self.previous_cursor)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_page(queryset, after=None, before=None, per_page=50):
+    """
+    The page of queryset, newest first by (created_at, id), that follows the
+    after cursor or precedes the before cursor; the first page if neither is valid
+    """
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before and not after else None
+
+    if before:
+        created_at, pk = before
+        rows = list(
+            queryset.filter(Q(created_at__gt=created_at) | Q(id__gt=pk), created_at__gte=created_at)
+            .order_by('created_at', 'id')[:per_page + 1]
+        )
+        return KeysetPage(rows[:per_page][::-1], has_next=True, has_previous=len(rows) > per_page)
+
+    if after:
+        created_at, pk = after
+        # The plain created_at bound lets the index seek straight to the cursor
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(id__lt=pk), created_at__lte=created_at)
+    rows = list(queryset.order_by('-created_at', '-id')[:per_page + 1])
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=after is not None)
+
+
+def ranked_keyset_page(queryset, rank, after=None, before=None, per_page=50):
+    """
+    Like keyset_page, for a queryset ordered best first by its rank
+    annotation and then newest first by (created_at, id)
+    """
+    after = decode_ranked_cursor(after) if after else None
+    before = decode_ranked_cursor(before) if before and not after else None
+
+    if before:
+        value, created_at, pk = before
+        rows = list(
+            queryset.filter(
+                Q(**{f'{rank}__gt': value})
+                | Q(**{rank: value, 'created_at__gt': created_at})
+                | Q(**{rank: value, 'created_at': created_at, 'id__gt': pk})
+            ).order_by(rank, 'created_at', 'id')[:per_page + 1]
+        )
+        return KeysetPage(rows[:per_page][::-1], has_next=True, has_previous=len(rows) > per_page, rank=rank)
+
+    if after:
+        value, created_at, pk = after
+        queryset = queryset.filter(
+            Q(**{f'{rank}__lt': value})
+            | Q(**{rank: value, 'created_at__lt': created_at})
+            | Q(**{rank: value, 'created_at': created_at, 'id__lt': pk})
+        )
+    rows = list(queryset.order_by(f'-{rank}', '-created_at', '-id')[:per_page + 1])
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=after is not None, rank=rank)
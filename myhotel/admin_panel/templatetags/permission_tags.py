@@ -1,29 +1,44 @@
 from django import template
-from django.contrib.contenttypes.models import ContentType
-from ..permission_decorators import has_permission, has_section_access, has_model_permission, get_user_accessible_sections
+from django.http import HttpRequest
+from hotel.authorization import (
+    SECTIONS,
+    has_permission,
+    get_user_role_names,
+    request_has_permission,
+)
 
 register = template.Library()
 
 
+def check_permission(subject, permission_codename):
+    """
+    Permission check for a tag argument: the request, whose permission set
+    AuthorizationMiddleware attached, or else a user
+    """
+    if isinstance(subject, HttpRequest):
+        return request_has_permission(subject, permission_codename)
+    return has_permission(subject, permission_codename)
+
+
 @register.filter
 def has_perm(user, permission_codename):
     """
     Template filter to check if user has a specific permission
-    Usage: {% if user|has_perm:"view_booking" %}
+    Usage: {% if request|has_perm:"view_booking" %}
     """
-    return has_permission(user, permission_codename)
+    return check_permission(user, permission_codename)
 
 
 @register.filter
 def has_model_perm(user, model_and_action):
     """
     Template filter to check if user has permission for a model action
-    Usage: {% if user|has_model_perm:"booking.view" %}
+    Usage: {% if request|has_model_perm:"booking.view" %}
     """
     try:
         model_name, action = model_and_action.split('.')
         permission_codename = f"{action}_{model_name}"
-        return has_permission(user, permission_codename)
+        return check_permission(user, permission_codename)
     except (ValueError, AttributeError):
         return False
 
@@ -32,20 +47,20 @@ def has_model_perm(user, model_and_action):
 def has_section_access_filter(user, section):
     """
     Template filter to check if user has access to a section
-    Usage: {% if user|has_section_access_filter:"booking" %}
+    Usage: {% if request|has_section_access_filter:"booking" %}
     """
-    return has_section_access(user, section)
+    return check_permission(user, f"access_{section}")
 
 
 @register.filter
 def can_access_model(user, model_and_action):
     """
     Template filter to check if user can access a model with specific action
-    Usage: {% if user|can_access_model:"booking.view" %}
+    Usage: {% if request|can_access_model:"booking.view" %}
     """
     try:
         model_name, action = model_and_action.split('.')
-        return has_model_permission(user, model_name, action)
+        return check_permission(user, f"{action}_{model_name}")
     except (ValueError, AttributeError):
         return False
 
@@ -54,38 +69,38 @@ def can_access_model(user, model_and_action):
 def user_can(user, action, model_name):
     """
     Template tag to check if user can perform an action on a model
-    Usage: {% user_can user "view" "booking" as can_view_booking %}
+    Usage: {% user_can request "view" "booking" as can_view_booking %}
     """
     permission_codename = f"{action}_{model_name}"
-    return has_permission(user, permission_codename)
+    return check_permission(user, permission_codename)
 
 
 @register.simple_tag
 def user_can_access_section(user, section):
     """
     Template tag to check if user can access a section
-    Usage: {% user_can_access_section user "booking" as can_access_booking %}
+    Usage: {% user_can_access_section request "booking" as can_access_booking %}
     """
-    return has_section_access(user, section)
+    return check_permission(user, f"access_{section}")
 
 
 @register.simple_tag
 def get_accessible_sections(user):
     """
     Get list of sections the user has access to
-    Usage: {% get_accessible_sections user as accessible_sections %}
+    Usage: {% get_accessible_sections request as accessible_sections %}
     """
-    return get_user_accessible_sections(user)
+    return [section for section in SECTIONS if check_permission(user, f"access_{section}")]
 
 
 @register.inclusion_tag('admin_panel/partials/permission_check.html')
 def show_if_permitted(user, permission_codename, content=''):
     """
     Inclusion tag to conditionally show content based on permission
-    Usage: {% show_if_permitted user "view_booking" "View Bookings" %}
+    Usage: {% show_if_permitted request "view_booking" "View Bookings" %}
     """
     return {
-        'show': has_permission(user, permission_codename),
+        'show': check_permission(user, permission_codename),
         'content': content
     }
 
@@ -94,10 +109,10 @@ def show_if_permitted(user, permission_codename, content=''):
 def show_if_section_access(user, section, content=''):
     """
     Inclusion tag to conditionally show content based on section access
-    Usage: {% show_if_section_access user "booking" "Booking Section" %}
+    Usage: {% show_if_section_access request "booking" "Booking Section" %}
     """
     return {
-        'show': has_section_access(user, section),
+        'show': check_permission(user, f"access_{section}"),
         'content': content
     }
 
@@ -107,14 +122,7 @@ def get_user_role_display(user):
     """
     Get display name for user's role(s)
     """
-    if user.is_superuser:
-        return "Administrator"
-    
-    from hotel.models import UserRole
-    user_roles = UserRole.objects.filter(user=user, role__is_active=True).select_related('role')
-    
-    if not user_roles.exists():
+    role_names = get_user_role_names(user)
+    if not role_names:
         return "No Role Assigned"
-    
-    role_names = [ur.role.name for ur in user_roles]
     return ", ".join(role_names)
\ No newline at end of file
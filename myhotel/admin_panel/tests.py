@@ -1,7 +1,21 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from django.test import RequestFactory, TestCase
 from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from hotel.authorization import AuthorizationMiddleware
+from hotel.booking_service import create_booking
+from hotel.search import BOOKING, rebuild_search_index, search
+from hotel.models import RoomType, Room, Booking, Guest, GuestStay, Permission, Role, UserRole
 from .templatetags.admin_extras import user_initial, safe_first_char
+from .permission_decorators import has_permission, require_section_access
+from .views.dashboard import DashboardView
 
 
 class TemplateFilterTests(TestCase):
@@ -60,4 +74,296 @@ class TemplateFilterTests(TestCase):
         template = Template("{% load admin_extras %}{{ user|user_initial }}")
         context = Context({'user': self.user_with_first_name})
         result = template.render(context)
-        self.assertEqual(result, 'J')
\ No newline at end of file
+        self.assertEqual(result, 'J')
+
+class DashboardQueryTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        rooms = [Room.objects.create(room_type=room_type, room_number=f'10{i}') for i in range(6)]
+        checkin = date.today() + timedelta(days=3)
+        for i, status in enumerate(['confirmed', 'confirmed', 'pending', 'cancelled']):
+            Booking.objects.create(
+                room=rooms[i], checkin=checkin, checkout=checkin + timedelta(days=1),
+                guests=1, total_price=0, status=status,
+                created_at=timezone.now() - timedelta(days=400 * (i == 3))
+            )
+
+    def test_dashboard_counts(self):
+        """Test that the conditional aggregate matches per-status counts"""
+        response = DashboardView(request=None).get_context_data()
+        self.assertEqual(response['all_bookings'], {'confirmed': 2, 'pending': 1, 'cancelled': 1, 'total': 4})
+        self.assertEqual(response['bookings_today']['total'], 3)
+        self.assertEqual(sum(row['confirmed'] for row in response['bookings_per_year']), 2)
+
+    def test_dashboard_query_count(self):
+        """Test that stats and chart series do not scale with the number of periods"""
+        view = DashboardView(request=None)
+        # One aggregate for the cards, one grouped query per chart granularity
+        with self.assertNumQueries(5):
+            view.get_context_data()
+
+
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('staff', 'staff@example.com', 'password')
+        content_type = ContentType.objects.get_for_model(Booking)
+        self.view_booking = Permission.objects.create(content_type=content_type, permission_type='view')
+        self.edit_booking = Permission.objects.create(content_type=content_type, permission_type='edit')
+        self.role = Role.objects.create(name='Front desk')
+        self.role.permissions.add(self.view_booking)
+        UserRole.objects.create(user=self.user, role=self.role)
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_page_with_fifty_checks(self):
+        """Test that 50 permission checks on a page cost one query, then none once cached"""
+        page = Template(
+            '{% load permission_tags %}'
+            + '{% if user|has_perm:"view_booking" %}y{% endif %}{% if user|has_perm:"edit_booking" %}n{% endif %}' * 25
+        )
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            rendered = page.render(Context({'user': user}))
+        self.assertEqual(rendered, 'y' * 25)
+
+        # A new request loads a new user object and is served from the cache
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            page.render(Context({'user': user}))
+
+    def test_role_changes_invalidate_cache(self):
+        """Test that role permission and assignment changes are seen by the next request"""
+        self.assertFalse(has_permission(self.fresh_user(), 'edit_booking'))
+        self.role.permissions.add(self.edit_booking)
+        self.assertTrue(has_permission(self.fresh_user(), 'edit_booking'))
+        self.role.is_active = False
+        self.role.save()
+        self.assertFalse(has_permission(self.fresh_user(), 'view_booking'))
+        self.role.is_active = True
+        self.role.save()
+        UserRole.objects.filter(user=self.user).delete()
+        self.assertFalse(has_permission(self.fresh_user(), 'view_booking'))
+
+    def test_sidebar_renders_without_queries(self):
+        """Test that the sidebar reads the permission set attached by the middleware"""
+        request = RequestFactory().get('/admin-panel/')
+        request.user = self.fresh_user()
+        AuthorizationMiddleware(lambda request: None)(request)
+        self.assertEqual(request.permission_codenames, frozenset({'view_booking'}))
+
+        sidebar = Template('{% include "admin_panel/partials/sidebar_navigation.html" %}')
+        with self.assertNumQueries(0):
+            self.assertNotIn('>Bookings<', sidebar.render(Context({'request': request})))
+
+        # Tags and decorators answer from the request's set, not the user
+        request.permission_codenames = frozenset({'access_booking'})
+        with self.assertNumQueries(0):
+            self.assertIn('>Bookings<', sidebar.render(Context({'request': request})))
+        view = require_section_access('booking')(lambda request: 'allowed')
+        self.assertEqual(view(request), 'allowed')
+
+
+class RoomBoardTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        self.today = timezone.localdate()
+        self.occupied = Room.objects.create(room_type=self.room_type, room_number='101')
+        self.arriving = Room.objects.create(room_type=self.room_type, room_number='102')
+        self.disabled = Room.objects.create(room_type=self.room_type, room_number='103', is_available=False)
+        Booking.objects.create(
+            room=self.occupied, checkin=self.today - timedelta(days=1), checkout=self.today + timedelta(days=1),
+            guests=1, total_price=0, status='confirmed'
+        )
+        Booking.objects.create(
+            room=self.arriving, checkin=self.today + timedelta(days=3), checkout=self.today + timedelta(days=4),
+            guests=1, total_price=0, status='pending'
+        )
+
+    def board_queries(self, **params):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('admin_panel:admin_rooms'), params)
+        return response, len(captured)
+
+    def test_board_annotations_and_filters(self):
+        """Test that each room carries tonight's booking and next arrival, and status filters apply"""
+        response, _ = self.board_queries()
+        rooms = {room.room_number: room for room in response.context['rooms']}
+        self.assertTrue(rooms['101'].is_occupied)
+        self.assertEqual(rooms['101'].current_checkout, self.today + timedelta(days=1))
+        self.assertFalse(rooms['102'].is_occupied)
+        self.assertEqual(rooms['102'].upcoming_status, 'pending')
+
+        for status, expected in (('occupied', ['101']), ('available', ['102']), ('disabled', ['103'])):
+            response, _ = self.board_queries(status=status)
+            self.assertEqual([room.room_number for room in response.context['rooms']], expected)
+
+    def test_query_count_does_not_grow_with_rooms(self):
+        """Test that the room board costs the same number of queries for 3 or 40 rooms"""
+        _, before = self.board_queries()
+        for i in range(37):
+            room = Room.objects.create(room_type=self.room_type, room_number=f'2{i:02d}')
+            Booking.objects.create(
+                room=room, checkin=self.today, checkout=self.today + timedelta(days=2),
+                guests=1, total_price=0, status='confirmed'
+            )
+        _, after = self.board_queries()
+        self.assertEqual(before, after)
+
+
+class BookingListTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        room = Room.objects.create(room_type=room_type, room_number='101')
+        now = timezone.now()
+        checkin = date.today() + timedelta(days=3)
+        # Pairs of bookings share a created_at so the id tiebreak matters
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                room=room, checkin=checkin, checkout=checkin + timedelta(days=1), guests=1,
+                total_price=0, status=['confirmed', 'pending', 'cancelled'][i % 3],
+                created_at=now - timedelta(minutes=i // 2)
+            )
+            for i in range(120)
+        ])
+        guests = Guest.objects.bulk_create([
+            Guest(booking=booking, first_name='Ada', last_name=str(booking.id), email='ada@example.com', phone='080')
+            for booking in bookings
+        ])
+        GuestStay.objects.bulk_create([GuestStay(guest=guest, booking=guest.booking) for guest in guests])
+        self.expected = list(Booking.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def get_page(self, **params):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('admin_panel:admin_bookings'), params)
+        return response, len(captured)
+
+    def test_pages_cover_every_booking_once(self):
+        """Test that following the cursors walks all bookings in order and back again"""
+        seen = []
+        response, first_queries = self.get_page()
+        self.assertEqual(response.context['total_bookings'], 120)
+        self.assertEqual(response.context['confirmed_count'], 40)
+        pages = [response.context['bookings']]
+        while pages[-1].next_cursor:
+            response, queries = self.get_page(after=pages[-1].next_cursor)
+            self.assertEqual(queries, first_queries)
+            pages.append(response.context['bookings'])
+        for page in pages:
+            seen.extend(booking.id for booking in page)
+        self.assertEqual(seen, self.expected)
+
+        response, _ = self.get_page(before=pages[-1].previous_cursor)
+        self.assertEqual([booking.id for booking in response.context['bookings']], [b.id for b in pages[-2]])
+
+    def test_filters_and_bad_cursors(self):
+        """Test that filters apply to pages and tiles, and a malformed cursor shows the first page"""
+        response, _ = self.get_page(status='pending', after='not-a-cursor')
+        page = response.context['bookings']
+        self.assertEqual(response.context['total_bookings'], 40)
+        self.assertEqual(len(page), 40)
+        self.assertIsNone(page.next_cursor)
+        self.assertContains(response, 'Ada ')
+
+    def test_search_results_are_paginated(self):
+        """Test that search result pages walk every match, best match first"""
+        rebuild_search_index()
+        ranks = dict(search(BOOKING, '1').values_list('object_id', 'rank'))
+        expected = sorted(
+            Booking.objects.filter(id__in=ranks).values_list('id', 'created_at'),
+            key=lambda row: (-ranks[row[0]], -row[1].timestamp(), -row[0])
+        )
+        self.assertGreater(len(expected), 50)
+        self.assertGreater(len(set(ranks.values())), 1)
+
+        response, _ = self.get_page(search='1')
+        pages = [response.context['bookings']]
+        while pages[-1].next_cursor:
+            response, _ = self.get_page(search='1', after=pages[-1].next_cursor)
+            pages.append(response.context['bookings'])
+        self.assertEqual([booking.id for page in pages for booking in page], [row[0] for row in expected])
+
+        response, _ = self.get_page(search='1', before=pages[-1].previous_cursor)
+        self.assertEqual([booking.id for booking in response.context['bookings']], [b.id for b in pages[-2]])
+
+
+class BookingEditTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        self.rooms = [Room.objects.create(room_type=room_type, room_number=f'10{i}') for i in range(2)]
+        checkin = date.today() + timedelta(days=5)
+        self.booking = Booking.objects.create(
+            room=self.rooms[0], checkin=checkin, checkout=checkin + timedelta(days=2),
+            guests=1, total_price=0, status='confirmed'
+        )
+
+    def test_current_room_offered_when_out_of_service(self):
+        """Test that a booking on a disabled room can keep its room while other details change"""
+        self.rooms[0].is_available = False
+        self.rooms[0].save()
+        url = reverse('admin_panel:admin_booking_edit', args=[self.booking.id])
+        response = self.client.get(url)
+        self.assertEqual(list(response.context['available_rooms']), self.rooms)
+
+        checkin = self.booking.checkin + timedelta(days=1)
+        response = self.client.post(url, {
+            'room': self.rooms[0].id, 'checkin': str(checkin), 'checkout': str(checkin + timedelta(days=1))
+        })
+        self.assertRedirects(response, reverse('admin_panel:admin_bookings'), fetch_redirect_response=False)
+        self.booking.refresh_from_db()
+        self.assertEqual((self.booking.room, self.booking.checkin), (self.rooms[0], checkin))
+
+
+class GuestStayViewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        Room.objects.create(room_type=self.room_type, room_number='101')
+        self.checkin = date.today() + timedelta(days=3)
+
+    def book(self, name, email, days_later):
+        checkin = self.checkin + timedelta(days=days_later)
+        return create_booking(
+            self.room_type, checkin, checkin + timedelta(days=1),
+            {'first_name': name, 'last_name': 'Obi', 'email': email, 'phone': email}, guests=1
+        )
+
+    def test_booking_view_counts_stays(self):
+        """Test that the booking page lists its guests with their stay counts"""
+        self.book('Ada', 'ada@example.com', 0)
+        booking, _ = self.book('Ada', 'ada@example.com', 2)
+        response = self.client.get(reverse('admin_panel:admin_booking_view', args=[booking.id]))
+        self.assertEqual([guest.stay_count for guest in response.context['guests']], [2])
+        self.assertContains(response, '2 stays')
+
+    def test_guest_list_query_count_is_constant(self):
+        """Test that the guest list prefetches stays instead of querying per guest"""
+        def count_queries():
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(reverse('admin_panel:admin_guests'))
+            self.assertEqual(response.status_code, 200)
+            return len(captured)
+
+        self.book('Ada', 'ada@example.com', 0)
+        count_queries()  # Warm the permission and hotel caches
+        baseline = count_queries()
+        for i in range(1, 6):
+            self.book(f'Guest{i}', f'guest{i}@example.com', i * 2)
+        self.assertEqual(count_queries(), baseline)
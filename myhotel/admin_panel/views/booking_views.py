@@ -3,16 +3,24 @@ from django.urls import reverse
 from django.contrib import messages
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
-from django.db.models import Q
-from hotel.models import Booking, Guest, Room
+from django.db.models import Count, OuterRef, Q, Subquery
+from hotel.models import Booking, Guest, GuestStay, Room
+from hotel.occupancy import OccupancyIndex
+from hotel.search import BOOKING, search as search_documents
+from hotel.soft_delete import alive, alive_prefetch
 from datetime import datetime, date, timedelta
+from ..pagination import keyset_page, ranked_keyset_page
 from ..permission_decorators import require_model_permission, require_section_access
 
+BOOKINGS_PER_PAGE = 50
+
 # List all bookings
 @require_section_access('booking')
 @require_model_permission(Booking, 'view', redirect_url='admin_panel:dashboard')
 def admin_bookings(request):
-    bookings = Booking.objects.select_related('room').all()
+    bookings = Booking.objects.select_related('room__room_type').prefetch_related(
+        alive_prefetch('registered_guests', Guest.objects.order_by('id'))
+    )
     
     # Apply filters
     date_from = request.GET.get('date_from')
@@ -37,34 +45,48 @@ def admin_bookings(request):
     if status:
         bookings = bookings.filter(status=status)
     
-    if search:
-        # Search in guest names and room numbers
-        bookings = bookings.filter(
-            Q(room__room_number__icontains=search) |
-            Q(room__room_type__name__icontains=search)
+    matches = search_documents(BOOKING, search) if search else None
+    if matches is not None:
+        # Indexed search over booking numbers, rooms, room types and guests
+        bookings = bookings.filter(id__in=matches.values('object_id')).annotate(
+            search_rank=Subquery(matches.filter(object_id=OuterRef('pk')).values('rank')[:1])
         )
-        # Also search in guest names
-        guest_bookings = Guest.objects.filter(
-            Q(first_name__icontains=search) |
-            Q(last_name__icontains=search) |
-            Q(email__icontains=search)
-        ).values_list('booking_id', flat=True)
-        bookings = bookings.filter(Q(id__in=guest_bookings) | Q(room__room_number__icontains=search))
-    
-    bookings = bookings.order_by('-created_at')
-    
-    # Get stats for the filtered bookings
-    total_bookings = bookings.count()
-    confirmed_count = bookings.filter(status='confirmed').count()
-    pending_count = bookings.filter(status='pending').count()
-    cancelled_count = bookings.filter(status='cancelled').count()
     
+    # Stats for the filtered bookings, in one conditional aggregate
+    stats = bookings.aggregate(
+        total=Count('id'),
+        confirmed=Count('id', filter=Q(status='confirmed')),
+        pending=Count('id', filter=Q(status='pending')),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+    )
+
+    if matches is not None:
+        # Search results are listed best match first
+        page = ranked_keyset_page(
+            bookings,
+            'search_rank',
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            per_page=BOOKINGS_PER_PAGE
+        )
+    else:
+        page = keyset_page(
+            bookings,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            per_page=BOOKINGS_PER_PAGE
+        )
+    filters = request.GET.copy()
+    for key in ('after', 'before'):
+        filters.pop(key, None)
+
     context = {
-        'bookings': bookings,
-        'total_bookings': total_bookings,
-        'confirmed_count': confirmed_count,
-        'pending_count': pending_count,
-        'cancelled_count': cancelled_count,
+        'bookings': page,
+        'filter_query': filters.urlencode(),
+        'total_bookings': stats['total'],
+        'confirmed_count': stats['confirmed'],
+        'pending_count': stats['pending'],
+        'cancelled_count': stats['cancelled'],
     }
     
     return render(request, 'admin_panel/bookings.html', context)
@@ -73,8 +95,18 @@ def admin_bookings(request):
 @require_section_access('booking')
 @require_model_permission(Booking, 'view', redirect_url='admin_panel:dashboard')
 def admin_booking_view(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
-    guests = Guest.objects.filter(booking=booking)
+    # Guests come with their number of stays, so returning guests stand out. A
+    # Count('stays') would share the join the prefetch filters on and count one.
+    stay_counts = alive(GuestStay.objects.filter(guest=OuterRef('pk')), 'booking').values('guest').annotate(
+        count=Count('id')
+    ).values('count')
+    booking = get_object_or_404(
+        Booking.objects.select_related('room__room_type').prefetch_related(
+            alive_prefetch('registered_guests', Guest.objects.annotate(stay_count=Subquery(stay_counts)).order_by('id'))
+        ),
+        id=booking_id
+    )
+    guests = booking.registered_guests.all()
     return render(request, 'admin_panel/booking_view.html', {'booking': booking, 'guests': guests})
 
 # Edit a booking
@@ -113,26 +145,25 @@ def admin_booking_edit(request, booking_id):
             checkin = booking.checkin
             checkout = booking.checkout
     
-    # Get all rooms of the same type
-    all_rooms = Room.objects.filter(room_type=booking.room.room_type)
-    # Exclude rooms with overlapping bookings (except this booking)
-    available_rooms = []
-    for room in all_rooms:
-        if checkin and checkout and checkin < checkout:
-            overlapping = Booking.objects.filter(
-                room=room,
-                checkin__lt=checkout,
-                checkout__gt=checkin,
-            ).exclude(id=booking.id)
-            if not overlapping.exists():
-                available_rooms.append(room)
-        else:
-            # If dates are invalid, show all rooms of the type
-            available_rooms.append(room)
+    # Rooms of the same type; one query loads their bookings (except this one)
+    # and every overlap question below is answered from the in-memory index
+    all_rooms = list(Room.objects.filter(
+        Q(is_available=True) | Q(pk=booking.room_id), room_type=booking.room.room_type
+    ))
+    if checkin and checkout and checkin < checkout:
+        occupancy = OccupancyIndex.for_rooms(all_rooms, start=checkin, end=checkout, exclude_booking_id=booking.id)
+        available_rooms = [room for room in all_rooms if occupancy.is_free(room, checkin, checkout)]
+    else:
+        # If dates are invalid, show all rooms of the type
+        available_rooms = all_rooms
     
     if request.method == 'POST':
         room_id = request.POST.get('room')
-        booking.room = get_object_or_404(Room, id=room_id)
+        selected_room = next((room for room in available_rooms if str(room.id) == room_id), None)
+        if selected_room is None:
+            messages.error(request, 'The selected room is not available for those dates.')
+            return redirect(reverse('admin_panel:admin_booking_edit', args=[booking_id]))
+        booking.room = selected_room
         booking.checkin = checkin
         booking.checkout = checkout
         booking.save()
@@ -160,15 +191,10 @@ def admin_booking_delete(request, booking_id):
 # AJAX endpoint for room availability
 from django.views.decorators.csrf import csrf_exempt
 
-def is_room_available(room, checkin, checkout, exclude_booking_id=None):
-    overlapping = Booking.objects.filter(
-        room=room,
-        checkin__lt=checkout,
-        checkout__gt=checkin,
-    )
-    if exclude_booking_id:
-        overlapping = overlapping.exclude(id=exclude_booking_id)
-    return not overlapping.exists()
+def is_room_available(room, checkin, checkout, exclude_booking_id=None, occupancy=None):
+    if occupancy is None:
+        occupancy = OccupancyIndex.for_rooms([room], start=checkin, end=checkout, exclude_booking_id=exclude_booking_id)
+    return occupancy.is_free(room, checkin, checkout)
 
 @csrf_exempt
 def api_check_room_availability(request):
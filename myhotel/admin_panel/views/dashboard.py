@@ -1,61 +1,88 @@
 from django.views.generic import TemplateView
-from hotel.models import Booking
-from django.db.models.functions import TruncDay, TruncMonth, TruncYear, ExtractWeek, ExtractYear, ExtractMonth
-from django.db.models import Count, Q
+from hotel.models import BookingDailyRollup
+from django.db.models.functions import Coalesce, TruncDay, TruncWeek, TruncMonth, TruncYear
+from django.db.models import Q, Sum
 from django.utils import timezone
-import calendar
+from datetime import timedelta
+
+STATUSES = ('confirmed', 'pending', 'cancelled')
+
+
+def status_counts(prefix=None, window=None):
+    """
+    Sums of daily rollup counts per booking status, optionally restricted to a window
+    """
+    window = window or Q()
+    return {
+        f'{prefix}_{status}' if prefix else status: Coalesce(Sum('count', filter=window & Q(status=status)), 0)
+        for status in STATUSES
+    }
+
+
+def booking_series(trunc, since, label):
+    """
+    Booking counts per status grouped by period, in one grouped query over the rollups
+    """
+    rollups = BookingDailyRollup.objects.all()
+    if since is not None:
+        rollups = rollups.filter(date__gte=since)
+    rows = rollups.annotate(
+        period=trunc('date')
+    ).values('period').annotate(**status_counts()).order_by('period')
+    return [
+        {'label': label(row['period']), **{status: row[status] for status in STATUSES}}
+        for row in rows
+    ]
+
 
 class DashboardView(TemplateView):
     template_name = 'admin_panel/dashboard.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        now = timezone.now()
-        today = now.date()
-        current_year = now.year
-        current_month = now.month
-        current_week = now.isocalendar()[1]
-
-        # Bookings for today
-        bookings_today_qs = Booking.objects.filter(created_at__date=today)
-        bookings_today = {
-            'confirmed': bookings_today_qs.filter(status='confirmed').count(),
-            'pending': bookings_today_qs.filter(status='pending').count(),
-            'cancelled': bookings_today_qs.filter(status='cancelled').count(),
-        }
-        bookings_today['total'] = sum(bookings_today.values())
-
-        # Bookings for current month
-        bookings_month_qs = Booking.objects.filter(created_at__year=current_year, created_at__month=current_month)
-        bookings_month = {
-            'confirmed': bookings_month_qs.filter(status='confirmed').count(),
-            'pending': bookings_month_qs.filter(status='pending').count(),
-            'cancelled': bookings_month_qs.filter(status='cancelled').count(),
-        }
-        bookings_month['total'] = sum(bookings_month.values())
-
-        # Bookings for current year
-        bookings_year_qs = Booking.objects.filter(created_at__year=current_year)
-        bookings_year = {
-            'confirmed': bookings_year_qs.filter(status='confirmed').count(),
-            'pending': bookings_year_qs.filter(status='pending').count(),
-            'cancelled': bookings_year_qs.filter(status='cancelled').count(),
-        }
-        bookings_year['total'] = sum(bookings_year.values())
-
-        # All bookings (total counts by status)
-        all_bookings_qs = Booking.objects.all()
-        all_bookings = {
-            'confirmed': all_bookings_qs.filter(status='confirmed').count(),
-            'pending': all_bookings_qs.filter(status='pending').count(),
-            'cancelled': all_bookings_qs.filter(status='cancelled').count(),
+        # Rollup rows are keyed by the local day the booking was created
+        start_of_day = timezone.localdate()
+        start_of_month = start_of_day.replace(day=1)
+        start_of_year = start_of_month.replace(month=1)
+        end_of_month = (start_of_month + timedelta(days=32)).replace(day=1)
+        end_of_year = start_of_year.replace(year=start_of_year.year + 1)
+
+        windows = {
+            'bookings_today': Q(date=start_of_day),
+            'bookings_month': Q(date__gte=start_of_month, date__lt=end_of_month),
+            'bookings_year': Q(date__gte=start_of_year, date__lt=end_of_year),
+            'all_bookings': Q(),
         }
-        all_bookings['total'] = sum(all_bookings.values())
 
+        # Every status count for every period in one conditional aggregate
+        aggregates = {}
+        for period, window in windows.items():
+            aggregates.update(status_counts(period, window))
+        counts = BookingDailyRollup.objects.aggregate(**aggregates)
+
+        for period in windows:
+            stats = {status: counts[f'{period}_{status}'] for status in STATUSES}
+            stats['total'] = sum(stats.values())
+            context[period] = stats
+
+        # Chart data for dashboard_charts.js, one grouped query per granularity
+        start_of_week = start_of_day - timedelta(days=start_of_day.weekday())
         context.update({
-            'bookings_today': bookings_today,
-            'bookings_month': bookings_month,
-            'bookings_year': bookings_year,
-            'all_bookings': all_bookings,
+            'bookings_per_day': booking_series(
+                TruncDay, start_of_day - timedelta(days=29),
+                lambda period: period.strftime('%b %d')
+            ),
+            'bookings_per_week': booking_series(
+                TruncWeek, start_of_week - timedelta(weeks=11),
+                lambda period: f"{period.strftime('%b %d')} - {(period + timedelta(days=6)).strftime('%b %d')}"
+            ),
+            'bookings_per_month': booking_series(
+                TruncMonth, (start_of_month - timedelta(days=335)).replace(day=1),
+                lambda period: period.strftime('%b %Y')
+            ),
+            'bookings_per_year': booking_series(
+                TruncYear, None,
+                lambda period: period.strftime('%Y')
+            ),
         })
-        return context
\ No newline at end of file
+        return context
@@ -2,8 +2,10 @@ from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, DeleteView, UpdateView
 from django.contrib import messages
 from django.shortcuts import redirect
-from hotel.models import Guest
+from hotel.models import Guest, GuestStay
 from hotel.forms import GuestForm
+from hotel.guests import find_guest_by_email, find_guest_by_phone
+from hotel.soft_delete import alive_prefetch
 from ..permission_decorators import PermissionMixin
 
 class AdminGuestListView(PermissionMixin, ListView):
@@ -14,6 +16,11 @@ class AdminGuestListView(PermissionMixin, ListView):
     model_permission_type = 'view'
     redirect_url = 'admin_panel:dashboard'
 
+    def get_queryset(self):
+        """Guests with their stays, latest first, in one extra query"""
+        stays = GuestStay.objects.select_related('booking__room').order_by('-booking__checkin', '-booking_id')
+        return Guest.objects.prefetch_related(alive_prefetch('stays', stays, relations=['booking'])).order_by('id')
+
 class AdminGuestCreateView(PermissionMixin, CreateView):
     model = Guest
     form_class = GuestForm
@@ -29,7 +36,7 @@ class AdminGuestCreateView(PermissionMixin, CreateView):
         phone = form.cleaned_data.get('phone')
         
         # Check for existing guest by email first
-        existing_guest = Guest.objects.filter(email=email).first()
+        existing_guest = find_guest_by_email(email)
         
         if existing_guest:
             messages.warning(
@@ -40,7 +47,7 @@ class AdminGuestCreateView(PermissionMixin, CreateView):
             return redirect('admin_panel:admin_edit_guest', pk=existing_guest.pk)
         
         # Check for existing guest by phone as secondary check
-        existing_guest_by_phone = Guest.objects.filter(phone=phone).first()
+        existing_guest_by_phone = find_guest_by_phone(phone)
         
         if existing_guest_by_phone:
             messages.warning(
@@ -12,6 +12,9 @@ class AdminRoomTypeListView(PermissionMixin, ListView):
     model_permission_type = 'view'
     redirect_url = 'admin_panel:dashboard'
 
+    def get_queryset(self):
+        return RoomType.objects.catalogue()
+
 class AdminRoomTypeCreateView(PermissionMixin, CreateView):
     model = RoomType
     form_class = RoomTypeForm
@@ -1,9 +1,7 @@
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, DeleteView, UpdateView
 from django.utils import timezone
-from django.db.models import Q
-from datetime import timedelta
-from hotel.models import Room, Booking
+from hotel.models import Room
 from hotel.forms import RoomForm
 from ..permission_decorators import PermissionMixin
 
@@ -11,44 +9,24 @@ class AdminRoomListView(PermissionMixin, ListView):
     model = Room
     template_name = 'admin_panel/rooms.html'
     context_object_name = 'rooms'
+    paginate_by = 50
     required_section = 'room_setup'
     model_permission_type = 'view'
     redirect_url = 'admin_panel:dashboard'
-    
+    status_choices = ['occupied', 'available', 'disabled']
+
+    def get_queryset(self):
+        # Tonight's booking, the next arrival within a week, the room type and
+        # the hotel all come from one annotated query
+        self.today = timezone.localdate()
+        self.status_filter = self.request.GET.get('status', '')
+        return Room.objects.board(self.today).with_board_status(self.status_filter).order_by('room_number', 'id')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        today = timezone.now().date()
-        
-        # Add current booking status for each room
-        rooms_with_status = []
-        for room in context['rooms']:
-            # Check if room has any active bookings (confirmed or pending)
-            current_booking = Booking.objects.filter(
-                room=room,
-                checkin__lte=today,
-                checkout__gt=today,
-                status__in=['confirmed', 'pending']
-            ).first()
-            
-            # Check for upcoming bookings in the next 7 days
-            upcoming_booking = Booking.objects.filter(
-                room=room,
-                checkin__gt=today,
-                checkin__lte=today + timedelta(days=7),
-                status__in=['confirmed', 'pending']
-            ).order_by('checkin').first()
-            
-            room_data = {
-                'room': room,
-                'is_currently_occupied': current_booking is not None,
-                'current_booking': current_booking,
-                'upcoming_booking': upcoming_booking,
-                'actual_availability': room.is_available and current_booking is None
-            }
-            rooms_with_status.append(room_data)
-        
-        context['rooms_with_status'] = rooms_with_status
-        context['today'] = today
+        context['today'] = self.today
+        context['status_filter'] = self.status_filter
+        context['status_choices'] = self.status_choices
         return context
 
 class AdminRoomCreateView(PermissionMixin, CreateView):
@@ -4,13 +4,13 @@ from django.contrib.auth.models import User
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.urls import reverse
 from django.contrib.auth.forms import SetPasswordForm
 from django.utils.crypto import get_random_string
 from hotel.models import UserRole, Role
+from hotel.search import USER, search as search_documents, search_ids
 from ..forms import AdminUserRegistrationForm, AdminUserEditForm, UserSearchForm
 from ..permission_decorators import require_section_access, require_permission, require_model_permission, \
     require_superuser
@@ -28,13 +28,9 @@ def user_manager_list(request):
         role = form.cleaned_data.get('role')
         status = form.cleaned_data.get('status')
         
-        if search:
-            users = users.filter(
-                Q(username__icontains=search) |
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(email__icontains=search)
-            )
+        matches = search_documents(USER, search) if search else None
+        if matches is not None:
+            users = users.filter(id__in=matches.values('object_id'))
         
         if role:
             user_ids = UserRole.objects.filter(role=role).values_list('user_id', flat=True)
@@ -261,12 +257,10 @@ def user_manager_search_ajax(request):
     if len(query) < 2:
         return JsonResponse({'users': []})
     
-    users = User.objects.filter(
-        Q(username__icontains=query) |
-        Q(first_name__icontains=query) |
-        Q(last_name__icontains=query) |
-        Q(email__icontains=query)
-    )[:10]
+    # Best matches first, from the indexed search documents
+    user_ids = search_ids(USER, query, limit=10)
+    users_by_id = User.objects.in_bulk(user_ids)
+    users = [users_by_id[user_id] for user_id in user_ids if user_id in users_by_id]
     
     user_data = []
     for user in users:
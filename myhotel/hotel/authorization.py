@@ -0,0 +1,221 @@
+"""
+Authorization service shared by the public site and the admin panel.
+
+Every permission check (decorators, PermissionMixin, template tags and
+context processors) goes through this module. AuthorizationMiddleware
+attaches the user's cached permission set to the request, loading it up
+front for admin panel views, and request checks read that set, so one
+request costs at most one permission query and templates none.
+"""
+from functools import wraps
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.contrib.contenttypes.models import ContentType
+from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
+from .models import Permission
+from .permission_cache import get_permission_codenames, get_role_names
+
+SECTIONS = ['booking', 'guest', 'room_setup', 'hotel_setup', 'contact', 'account']
+ADMIN_NAMESPACE = 'admin_panel'
+
+
+def is_admin_request(request):
+    """True if the request was routed to an admin panel view"""
+    match = getattr(request, 'resolver_match', None)
+    return match is not None and ADMIN_NAMESPACE in match.namespaces
+
+
+def has_permission(user, permission_codename):
+    """
+    Check if a user has a specific permission through their roles
+    """
+    if user is None or not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    return permission_codename in get_permission_codenames(user)
+
+
+def request_permission_codenames(request):
+    """
+    The permission set AuthorizationMiddleware attached to the request; loaded
+    here if the middleware did not run (e.g. a bare RequestFactory request)
+    """
+    codenames = getattr(request, 'permission_codenames', None)
+    if codenames is None:
+        codenames = get_permission_codenames(getattr(request, 'user', None))
+    return codenames
+
+
+def request_has_permission(request, permission_codename):
+    """
+    Check a permission of the request's user against the request's permission set
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    return permission_codename in request_permission_codenames(request)
+
+
+def request_has_section_access(request, section):
+    return request_has_permission(request, f"access_{section}")
+
+
+def has_section_access(user, section):
+    """
+    Check if user has access to a specific section
+    """
+    return has_permission(user, f"access_{section}")
+
+
+def has_model_permission(user, model_name, action):
+    """
+    Check if user has permission for a specific model action
+    """
+    return has_permission(user, f"{action}_{model_name}")
+
+
+def model_permission_codename(model_class, permission_type):
+    content_type = ContentType.objects.get_for_model(model_class)
+    return f"{permission_type}_{content_type.model}"
+
+
+def get_user_permissions(user):
+    """
+    Get all permissions for a user
+    """
+    if user.is_superuser:
+        return Permission.objects.all()
+    return Permission.objects.filter(codename__in=get_permission_codenames(user))
+
+
+def get_user_permission_codenames(user):
+    """
+    Get all permission codenames for a user
+    """
+    return list(get_permission_codenames(user))
+
+
+def get_user_accessible_sections(user):
+    """
+    Get list of sections the user has access to
+    """
+    return [section for section in SECTIONS if has_section_access(user, section)]
+
+
+def get_user_role_names(user):
+    """
+    Names of the user's active roles
+    """
+    if user.is_superuser:
+        return ['Administrator']
+    return list(get_role_names(user))
+
+
+def require_permission(permission_codename, redirect_url):
+    """
+    Decorator to require a specific permission for a view
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        @login_required
+        def _wrapped_view(request, *args, **kwargs):
+            if request_has_permission(request, permission_codename):
+                return view_func(request, *args, **kwargs)
+            messages.error(request, f'You do not have permission to access this page. Required permission: {permission_codename}')
+            return redirect(redirect_url)
+        return _wrapped_view
+    return decorator
+
+
+def require_section_access(section, redirect_url):
+    """
+    Decorator to require access to a specific section
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        @login_required
+        def _wrapped_view(request, *args, **kwargs):
+            if request_has_section_access(request, section):
+                return view_func(request, *args, **kwargs)
+            messages.error(request, f'You do not have access to the {section} section.')
+            return redirect(redirect_url)
+        return _wrapped_view
+    return decorator
+
+
+def require_model_permission(model_class, permission_type, redirect_url):
+    """
+    Decorator to require a specific model permission for a view
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        @login_required
+        def _wrapped_view(request, *args, **kwargs):
+            if request_has_permission(request, model_permission_codename(model_class, permission_type)):
+                return view_func(request, *args, **kwargs)
+            model_name = ContentType.objects.get_for_model(model_class).model
+            messages.error(request, f'You do not have permission to {permission_type} {model_name} records.')
+            return redirect(redirect_url)
+        return _wrapped_view
+    return decorator
+
+
+class PermissionMixin:
+    """
+    Mixin for class-based views to check permissions
+    """
+    permission_required = None
+    model_permission_type = None
+    required_section = None
+    redirect_url = 'dashboard'
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return redirect('login')
+
+        # Check section access first
+        if self.required_section:
+            if not request_has_section_access(request, self.required_section):
+                messages.error(request, f'You do not have access to the {self.required_section} section.')
+                return redirect(self.redirect_url)
+
+        # Check specific permission
+        if self.permission_required:
+            if not request_has_permission(request, self.permission_required):
+                messages.error(request, f'You do not have permission to access this page. Required permission: {self.permission_required}')
+                return redirect(self.redirect_url)
+
+        # Check model permission
+        elif self.model_permission_type and hasattr(self, 'model'):
+            if not request_has_permission(request, model_permission_codename(self.model, self.model_permission_type)):
+                model_name = ContentType.objects.get_for_model(self.model).model
+                messages.error(request, f'You do not have permission to {self.model_permission_type} {model_name} records.')
+                return redirect(self.redirect_url)
+
+        return super().dispatch(request, *args, **kwargs)
+
+
+class AuthorizationMiddleware:
+    """
+    Attach the user's permission set to the request
+
+    Public pages get a lazy set that is only loaded if something checks a
+    permission; admin panel views get it loaded before the view runs.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.permission_codenames = SimpleLazyObject(
+            lambda: get_permission_codenames(getattr(request, 'user', None))
+        )
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if is_admin_request(request):
+            request.permission_codenames = get_permission_codenames(request.user)
+        return None
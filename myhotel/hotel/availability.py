@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q
+from .cache_versions import get_version, bump_version
+from .holds import held_rooms_by_type
+from .models import BLOCKING_STATUSES, Booking, Room, RoomType
+from .soft_delete import alive_q
+
+AVAILABILITY_VERSION_KEY = 'availability:version'
+MATRIX_CACHE_TIMEOUT = 60
+
+
+def overlapping_bookings(checkin, checkout, exclude_booking_id=None):
+    """
+    Bookings that occupy a room for at least one night of [checkin, checkout)
+    """
+    bookings = Booking.objects.filter(
+        checkin__lt=checkout,
+        checkout__gt=checkin,
+        status__in=BLOCKING_STATUSES
+    )
+    if exclude_booking_id:
+        bookings = bookings.exclude(id=exclude_booking_id)
+    return bookings
+
+
+def find_available_rooms(room_type, checkin, checkout, exclude_booking_id=None):
+    """
+    Rooms of the given type that are free for the whole stay.
+
+    The overlap test is a correlated NOT EXISTS subquery, so the database
+    answers for every room at once instead of one query per room.
+    """
+    clashes = overlapping_bookings(checkin, checkout, exclude_booking_id).filter(room=OuterRef('pk'))
+    return Room.objects.filter(
+        room_type=room_type,
+        is_available=True
+    ).filter(~Exists(clashes))
+
+
+def count_available_rooms(room_type, checkin, checkout, exclude_booking_id=None):
+    """
+    Number of free rooms of the given type for the stay, in a single query
+    """
+    return find_available_rooms(room_type, checkin, checkout, exclude_booking_id).count()
+
+
+def availability_matrix(checkin, checkout):
+    """
+    Free room count and stay price for every room type, less rooms held for
+    payments in progress, in two grouped queries
+    """
+    clashes = overlapping_bookings(checkin, checkout).filter(room=OuterRef('room'))
+    room_types = RoomType.objects.values('id', 'name', 'capacity', 'base_price').annotate(
+        available_rooms=Count(
+            'room',
+            filter=Q(room__is_available=True) & alive_q('room') & ~Exists(clashes)
+        )
+    ).order_by('id')
+
+    held = held_rooms_by_type(checkin, checkout)
+    number_of_nights = (checkout - checkin).days
+    return [
+        dict(
+            room_type,
+            available_rooms=max(room_type['available_rooms'] - held.get(room_type['id'], 0), 0),
+            stay_price=room_type['base_price'] * number_of_nights
+        )
+        for room_type in room_types
+    ]
+
+
+def availability_version():
+    """
+    Current availability version, bumped whenever bookings or rooms change
+    """
+    return get_version(AVAILABILITY_VERSION_KEY)
+
+
+def bump_availability_version():
+    bump_version(AVAILABILITY_VERSION_KEY)
+
+
+def cached_availability_matrix(checkin, checkout):
+    """
+    availability_matrix() cached as one object per stay and availability version
+    """
+    key = f'availability:matrix:{availability_version()}:{checkin}:{checkout}'
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = availability_matrix(checkin, checkout)
+        cache.set(key, matrix, MATRIX_CACHE_TIMEOUT)
+    return matrix
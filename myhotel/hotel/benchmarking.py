@@ -0,0 +1,52 @@
+"""
+Helpers shared by the benchmark and query-plan management commands.
+
+Seeded data is meant to live inside a transaction that the caller rolls back.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+from .models import RoomType, Room, Booking
+
+
+def seed_dataset(rng, room_types=5, rooms=2000, bookings=10000):
+    """
+    Bulk-create room types, rooms and bookings spread over the last year
+    and the next six months. Returns the created room types.
+    """
+    created_types = [
+        RoomType.objects.create(
+            name=f'Benchmark Type {i}',
+            description='Benchmark room type',
+            base_price=Decimal('25000.00'),
+            capacity=2,
+        )
+        for i in range(room_types)
+    ]
+    created_rooms = Room.objects.bulk_create([
+        Room(room_type=created_types[i % len(created_types)], room_number=f'BM{i}', is_available=True)
+        for i in range(rooms)
+    ])
+
+    now = timezone.now()
+    today = now.date()
+    new_bookings = []
+    for _ in range(bookings):
+        checkin = today + timedelta(days=rng.randint(-365, 180))
+        new_bookings.append(Booking(
+            room=rng.choice(created_rooms),
+            checkin=checkin,
+            checkout=checkin + timedelta(days=rng.randint(1, 7)),
+            guests=1,
+            total_price=Decimal('25000.00'),
+            created_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 730)),
+            status=rng.choice(['confirmed', 'pending', 'cancelled']),
+        ))
+    Booking.objects.bulk_create(new_bookings, batch_size=1000)
+    return created_types
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -6,7 +6,12 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 import requests
 import json
-from .models import Booking, Guest, RoomType, Room
+from .models import Booking, RoomType
+from .availability import count_available_rooms
+from .booking_service import create_bookings, place_hold, release_hold, stay_price
+from .holds import held_rooms
+from .payment_events import record_event
+from . import payments, paystack
 from decimal import Decimal
 from datetime import date
 import logging
@@ -27,14 +32,12 @@ def submit_booking(request):
         guests = int(request.POST.get('modalGuests', 0))
         # Accept both modalRooms and rooms for robustness
         rooms = int(request.POST.get('modalRooms') or request.POST.get('rooms') or 0)
-        base_price_str = request.POST.get('modalBasePrice', '0').replace('₦', '').strip()
-        total_cost_str = request.POST.get('modalTotalCost', '0').replace('₦', '').strip()
         first_name = request.POST.get('first_name')
         last_name = request.POST.get('last_name')
         email = request.POST.get('email')
         phone = request.POST.get('phone')
         special_requests = request.POST.get('special_requests', '')
-        logger.error(f"transaction_id: {request.POST.get('transaction_id')}, payment_status: {request.POST.get('payment_status')}")
+        logger.error(f"reference: {request.POST.get('reference')}, hold_reference: {request.POST.get('hold_reference')}")
 
         required_fields = {
             'checkin': checkin, 'checkout': checkout, 'room_type': room_type_id,
@@ -53,83 +56,51 @@ def submit_booking(request):
             logger.warning("Guests and rooms must be positive")
             return JsonResponse({'success': False, 'errors': 'Guests and rooms must be positive'}, status=400)
 
-        base_price = Decimal(base_price_str)
-        total_cost = Decimal(total_cost_str)
-
         room_type = RoomType.objects.get(id=room_type_id)
-        available_rooms = Room.objects.filter(
-            room_type=room_type, is_available=True
-        ).exclude(
-            booking__checkin__lt=checkout,
-            booking__checkout__gt=checkin,
-            booking__status='confirmed'
-        )
-        if available_rooms.count() < rooms:
-            logger.warning(f"Not enough rooms available: {rooms} requested, {available_rooms.count()} available")
-            return JsonResponse({'success': False, 'errors': f'Only {available_rooms.count()} room(s) available'}, status=400)
+        hold_reference = request.POST.get('hold_reference')
 
-        # Accept payment_status and transaction_id from POST (preferred over session)
-        payment_status = request.POST.get('payment_status') or request.session.get('payment_status')
-        transaction_id = request.POST.get('transaction_id') or request.session.get('transaction_id')
-        expected_amount = request.session.get('expected_amount')
-        if payment_status != 'success' or not transaction_id or not expected_amount:
-            logger.warning("Booking attempted without successful payment")
+        # Payment status comes from the stored verification of the reference,
+        # not from fields the browser sends
+        reference = request.POST.get('reference') or hold_reference
+        verification = payments.get_verification(reference)
+        if verification is None:
+            logger.warning(f"Booking attempted without successful payment: reference={reference}")
             return JsonResponse({'success': False, 'errors': 'Payment not verified'}, status=400)
+        # The price is worked out here, never taken from the browser
+        if abs(verification.amount - stay_price(room_type, checkin, checkout, rooms)) > Decimal('0.01'):
+            logger.warning(f"Booking amount does not match payment: reference={reference}")
+            return JsonResponse({'success': False, 'errors': 'Payment not verified'}, status=400)
+        transaction_id = verification.transaction_id
+
+        # A repeated submission for the same payment returns the bookings it made;
+        # create_bookings checks again under a lock for submissions racing this one
+        booking_ids = list(Booking.objects.filter(payment_reference=reference).order_by('id').values_list('id', flat=True))
+        if booking_ids:
+            logger.info(f"Bookings already created for reference {reference}: IDs {booking_ids}")
+            return JsonResponse({'success': True, 'booking_id': booking_ids[0], 'booking_ids': booking_ids})
+
+        available_count = count_available_rooms(room_type, checkin, checkout)
+        # Rooms held for other guests' payments are not ours to take
+        available_count -= held_rooms(room_type, checkin, checkout, exclude_reference=hold_reference)
+        available_count = max(available_count, 0)
+        if available_count < rooms:
+            logger.warning(f"Not enough rooms available: {rooms} requested, {available_count} available")
+            return JsonResponse({'success': False, 'errors': f'Only {available_count} room(s) available'}, status=400)
 
-        # Create booking first
-        booking = Booking(
-            room=available_rooms.first(),
-            checkin=checkin,
-            checkout=checkout,
+        bookings, guest = create_bookings(
+            room_type, checkin, checkout, rooms,
+            guest_details={'first_name': first_name, 'last_name': last_name, 'email': email, 'phone': phone},
             guests=guests,
-            total_price=total_cost,
             special_request=special_requests,
             status='confirmed',
-            transaction_id=transaction_id
+            transaction_id=transaction_id,
+            hold_reference=hold_reference,
+            payment_reference=reference
         )
-        booking.save()
 
-        # Check if guest already exists before creating a new one
-        # First try to find by email (primary identifier)
-        existing_guest = Guest.objects.filter(email=email).first()
-        
-        if existing_guest:
-            # Guest exists, update their information if needed and associate with new booking
-            guest = existing_guest
-            # Update guest information in case it has changed
-            guest.first_name = first_name
-            guest.last_name = last_name
-            guest.phone = phone
-            guest.booking = booking  # Associate with the new booking
-            guest.save()
-            logger.info(f"Existing guest found and updated: {email}")
-        else:
-            # Check if guest exists by phone number as secondary identifier
-            existing_guest_by_phone = Guest.objects.filter(phone=phone).first()
-            
-            if existing_guest_by_phone:
-                # Guest exists with same phone but different email
-                # Update their information and associate with new booking
-                guest = existing_guest_by_phone
-                guest.first_name = first_name
-                guest.last_name = last_name
-                guest.email = email  # Update email
-                guest.booking = booking
-                guest.save()
-                logger.info(f"Existing guest found by phone and updated: {phone} -> {email}")
-            else:
-                # No existing guest found, create new one
-                guest = Guest.objects.create(
-                    booking=booking,
-                    first_name=first_name,
-                    last_name=last_name,
-                    email=email,
-                    phone=phone
-                )
-                logger.info(f"New guest created: {email}")
-
-        logger.info(f"Booking created: ID {booking.id} for {guest.email}, transaction_id={transaction_id}")
-        return JsonResponse({'success': True, 'booking_id': booking.id})
+        booking_ids = [booking.id for booking in bookings]
+        logger.info(f"Bookings created: IDs {booking_ids} for {guest.email}, transaction_id={transaction_id}")
+        return JsonResponse({'success': True, 'booking_id': booking_ids[0], 'booking_ids': booking_ids})
 
     except RoomType.DoesNotExist:
         logger.error("Invalid room type")
@@ -190,67 +161,73 @@ def verify_payment(request):
             logger.error(f"Body data: {data}")
             return JsonResponse({'status': 'error', 'message': 'Missing reference'}, status=400)
 
-        # Check if Paystack secret key is configured
-        if not hasattr(settings, 'PAYSTACK_SECRET_KEY') or not settings.PAYSTACK_SECRET_KEY:
-            logger.error("PAYSTACK_SECRET_KEY not configured")
-            return JsonResponse({'status': 'error', 'message': 'Payment system not configured'}, status=500)
+        verification = payments.get_verification(reference)
+        if verification is None:
+            failure = payments.get_failure(reference)
+            if failure:
+                logger.error(f"Payment verification failed recently, not asking Paystack again: reference={reference}")
+                return JsonResponse({'status': 'failed', 'message': failure}, status=400)
 
-        headers = {
-            'Authorization': f'Bearer {settings.PAYSTACK_SECRET_KEY}',
-            'Content-Type': 'application/json'
-        }
-        logger.error(f"Sending verification request to Paystack for reference: {reference}")
-        
-        try:
-            response = requests.get(
-                f'https://api.paystack.co/transaction/verify/{reference}',
-                headers=headers,
-                timeout=30
-            )
-        except requests.RequestException as e:
-            logger.error(f"Network error verifying payment: {str(e)}")
-            return JsonResponse({'status': 'error', 'message': f'Network error: {str(e)}'}, status=500)
-        
-        try:
-            response_data = response.json()
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON response from Paystack: {response.text}")
-            return JsonResponse({'status': 'error', 'message': 'Invalid response from payment provider'}, status=500)
-        
-        logger.error(f"Paystack response: status_code={response.status_code}, data={response_data}")
+            # Check if Paystack secret key is configured
+            if not hasattr(settings, 'PAYSTACK_SECRET_KEY') or not settings.PAYSTACK_SECRET_KEY:
+                logger.error("PAYSTACK_SECRET_KEY not configured")
+                return JsonResponse({'status': 'error', 'message': 'Payment system not configured'}, status=500)
 
-        if response.status_code == 200 and response_data.get('status') and response_data.get('data', {}).get('status') == 'success':
-            expected_amount = request.session.get('expected_amount')
-            logger.error(f"Session expected_amount: {expected_amount}")
-            
-            if not expected_amount:
-                logger.error("No expected amount in session")
-                return JsonResponse({'status': 'error', 'message': 'Session expired. Please try again.'}, status=400)
-            
-            expected_amount = Decimal(expected_amount)  # Already in Naira
-            paid_amount = Decimal(response_data['data']['amount']) / 100  # Convert kobo to Naira
-            logger.error(f"Comparing amounts: expected={expected_amount}, paid={paid_amount}, raw_paid_amount={response_data['data']['amount']}")
-
-            if abs(paid_amount - expected_amount) > Decimal('0.01'):  # Allow small rounding differences
-                logger.error(f"Amount mismatch: expected {expected_amount}, paid {paid_amount}")
-                return JsonResponse({'status': 'error', 'message': f'Payment amount mismatch. Expected: ₦{expected_amount}, Paid: ₦{paid_amount}'}, status=400)
-
-            request.session['payment_status'] = 'success'
-            request.session['transaction_id'] = response_data['data']['id']
-            request.session.modified = True
-            logger.info(f"Payment verified: reference={reference}, transaction_id={response_data['data']['id']}")
-            return JsonResponse({
-                'status': 'success',
-                'message': 'Payment verified',
-                'transaction_id': response_data['data']['id'],
-                'payment_status': 'success'
-            })
-        else:
-            logger.error(f"Payment verification failed: reference={reference}, response: {response_data}")
-            error_message = 'Payment verification failed'
-            if response_data.get('message'):
-                error_message = response_data['message']
-            return JsonResponse({'status': 'failed', 'message': error_message}, status=400)
+            logger.error(f"Sending verification request to Paystack for reference: {reference}")
+
+            try:
+                response = paystack.verify_transaction(reference)
+            except requests.Timeout:
+                logger.error(f"Paystack timed out verifying payment: {reference}")
+                return JsonResponse({'status': 'error', 'message': 'Payment provider is slow to respond. Please try again.'}, status=504)
+            except requests.RequestException as e:
+                logger.error(f"Network error verifying payment: {str(e)}")
+                return JsonResponse({'status': 'error', 'message': f'Network error: {str(e)}'}, status=500)
+
+            try:
+                response_data = response.json()
+            except json.JSONDecodeError as e:
+                logger.error(f"Invalid JSON response from Paystack: {response.text}")
+                return JsonResponse({'status': 'error', 'message': 'Invalid response from payment provider'}, status=500)
+
+            logger.error(f"Paystack response: status_code={response.status_code}, data={response_data}")
+
+            if not (response.status_code == 200 and response_data.get('status') and response_data.get('data', {}).get('status') == 'success'):
+                logger.error(f"Payment verification failed: reference={reference}, response: {response_data}")
+                error_message = 'Payment verification failed'
+                if response_data.get('message'):
+                    error_message = response_data['message']
+                if response.status_code < 500:
+                    payments.remember_failure(reference, error_message)
+                return JsonResponse({'status': 'failed', 'message': error_message}, status=400)
+
+            verification = payments.record_verification(reference, response_data['data'])
+
+        expected_amount = request.session.get('expected_amount')
+        logger.error(f"Session expected_amount: {expected_amount}")
+
+        if not expected_amount:
+            logger.error("No expected amount in session")
+            return JsonResponse({'status': 'error', 'message': 'Session expired. Please try again.'}, status=400)
+
+        expected_amount = Decimal(expected_amount)  # Already in Naira
+        paid_amount = verification.amount
+        logger.error(f"Comparing amounts: expected={expected_amount}, paid={paid_amount}")
+
+        if abs(paid_amount - expected_amount) > Decimal('0.01'):  # Allow small rounding differences
+            logger.error(f"Amount mismatch: expected {expected_amount}, paid {paid_amount}")
+            return JsonResponse({'status': 'error', 'message': f'Payment amount mismatch. Expected: ₦{expected_amount}, Paid: ₦{paid_amount}'}, status=400)
+
+        request.session['payment_status'] = 'success'
+        request.session['transaction_id'] = verification.transaction_id
+        request.session.modified = True
+        logger.info(f"Payment verified: reference={reference}, transaction_id={verification.transaction_id}")
+        return JsonResponse({
+            'status': 'success',
+            'message': 'Payment verified',
+            'transaction_id': verification.transaction_id,
+            'payment_status': 'success'
+        })
 
     except Exception as e:
         logger.error(f"Unexpected error verifying payment: {str(e)}", exc_info=True)
@@ -277,18 +254,62 @@ def store_expected_amount(request):
         logger.error(f"Error storing expected amount: {str(e)}")
         return JsonResponse({'success': False, 'errors': str(e)}, status=400)
 
+@require_POST
+def place_room_hold(request):
+    """
+    Hold the requested rooms while the guest pays, so a sold-out stay is
+    rejected before payment instead of after it
+    """
+    try:
+        checkin = parse_date(request.POST.get('checkin') or '')
+        checkout = parse_date(request.POST.get('checkout') or '')
+        room_type_id = request.POST.get('roomType')
+        rooms = int(request.POST.get('rooms') or 0)
+        reference = request.POST.get('reference')
+        if not checkin or not checkout or not room_type_id or not reference or rooms <= 0:
+            return JsonResponse({'success': False, 'errors': 'Missing or invalid hold details'}, status=400)
+        if checkin >= checkout or checkin < date.today():
+            return JsonResponse({'success': False, 'errors': 'Invalid check-in/check-out dates'}, status=400)
+
+        room_type = RoomType.objects.get(id=room_type_id)
+        hold = place_hold(room_type, checkin, checkout, rooms, reference)
+        logger.info(f"Hold placed: {reference} for {rooms} x {room_type} until {hold.expires_at}")
+        return JsonResponse({'success': True, 'reference': reference, 'expires_at': hold.expires_at.isoformat()})
+    except RoomType.DoesNotExist:
+        return JsonResponse({'success': False, 'errors': 'Invalid room type'}, status=400)
+    except ValidationError as e:
+        logger.warning(f"Hold refused for {request.POST.get('reference')}: {e.messages[0]}")
+        return JsonResponse({'success': False, 'errors': e.messages[0]}, status=409)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'errors': f'Invalid numeric value: {str(e)}'}, status=400)
+
+@require_POST
+def release_room_hold(request):
+    """
+    Release a hold when the guest abandons the payment
+    """
+    release_hold(request.POST.get('reference'))
+    return JsonResponse({'success': True})
+
 @require_POST
 @csrf_exempt
 def webhook(request):
+    """
+    Store a signed Paystack event in the inbox and acknowledge it at once;
+    process_payment_events applies it to the bookings later
+    """
+    if not paystack.valid_signature(request.body, request.headers.get('X-Paystack-Signature')):
+        logger.warning("Webhook rejected: invalid signature")
+        return JsonResponse({'status': 'error'}, status=401)
     try:
         payload = json.loads(request.body)
-        event = payload.get('event')
-        if event == 'charge.success':
-            reference = payload['data']['reference']
-            status = payload['data']['status']
-            logger.info(f"Webhook received: event={event}, reference={reference}, status={status}")
-            # Update booking status if needed
-        return JsonResponse({'status': 'success'})
-    except Exception as e:
-        logger.error(f"Webhook error: {str(e)}")
-        return JsonResponse({'status': 'error'}, status=400)
\ No newline at end of file
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        logger.warning("Webhook rejected: invalid JSON")
+        return JsonResponse({'status': 'error'}, status=400)
+
+    event = record_event(payload) if isinstance(payload, dict) else None
+    if event is None:
+        logger.info("Webhook ignored: no event or reference")
+    else:
+        logger.info(f"Webhook received: {event}")
+    return JsonResponse({'status': 'success'})
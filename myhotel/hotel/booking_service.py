@@ -0,0 +1,240 @@
+"""
+Transactional booking creation.
+
+Rooms are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so parallel
+checkouts for the same room type lock different free rooms instead of
+queueing on one row. Once a room is locked its bookings are checked again
+in a fresh statement: a booking committed after our candidate query started
+is visible to that check, and nobody else can add one while we hold the
+lock. On databases without row locks (SQLite) the transaction itself
+serializes writers.
+
+Bookings are written with bulk_create, which skips the Booking signals;
+record_bulk_bookings() applies the inventory, rollup and availability
+updates those signals would have made, and create_bookings() indexes the
+bookings for search.
+"""
+import logging
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .availability import (
+    bump_availability_version, count_available_rooms, find_available_rooms, overlapping_bookings
+)
+from .guests import find_guest
+from .holds import held_rooms, hold_expiry
+from .models import Booking, Guest, GuestStay, PaymentVerification, RoomHold, RoomType
+from . import inventory, rollups, search
+
+logger = logging.getLogger(__name__)
+
+# Locked candidates that turn out to be taken before giving up
+MAX_ROOM_ATTEMPTS = 10
+
+
+def lock_free_rooms(room_type, checkin, checkout, count):
+    """
+    Lock and return up to count free rooms of the given type.
+    Must be called inside a transaction.
+    """
+    locked = []
+    skipped = []
+    for _ in range(MAX_ROOM_ATTEMPTS):
+        wanted = count - len(locked)
+        if not wanted:
+            break
+        rooms = list(
+            find_available_rooms(room_type, checkin, checkout)
+            .exclude(id__in=skipped + [room.id for room in locked])
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('id')[:wanted]
+        )
+        if not rooms:
+            break
+        # Rooms booked by a transaction that committed after our snapshot
+        taken = set(overlapping_bookings(checkin, checkout).filter(
+            room__in=rooms
+        ).values_list('room_id', flat=True))
+        locked.extend(room for room in rooms if room.id not in taken)
+        skipped.extend(taken)
+    return locked
+
+
+def lock_free_room(room_type, checkin, checkout):
+    """
+    Lock and return a free room of the given type, or None if none is left.
+    Must be called inside a transaction.
+    """
+    rooms = lock_free_rooms(room_type, checkin, checkout, 1)
+    return rooms[0] if rooms else None
+
+
+def split_guests(guests, rooms, capacity):
+    """
+    Spread a party over rooms as evenly as possible, e.g. 5 guests in 3 rooms -> [2, 2, 1]
+    """
+    if guests < rooms:
+        raise ValidationError(f"{rooms} rooms need at least {rooms} guests.")
+    per_room = [guests // rooms + (1 if index < guests % rooms else 0) for index in range(rooms)]
+    if per_room[0] > capacity:
+        raise ValidationError(
+            f"{guests} guests do not fit in {rooms} room(s) with a maximum capacity of {capacity}."
+        )
+    return per_room
+
+
+def record_bulk_bookings(bookings):
+    """
+    Do what the Booking signals would have done for bookings written with bulk_create
+    """
+    footprints = defaultdict(int)
+    for booking in bookings:
+        booking._inventory_footprint = inventory.booking_footprint(booking)
+        booking._inventory_unknown = False
+        booking._rollup_footprint = rollups.booking_footprint(booking)
+        booking._rollup_unknown = False
+        footprints[(inventory.apply_footprint, booking._inventory_footprint)] += 1
+        footprints[(rollups.apply_footprint, booking._rollup_footprint)] += 1
+    # Bookings of one request share their footprints, so each is applied once
+    for (apply, footprint), delta in footprints.items():
+        if footprint:
+            apply(footprint, delta)
+    bump_availability_version()
+
+
+def stay_price(room_type, checkin, checkout, rooms=1):
+    """What the stay costs at the room type's base price"""
+    return room_type.base_price * (checkout - checkin).days * rooms
+
+
+def save_guest(bookings, first_name, last_name, email, phone):
+    """
+    Register the guest on the bookings, reusing a guest found by email, then by
+    phone (see hotel.guests.find_guest). A returning guest keeps their earlier
+    stays; each booking is added to their GuestStay history.
+    """
+    guest = find_guest(email, phone)
+    if guest is None:
+        guest = Guest(first_name=first_name, last_name=last_name, email=email, phone=phone)
+        logger.info(f"New guest created: {email}")
+    else:
+        # Update guest information in case it has changed
+        guest.first_name = first_name
+        guest.last_name = last_name
+        guest.email = email
+        guest.phone = phone
+        logger.info(f"Existing guest found and updated: {email}")
+    guest.booking = bookings[0]  # The most recent stay
+    guest.save()
+    GuestStay.objects.bulk_create(
+        [GuestStay(guest=guest, booking=booking) for booking in bookings],
+        ignore_conflicts=True,
+    )
+    return guest
+
+
+def place_hold(room_type, checkin, checkout, rooms, reference):
+    """
+    Hold rooms for a payment reference, or raise ValidationError if they are gone.
+    Placing a hold again for the same reference replaces it.
+    """
+    with transaction.atomic():
+        # Serialize hold placement per room type so two guests cannot both
+        # take the last room
+        RoomType.objects.select_for_update().filter(id=room_type.id).first()
+
+        available = count_available_rooms(room_type, checkin, checkout)
+        available -= held_rooms(room_type, checkin, checkout, exclude_reference=reference)
+        if available < rooms:
+            raise ValidationError(f'Only {max(available, 0)} room(s) available for the selected dates.')
+
+        hold, _ = RoomHold.objects.update_or_create(
+            reference=reference,
+            defaults={
+                'room_type': room_type,
+                'checkin': checkin,
+                'checkout': checkout,
+                'rooms': rooms,
+                'expires_at': hold_expiry(),
+            }
+        )
+    bump_availability_version()
+    return hold
+
+
+def release_hold(reference):
+    """Drop the hold for a payment reference once it is booked or abandoned"""
+    if reference and RoomHold.objects.filter(reference=reference).delete()[0]:
+        bump_availability_version()
+
+
+def create_bookings(room_type, checkin, checkout, rooms, guest_details, guests, special_request='',
+                    status='confirmed', transaction_id=None, hold_reference=None, payment_reference=None):
+    """
+    Book the given number of free rooms of one type for a party, atomically.
+    Bookings and the extra guest records are written with bulk_create.
+    Rooms held for other payments are left alone; the hold for
+    hold_reference, if any, is used up. Returns the bookings and the lead
+    guest; raises ValidationError when the party does not fit or not
+    enough rooms are free. A payment_reference that already has bookings
+    returns those instead of booking again.
+    """
+    if checkin >= checkout:
+        raise ValidationError("Check-in must be before check-out.")
+    party = split_guests(guests, rooms, room_type.capacity)
+    price = stay_price(room_type, checkin, checkout)
+
+    with transaction.atomic():
+        if payment_reference:
+            # Submissions of one payment queue on its verification row, so a
+            # repeat sees the bookings the first one made
+            list(PaymentVerification.objects.select_for_update().filter(reference=payment_reference))
+            existing = list(Booking.objects.filter(payment_reference=payment_reference).order_by('id'))
+            if existing:
+                return existing, existing[0].registered_guests.order_by('id').first()
+
+        free = lock_free_rooms(room_type, checkin, checkout, rooms)
+        if len(free) < rooms:
+            raise ValidationError(f'Only {len(free)} room(s) available for the selected dates.')
+        held = held_rooms(room_type, checkin, checkout, exclude_reference=hold_reference)
+        if held:
+            available = count_available_rooms(room_type, checkin, checkout) - held
+            if available < rooms:
+                raise ValidationError(f'Only {max(available, 0)} room(s) available for the selected dates.')
+
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                room=room,
+                checkin=checkin,
+                checkout=checkout,
+                guests=room_guests,
+                total_price=price,
+                special_request=special_request,
+                status=status,
+                transaction_id=transaction_id,
+                payment_reference=payment_reference
+            )
+            for room, room_guests in zip(free, party)
+        ])
+        record_bulk_bookings(bookings)
+
+        # Every room is registered to the lead guest
+        guest = save_guest(bookings, **guest_details)
+        if hold_reference:
+            RoomHold.objects.filter(reference=hold_reference).delete()
+        # The stays were bulk created, so their bookings are indexed here
+        search.index_bookings([booking.id for booking in bookings])
+    return bookings, guest
+
+
+def create_booking(room_type, checkin, checkout, guest_details, guests, special_request='',
+                   status='confirmed', transaction_id=None):
+    """
+    Book one free room of the given type and record the guest, atomically.
+    Raises ValidationError when no room is free for the stay.
+    """
+    bookings, guest = create_bookings(
+        room_type, checkin, checkout, 1, guest_details, guests,
+        special_request=special_request, status=status, transaction_id=transaction_id
+    )
+    return bookings[0], guest
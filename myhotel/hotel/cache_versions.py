@@ -0,0 +1,26 @@
+"""
+Version counters for invalidating groups of cache entries.
+
+Cache keys embed the current version of what they depend on; bumping the
+version makes every older entry unreachable at once, and they expire on
+their own. Counters start from the clock (in microseconds) so a counter
+that was evicted never comes back with a version old entries still use.
+"""
+import time
+from django.core.cache import cache
+
+
+def clock_version():
+    return time.time_ns() // 1000
+
+
+def get_version(key):
+    return cache.get_or_set(key, clock_version, None)
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key missing or evicted
+        cache.set(key, clock_version(), None)
@@ -0,0 +1,42 @@
+"""
+Public catalogue caching.
+
+The home page lists room types, their amenities, hotel amenities and the
+hotel itself, which only change when staff edit them. Signals bump the
+catalogue version on any such change; template fragments are cached under
+that version and the home page answers conditional GETs with an ETag
+derived from it.
+"""
+import hashlib
+from django.conf import settings
+from django.utils import timezone
+from .cache_versions import get_version, bump_version
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+# How long rendered catalogue fragments are kept, see {% cache %} in rooms.html
+CATALOGUE_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+def catalogue_version():
+    return get_version(CATALOGUE_VERSION_KEY)
+
+
+def bump_catalogue_version():
+    bump_version(CATALOGUE_VERSION_KEY)
+
+
+def home_etag(request, *args, **kwargs):
+    """
+    ETag of the home page for a GET without a form submission
+
+    The page embeds the visitor's CSRF token, so the CSRF cookie is part of
+    the tag; the date covers the footer's copyright year.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    parts = [
+        str(catalogue_version()),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        timezone.localdate().isoformat(),
+    ]
+    return hashlib.md5(':'.join(parts).encode()).hexdigest()
@@ -0,0 +1,32 @@
+"""
+Normalized contact keys.
+
+Guests type the same address and number many ways ("Ada@Example.com ",
+"+234 803 123 4567", "0803-123-4567"). The keys below reduce each to one
+form so a guest can be found with an indexed equality lookup.
+"""
+import re
+
+NIGERIA_COUNTRY_CODE = '234'
+
+_non_digits = re.compile(r'\D+')
+
+
+def normalize_email(email):
+    """Lowercased address without surrounding whitespace"""
+    return (email or '').strip().lower()
+
+
+def normalize_phone(phone):
+    """
+    Digits only, with Nigerian numbers in national form:
+    +234 803 123 4567, 2348031234567, 08031234567 and 8031234567 all become 08031234567
+    """
+    digits = _non_digits.sub('', phone or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    if digits.startswith(NIGERIA_COUNTRY_CODE) and len(digits) == 13:
+        return '0' + digits[3:]
+    if len(digits) == 10 and digits[0] in '789':
+        return '0' + digits
+    return digits
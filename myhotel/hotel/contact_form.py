@@ -2,7 +2,8 @@ from django.core.mail import send_mail
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from django.template.loader import render_to_string
-from .models import Hotel, ContactForm
+from .models import ContactForm
+from .hotel_settings import get_hotel
 from django.conf import settings
 
 
@@ -51,15 +52,15 @@ class ContactFormHandler:
         )
 
     def render_email_template(self, name, email, subject, message):
-        hotel = Hotel.objects.first()
-        logo_url = f'{settings.MEDIA_URL}hotel/logo.png'
+        hotel = get_hotel()
+        logo_url = hotel.logo_url if hotel and hotel.logo_url else f'{settings.SITE_URL}{settings.MEDIA_URL}hotel/logo.png'
         context = {
             'name': name,
             'email': email,
             'subject': subject,
             'message': message,
             'hotel_name': hotel.name if hotel else 'Your Hotel',
-            'hotel_logo': f'{settings.SITE_URL}{logo_url}',
+            'hotel_logo': logo_url,
             'hotel_address': hotel.address,
             'hotel_contact_email': hotel.contact_email,
             'hotel_contact_phone': hotel.contact_phone,
@@ -67,7 +68,7 @@ class ContactFormHandler:
         return render_to_string('emails/contact_message.html', context)
 
     def send_email(self, email_body):
-        hotel = Hotel.objects.first()
+        hotel = get_hotel()
         recipient = hotel.contact_email if hotel and hotel.contact_email else 'contact@yourhotel.com'
         send_mail(
             subject='New Contact Message',
@@ -1,13 +1,12 @@
 from django.conf import settings
-from .models import Hotel
+from .hotel_settings import get_hotel
 
 
 def hotel_context(request):
     """
     Adds the hotel object to the context for all templates.
     """
-    hotel_obj = Hotel.objects.first()
-    return {'hotel': hotel_obj}
+    return {'hotel': get_hotel(request)}
 
 def settings_context(request):
     """
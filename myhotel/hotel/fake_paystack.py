@@ -0,0 +1,94 @@
+"""
+A local stand-in for the Paystack API, for tests and load tests.
+
+It answers GET /transaction/verify/<reference> the way Paystack does, from
+the transactions it was told about, after an optional delay. Point
+PAYSTACK_BASE_URL at server.url to use it:
+
+    with FakePaystackServer(delay=2) as server:
+        server.add_transaction('ref-1', amount=2000000)
+        with override_settings(PAYSTACK_BASE_URL=server.url):
+            ...
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VERIFY_PATH = '/transaction/verify/'
+
+
+class FakePaystackHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        fake = self.server.fake
+        fake.requests += 1
+        if fake.delay:
+            time.sleep(fake.delay)
+
+        if not self.path.startswith(VERIFY_PATH):
+            return self.respond(404, {'status': False, 'message': 'Not found'})
+        if self.headers.get('Authorization') != f'Bearer {fake.secret_key}':
+            return self.respond(401, {'status': False, 'message': 'Invalid key'})
+
+        reference = self.path[len(VERIFY_PATH):]
+        transaction = fake.transactions.get(reference)
+        if transaction is None:
+            return self.respond(400, {'status': False, 'message': 'Transaction reference not found'})
+        return self.respond(200, {'status': True, 'message': 'Verification successful', 'data': transaction})
+
+    def respond(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakePaystackServer:
+    """
+    Fake Paystack API on a free local port, served from a background thread
+    """
+    def __init__(self, delay=0, secret_key='sk'):
+        self.delay = delay
+        self.secret_key = secret_key
+        self.transactions = {}
+        self.requests = 0
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def add_transaction(self, reference, amount, status='success'):
+        """Register a transaction; amount is in kobo, as Paystack reports it"""
+        self.transactions[reference] = {
+            'id': len(self.transactions) + 1,
+            'reference': reference,
+            'amount': amount,
+            'status': status,
+        }
+
+    def start(self):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakePaystackHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -1,4 +1,5 @@
 from django import forms
+from .guests import find_guest_by_email, find_guest_by_phone
 from .models import Room, Guest, RoomAmenity, HotelAmenity, RoomType, Booking
 
 class RoomForm(forms.ModelForm):
@@ -16,11 +17,8 @@ class GuestForm(forms.ModelForm):
         email = self.cleaned_data.get('email')
         if email:
             # Check if guest with this email already exists (excluding current instance if editing)
-            existing_guest = Guest.objects.filter(email=email)
-            if self.instance.pk:
-                existing_guest = existing_guest.exclude(pk=self.instance.pk)
-            
-            if existing_guest.exists():
+            existing_guest = find_guest_by_email(email, exclude_pk=self.instance.pk)
+            if existing_guest is not None:
                 raise forms.ValidationError(
                     f"A guest with email '{email}' already exists. "
                     "Please use a different email or update the existing guest record."
@@ -32,11 +30,8 @@ class GuestForm(forms.ModelForm):
         phone = self.cleaned_data.get('phone')
         if phone:
             # Check if guest with this phone already exists (excluding current instance if editing)
-            existing_guest = Guest.objects.filter(phone=phone)
-            if self.instance.pk:
-                existing_guest = existing_guest.exclude(pk=self.instance.pk)
-            
-            if existing_guest.exists():
+            existing_guest = find_guest_by_phone(phone, exclude_pk=self.instance.pk)
+            if existing_guest is not None:
                 raise forms.ValidationError(
                     f"A guest with phone number '{phone}' already exists. "
                     "Please use a different phone number or update the existing guest record."
@@ -0,0 +1,98 @@
+"""
+Guest lookup and deduplication.
+
+Guests are matched on the normalized keys from hotel.contact (email_key,
+phone_key), which carry partial indexes, so "Ada@Example.com" and
+"ada@example.com", or "+234 803 123 4567" and "08031234567", find the same
+guest with one index lookup. Every place that asks "does this guest already
+exist?" goes through find_guest() so they all agree on the answer.
+"""
+import logging
+from django.db import transaction
+from django.db.models import Count
+from .contact import normalize_email, normalize_phone
+from .models import Guest, GuestStay
+
+logger = logging.getLogger(__name__)
+
+
+def find_guest_by_email(email, exclude_pk=None):
+    key = normalize_email(email)
+    if not key:
+        return None
+    guests = Guest.objects.filter(email_key=key)
+    if exclude_pk:
+        guests = guests.exclude(pk=exclude_pk)
+    return guests.order_by('id').first()
+
+
+def find_guest_by_phone(phone, exclude_pk=None):
+    key = normalize_phone(phone)
+    if not key:
+        return None
+    guests = Guest.objects.filter(phone_key=key)
+    if exclude_pk:
+        guests = guests.exclude(pk=exclude_pk)
+    return guests.order_by('id').first()
+
+
+def find_guest(email, phone, exclude_pk=None):
+    """
+    The existing guest with this email, else with this phone, or None;
+    the oldest record wins when there are several
+    """
+    return find_guest_by_email(email, exclude_pk) or find_guest_by_phone(phone, exclude_pk)
+
+
+def duplicate_groups(key, batch_size=500):
+    """
+    Yields batches of up to batch_size groups of guest ids sharing a value of
+    key ('email_key' or 'phone_key'), each group oldest first
+    """
+    last = ''
+    while True:
+        values = list(
+            Guest.objects.exclude(**{key: ''}).filter(**{f'{key}__gt': last})
+            .values(key).annotate(count=Count('id')).filter(count__gt=1)
+            .order_by(key).values_list(key, flat=True)[:batch_size]
+        )
+        if not values:
+            return
+        last = values[-1]
+        groups = {}
+        for value, guest_id in Guest.objects.filter(**{f'{key}__in': values}).order_by('id').values_list(key, 'id'):
+            groups.setdefault(value, []).append(guest_id)
+        yield list(groups.values())
+
+
+def merge_guests(guest_ids):
+    """
+    Merge the guests into the oldest of them, which takes the contact details
+    of the newest and the stays of all. Returns how many guests were removed.
+    """
+    guests = list(Guest.objects.filter(id__in=guest_ids).order_by('id'))
+    if len(guests) < 2:
+        return 0
+    canonical, *duplicates = guests
+
+    with transaction.atomic():
+        stays = GuestStay.objects.filter(guest__in=[canonical, *duplicates])
+        latest = stays.order_by('-created_at', '-id').values_list('booking_id', flat=True).first()
+        GuestStay.objects.bulk_create(
+            [GuestStay(guest=canonical, booking_id=booking_id)
+             for booking_id in stays.filter(guest__in=duplicates).values_list('booking_id', flat=True)],
+            ignore_conflicts=True,
+        )
+        GuestStay.objects.filter(guest__in=duplicates).delete()
+
+        newest = duplicates[-1]
+        canonical.first_name = newest.first_name
+        canonical.last_name = newest.last_name
+        canonical.email = newest.email
+        canonical.phone = newest.phone
+        canonical.booking_id = latest or canonical.booking_id
+        canonical.save()
+        for guest in duplicates:
+            guest.soft_delete()
+    logger.info(f"Merged guests {[guest.id for guest in duplicates]} into {canonical.id}")
+    return len(duplicates)
@@ -0,0 +1,64 @@
+"""
+Temporary room holds.
+
+A hold sets rooms of a type aside for the guest whose Paystack payment is
+in progress, so other guests are turned away before they pay rather than
+after. Holds expire on their own after ROOM_HOLD_MINUTES; expired rows are
+ignored by every query here and removed by the expire_room_holds command.
+Holds are placed and released by hotel.booking_service.
+
+Holds are counted per room type and stay. Overlapping holds are summed even
+when they cover different nights of the stay, which errs on the side of
+turning a guest away early rather than failing them after payment.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+from .models import RoomHold
+
+ROOM_HOLD_MINUTES = getattr(settings, 'ROOM_HOLD_MINUTES', 15)
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(minutes=ROOM_HOLD_MINUTES)
+
+
+def active_holds(checkin, checkout, exclude_reference=None):
+    """
+    Unexpired holds that cover at least one night of [checkin, checkout)
+    """
+    holds = RoomHold.objects.filter(
+        expires_at__gt=timezone.now(),
+        checkin__lt=checkout,
+        checkout__gt=checkin
+    )
+    if exclude_reference:
+        holds = holds.exclude(reference=exclude_reference)
+    return holds
+
+
+def held_rooms(room_type, checkin, checkout, exclude_reference=None):
+    """
+    Rooms of the given type held by other guests for the stay
+    """
+    return active_holds(checkin, checkout, exclude_reference).filter(
+        room_type=room_type
+    ).aggregate(total=Sum('rooms'))['total'] or 0
+
+
+def held_rooms_by_type(checkin, checkout):
+    """
+    {room_type_id: rooms held} for every room type, in one grouped query
+    """
+    return dict(
+        active_holds(checkin, checkout)
+        .values_list('room_type_id')
+        .annotate(total=Sum('rooms'))
+    )
+
+
+def expire_holds():
+    """Delete expired holds; returns how many were removed"""
+    deleted, _ = RoomHold.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,57 @@
+"""
+Cached hotel settings.
+
+The site has a single Hotel record that every page, context processor and
+contact email reads. get_hotel() keeps it in process memory and the Django
+cache under a version number that signals bump whenever a Hotel is saved,
+soft deleted or deleted, so steady-state renders run no hotel queries.
+The returned instance is shared between requests; treat it as read-only.
+"""
+from django.core.cache import cache
+from .cache_versions import get_version, bump_version
+from .models import Hotel
+
+HOTEL_VERSION_KEY = 'hotel:version'
+HOTEL_CACHE_TIMEOUT = 60 * 60 * 24
+
+# (version, hotel) of the last hotel this process loaded
+_memory = None
+
+
+def load_hotel():
+    hotel = Hotel.objects.first()
+    if hotel is not None:
+        # Build the Cloudinary URL once, before the instance is cached
+        hotel.logo_url
+    return hotel
+
+
+def get_hotel(request=None):
+    """
+    The hotel record, or None if none has been set up yet
+    """
+    global _memory
+    if request is not None and hasattr(request, '_hotel'):
+        return request._hotel
+
+    version = get_version(HOTEL_VERSION_KEY)
+    memory = _memory
+    if memory is not None and memory[0] == version:
+        hotel = memory[1]
+    else:
+        key = f'hotel:{version}'
+        # Wrapped in a tuple so a missing hotel is cached too
+        entry = cache.get(key)
+        if entry is None:
+            entry = (load_hotel(),)
+            cache.set(key, entry, HOTEL_CACHE_TIMEOUT)
+        hotel = entry[0]
+        _memory = (version, hotel)
+
+    if request is not None:
+        request._hotel = hotel
+    return hotel
+
+
+def invalidate_hotel():
+    bump_version(HOTEL_VERSION_KEY)
@@ -0,0 +1,211 @@
+"""
+Per-night room type inventory.
+
+RoomInventory keeps one row per room type and night with the number of
+bookable rooms (capacity), confirmed bookings (sold) and pending bookings
+(held). Rows are adjusted incrementally whenever a booking is saved, soft
+deleted, restored or deleted, so availability for a stay is a MIN over one
+row per night instead of an overlap scan of every historical booking.
+
+Only bookings on rooms that are in service (available and not soft deleted)
+are counted, matching capacity; taking a room out of service, or moving it
+to another room type, moves its bookings with it.
+
+Bulk writes (queryset.update, bulk_create) bypass the signals; run the
+rebuild_inventory management command after those.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from .models import Booking, Room, RoomInventory
+from .soft_delete import alive_q
+
+# Inventory column each booking status counts against
+STATUS_COLUMNS = {
+    'confirmed': 'sold',
+    'pending': 'held',
+}
+
+
+def nights(checkin, checkout):
+    day = checkin
+    while day < checkout:
+        yield day
+        day += timedelta(days=1)
+
+
+def booking_footprint(booking):
+    """
+    The part of a booking that affects inventory, or None if it takes no rooms
+    """
+    column = STATUS_COLUMNS.get(booking.status)
+    if booking.is_deleted or column is None or not booking.room_id:
+        return None
+    if not booking.checkin or not booking.checkout or booking.checkin >= booking.checkout:
+        return None
+    return booking.room_id, booking.checkin, booking.checkout, column
+
+
+def room_capacity(room_type_id):
+    return Room.objects.filter(room_type_id=room_type_id, is_available=True).count()
+
+
+def counted_room_type(room):
+    """
+    Room type a room's bookings count against, or None if it is out of service
+    """
+    if room.is_deleted or not room.is_available:
+        return None
+    return room.room_type_id
+
+
+def apply_footprint(footprint, delta):
+    """
+    Add (delta=1) or remove (delta=-1) one room from every night of a footprint
+    """
+    room_id, checkin, checkout, column = footprint
+    room_type_id = Room.objects.filter(
+        id=room_id, is_available=True
+    ).values_list('room_type_id', flat=True).first()
+    shift_nights(room_type_id, checkin, checkout, column, delta)
+
+
+def shift_nights(room_type_id, checkin, checkout, column, delta):
+    if room_type_id is None:
+        return
+
+    existing = set(RoomInventory.objects.filter(
+        room_type_id=room_type_id, date__gte=checkin, date__lt=checkout
+    ).values_list('date', flat=True))
+    missing = [day for day in nights(checkin, checkout) if day not in existing]
+    if missing:
+        capacity = room_capacity(room_type_id)
+        RoomInventory.objects.bulk_create([
+            RoomInventory(room_type_id=room_type_id, date=day, capacity=capacity)
+            for day in missing
+        ], ignore_conflicts=True)
+
+    RoomInventory.objects.filter(
+        room_type_id=room_type_id, date__gte=checkin, date__lt=checkout
+    ).update(**{column: F(column) + delta})
+
+
+def sync_booking(previous, current):
+    """
+    Move a booking's inventory from its previous footprint to its current one
+    """
+    if previous == current:
+        return
+    if previous:
+        apply_footprint(previous, -1)
+    if current:
+        apply_footprint(current, 1)
+
+
+def move_room(room_id, previous_room_type_id, current_room_type_id):
+    """
+    Move the bookings of a room between the room types it counts against
+    """
+    if previous_room_type_id == current_room_type_id:
+        return
+    bookings = Booking.objects.filter(
+        room_id=room_id, status__in=STATUS_COLUMNS, checkin__lt=F('checkout')
+    ).values_list('checkin', 'checkout', 'status')
+    for checkin, checkout, status in bookings:
+        column = STATUS_COLUMNS[status]
+        shift_nights(previous_room_type_id, checkin, checkout, column, -1)
+        shift_nights(current_room_type_id, checkin, checkout, column, 1)
+
+
+def refresh_capacity(room_type_ids):
+    """
+    Update capacity of today's and future nights after rooms change
+    """
+    today = timezone.now().date()
+    for room_type_id in set(room_type_ids):
+        if room_type_id is None:
+            continue
+        RoomInventory.objects.filter(
+            room_type_id=room_type_id, date__gte=today
+        ).update(capacity=room_capacity(room_type_id))
+
+
+def free_rooms(room_type, checkin, checkout):
+    """
+    Smallest number of unsold rooms on any night of the stay
+    """
+    stats = RoomInventory.objects.filter(
+        room_type=room_type, date__gte=checkin, date__lt=checkout
+    ).aggregate(
+        free=Min(F('capacity') - F('sold') - F('held')),
+        nights=Count('id')
+    )
+    free = stats['free']
+    if stats['nights'] < (checkout - checkin).days:
+        # Nights without a row have nothing booked yet
+        capacity = room_capacity(room_type.id)
+        free = capacity if free is None else min(free, capacity)
+    return max(free, 0)
+
+
+def expected_inventory():
+    """
+    Inventory computed from scratch from the bookings table
+    """
+    capacities = dict(
+        Room.objects.filter(is_available=True, room_type__isnull=False)
+        .values_list('room_type_id')
+        .annotate(total=Count('id'))
+    )
+    counts = defaultdict(lambda: {'sold': 0, 'held': 0})
+    bookings = Booking.objects.filter(
+        alive_q('room'), status__in=STATUS_COLUMNS, room__is_available=True,
+        room__room_type__isnull=False, checkin__lt=F('checkout')
+    ).values_list('room__room_type_id', 'checkin', 'checkout', 'status')
+    for room_type_id, checkin, checkout, status in bookings.iterator():
+        column = STATUS_COLUMNS[status]
+        for day in nights(checkin, checkout):
+            counts[(room_type_id, day)][column] += 1
+
+    return {
+        key: {'capacity': capacities.get(key[0], 0), **values}
+        for key, values in counts.items()
+    }
+
+
+def rebuild_inventory(batch_size=1000):
+    """
+    Replace the inventory table with rows recomputed from bookings
+    """
+    expected = expected_inventory()
+    RoomInventory.objects.all().delete()
+    RoomInventory.objects.bulk_create([
+        RoomInventory(room_type_id=room_type_id, date=day, **values)
+        for (room_type_id, day), values in expected.items()
+    ], batch_size=batch_size)
+    return len(expected)
+
+
+def check_inventory():
+    """
+    Compare the stored sold/held counts with bookings; returns a list of mismatches
+    """
+    expected = expected_inventory()
+    stored = {
+        (row['room_type_id'], row['date']): row
+        for row in RoomInventory.objects.values('room_type_id', 'date', 'sold', 'held')
+    }
+
+    mismatches = []
+    for key in set(expected) | set(stored):
+        want = expected.get(key, {'sold': 0, 'held': 0})
+        have = stored.get(key, {'sold': 0, 'held': 0})
+        if want['sold'] != have['sold'] or want['held'] != have['held']:
+            mismatches.append({
+                'room_type_id': key[0],
+                'date': key[1],
+                'expected': {'sold': want['sold'], 'held': want['held']},
+                'stored': {'sold': have['sold'], 'held': have['held']},
+            })
+    return sorted(mismatches, key=lambda item: (item['room_type_id'], item['date']))
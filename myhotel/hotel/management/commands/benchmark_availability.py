@@ -0,0 +1,76 @@
+import random
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from hotel.models import Room, Booking
+from hotel.availability import count_available_rooms
+from hotel.benchmarking import seed_dataset, percentile
+
+
+def legacy_count_available_rooms(room_type, checkin, checkout):
+    """The original per-room loop, kept here as the benchmark baseline"""
+    available = 0
+    for room in Room.objects.filter(room_type=room_type, is_available=True):
+        overlapping = Booking.objects.filter(
+            room=room,
+            checkin__lt=checkout,
+            checkout__gt=checkin,
+            status__in=['confirmed', 'pending']
+        )
+        if not overlapping.exists():
+            available += 1
+    return available
+
+
+class Command(BaseCommand):
+    help = 'Benchmark room availability checks against a seeded dataset (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room-types', type=int, default=5, help='Number of room types to seed')
+        parser.add_argument('--rooms', type=int, default=2000, help='Number of rooms to seed')
+        parser.add_argument('--bookings', type=int, default=10000, help='Number of bookings to seed')
+        parser.add_argument('--checks', type=int, default=50, help='Availability checks per implementation')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            room_types = self.seed(rng, options)
+            stays = []
+            today = timezone.now().date()
+            for _ in range(options['checks']):
+                checkin = today + timedelta(days=rng.randint(0, 180))
+                stays.append((rng.choice(room_types), checkin, checkin + timedelta(days=rng.randint(1, 7))))
+
+            for label, func in (('before (per-room loop)', legacy_count_available_rooms),
+                                ('after (NOT EXISTS)', count_available_rooms)):
+                self.run_checks(label, func, stays)
+
+            # Never keep the benchmark data
+            transaction.set_rollback(True)
+
+    def seed(self, rng, options):
+        self.stdout.write(
+            f"Seeding {options['rooms']} rooms and {options['bookings']} bookings "
+            f"across {options['room_types']} room types..."
+        )
+        return seed_dataset(rng, options['room_types'], options['rooms'], options['bookings'])
+
+    def run_checks(self, label, func, stays):
+        timings = []
+        queries = 0
+        for room_type, checkin, checkout in stays:
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                func(room_type, checkin, checkout)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries += len(captured)
+
+        self.stdout.write(self.style.SUCCESS(label))
+        self.stdout.write(f'  queries per check: {queries / len(stays):.1f}')
+        self.stdout.write(f'  p50 latency: {percentile(timings, 50):.2f} ms')
+        self.stdout.write(f'  p99 latency: {percentile(timings, 99):.2f} ms')
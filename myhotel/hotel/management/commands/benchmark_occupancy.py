@@ -0,0 +1,57 @@
+import random
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand
+from hotel.occupancy import OccupancyIndex
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark OccupancyIndex queries against a linear scan (in memory, no database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=300, help='Number of rooms')
+        parser.add_argument('--bookings', type=int, default=50000, help='Number of bookings')
+        parser.add_argument('--queries', type=int, default=5000, help='Overlap queries to run')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        origin = date.today()
+        bookings = []
+        for booking_id in range(options['bookings']):
+            checkin = origin + timedelta(days=rng.randint(-730, 365))
+            bookings.append(SimpleNamespace(
+                id=booking_id,
+                room_id=rng.randint(1, options['rooms']),
+                checkin=checkin,
+                checkout=checkin + timedelta(days=rng.randint(1, 7)),
+            ))
+
+        queries = []
+        for _ in range(options['queries']):
+            checkin = origin + timedelta(days=rng.randint(-730, 365))
+            queries.append((rng.randint(1, options['rooms']), checkin, checkin + timedelta(days=rng.randint(1, 7))))
+
+        started = time.perf_counter()
+        index = OccupancyIndex(bookings)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        by_room = {}
+        for booking in bookings:
+            by_room.setdefault(booking.room_id, []).append(booking)
+
+        started = time.perf_counter()
+        for room_id, checkin, checkout in queries:
+            index.is_free(room_id, checkin, checkout)
+        indexed_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+        started = time.perf_counter()
+        for room_id, checkin, checkout in queries:
+            not any(b.checkin < checkout and b.checkout > checkin for b in by_room.get(room_id, []))
+        scan_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+        self.stdout.write(f"{options['bookings']} bookings across {options['rooms']} rooms")
+        self.stdout.write(f'  index build: {build_ms:.1f} ms')
+        self.stdout.write(f'  is_free via index: {indexed_us:.2f} us/query')
+        self.stdout.write(f'  is_free via linear scan: {scan_us:.2f} us/query')
@@ -0,0 +1,48 @@
+import random
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from hotel.benchmarking import seed_dataset, percentile
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the admin room board page against seeded hotels of several sizes (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, nargs='+', default=[50, 300, 2000], help='Hotel sizes to seed')
+        parser.add_argument('--bookings-per-room', type=int, default=20, help='Bookings to seed per room')
+        parser.add_argument('--requests', type=int, default=10, help='Page loads per hotel size')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    def handle(self, *args, **options):
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for rooms in options['rooms']:
+                with transaction.atomic():
+                    self.run_size(rooms, options)
+                    # Never keep the benchmark data
+                    transaction.set_rollback(True)
+
+    def run_size(self, rooms, options):
+        rng = random.Random(options['seed'])
+        seed_dataset(rng, 5, rooms, rooms * options['bookings_per_room'])
+        client = Client()
+        client.force_login(User.objects.create_superuser('benchmark-admin', 'benchmark@example.com', 'benchmark'))
+        url = reverse('admin_panel:admin_rooms')
+
+        timings = []
+        queries = 0
+        for _ in range(options['requests']):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(captured)
+
+        self.stdout.write(self.style.SUCCESS(f'{rooms} rooms'))
+        self.stdout.write(f'  queries per page: {queries}')
+        self.stdout.write(f'  p50 latency: {percentile(timings, 50):.2f} ms')
+        self.stdout.write(f'  p99 latency: {percentile(timings, 99):.2f} ms')
@@ -0,0 +1,100 @@
+import random
+import re
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+from hotel.models import BLOCKING_STATUSES, Room, Booking, BookingDailyRollup, RoomInventory
+from hotel.availability import overlapping_bookings, find_available_rooms
+from hotel.benchmarking import seed_dataset
+from hotel.rollups import rebuild_rollups
+
+# Tables that must never be read with a full sequential scan
+GUARDED_TABLES = {Booking._meta.db_table, Room._meta.db_table, BookingDailyRollup._meta.db_table}
+# SQLite reports subquery tables by their Django alias (U0, U1, ...)
+SUBQUERY_ALIAS = re.compile(r'U\d+')
+
+SEQUENTIAL_SCAN_PATTERNS = [
+    re.compile(r'Seq Scan on "?(\w+)"?'),       # PostgreSQL
+    re.compile(r'\bSCAN "?(\w+)"?(?:\s+\w+)?$'),  # SQLite, without "USING ... INDEX"
+]
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot booking queries on a seeded dataset and fail on sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=2000, help='Number of rooms to seed')
+        parser.add_argument('--bookings', type=int, default=50000, help='Number of bookings to seed')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['rooms']} rooms and {options['bookings']} bookings...")
+            room_types = seed_dataset(random.Random(42), rooms=options['rooms'], bookings=options['bookings'])
+            # The seed bulk-creates bookings, so the dashboard rollups are built here
+            rebuild_rollups()
+            self.analyze()
+
+            for name, queryset in self.top_queries(room_types[0]):
+                plan = queryset.explain()
+                scanned = self.sequential_scans(plan)
+                if options['verbose_plans'] or scanned:
+                    self.stdout.write(f'\n{name}:\n{plan}')
+                if scanned:
+                    failures.append(f"{name} scans {', '.join(sorted(scanned))}")
+                    self.stdout.write(self.style.ERROR(f'FAIL  {name}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'OK    {name}'))
+
+            # Never keep the seeded data
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError('Sequential scans found: ' + '; '.join(failures))
+
+    def top_queries(self, room_type):
+        now = timezone.localtime()
+        today = now.date()
+        checkin = today + timedelta(days=30)
+        checkout = checkin + timedelta(days=3)
+        room = Room.objects.filter(room_type=room_type).first()
+
+        return [
+            ('availability: free rooms of a type', find_available_rooms(room_type, checkin, checkout)),
+            ('availability: single room overlap', overlapping_bookings(checkin, checkout).filter(room=room)),
+            ('booking clean: blocking overlap', Booking.objects.filter(
+                room=room, checkin__lt=checkout, checkout__gt=checkin, status__in=BLOCKING_STATUSES
+            )),
+            ('admin: room current booking', Booking.objects.filter(
+                room=room, checkin__lte=today, checkout__gt=today, status__in=['confirmed', 'pending']
+            )),
+            ('dashboard: rollups for today', BookingDailyRollup.objects.filter(
+                date=today
+            ).values('status').annotate(total=Sum('count'))),
+            ('dashboard: daily series rollups', BookingDailyRollup.objects.filter(
+                date__gte=today - timedelta(days=29)
+            ).annotate(period=TruncDay('date')).values('period').annotate(total=Sum('count')).order_by('period')),
+            ('admin: newest bookings', Booking.objects.order_by('-created_at')[:50]),
+            ('inventory: stay nights', RoomInventory.objects.filter(
+                room_type=room_type, date__gte=checkin, date__lt=checkout
+            )),
+        ]
+
+    def analyze(self):
+        """Refresh planner statistics so the seeded volume is taken into account"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def sequential_scans(self, plan):
+        scanned = set()
+        for line in plan.splitlines():
+            line = line.strip()
+            for pattern in SEQUENTIAL_SCAN_PATTERNS:
+                match = pattern.search(line)
+                if match and (match.group(1) in GUARDED_TABLES or SUBQUERY_ALIAS.fullmatch(match.group(1))):
+                    scanned.add(match.group(1))
+        return scanned
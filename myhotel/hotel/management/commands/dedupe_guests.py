@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from hotel.guests import duplicate_groups, merge_guests
+
+
+class Command(BaseCommand):
+    help = 'Merge guest records sharing a normalized email, then a normalized phone, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Duplicate groups merged per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report the duplicates without merging them')
+
+    def handle(self, *args, **options):
+        merged = 0
+        for key in ('email_key', 'phone_key'):
+            for groups in duplicate_groups(key, options['batch_size']):
+                if options['dry_run']:
+                    for group in groups:
+                        self.stdout.write(f'{key}: guests {group}')
+                    continue
+                removed = sum(merge_guests(group) for group in groups)
+                merged += removed
+                self.stdout.write(f'{key}: merged {removed} guests from {len(groups)} groups')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('Dry run, no guests were merged'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Successfully merged {merged} duplicate guests'))
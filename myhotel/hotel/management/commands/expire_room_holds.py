@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from hotel.availability import bump_availability_version
+from hotel.holds import expire_holds
+
+
+class Command(BaseCommand):
+    help = 'Delete room holds whose payment window has passed'
+
+    def handle(self, *args, **options):
+        deleted = expire_holds()
+        if deleted:
+            bump_availability_version()
+        self.stdout.write(self.style.SUCCESS(f'Removed {deleted} expired room hold(s)'))
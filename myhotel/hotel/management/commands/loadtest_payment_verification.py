@@ -0,0 +1,124 @@
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from hotel.benchmarking import percentile
+from hotel.fake_paystack import FakePaystackServer
+from hotel.models import PaymentVerification
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the site while payment verifications wait on a slow fake Paystack. '
+        'Requests are served by a pool of workers x threads slots, like gunicorn gthread workers. '
+        'The payment verifications it stores are deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=3, help='Server worker processes to model')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per worker to model')
+        parser.add_argument('--delay', type=float, default=5.0, help='Seconds the slow provider takes to answer')
+        parser.add_argument('--verifications', type=int, default=3, help='Guests verifying payments at once')
+        parser.add_argument('--visitors', type=int, default=4, help='Visitors browsing the home page at once')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per phase')
+
+    def handle(self, *args, **options):
+        slots = options['workers'] * options['threads']
+        self.stdout.write(
+            f"{slots} request slots, {options['verifications']} verifying guests, "
+            f"{options['visitors']} visitors, {options['duration']:.0f}s per phase"
+        )
+        # Every verification gets a reference of its own, or all but the first
+        # would be answered from the stored verification without asking the provider
+        self.prefix = f'load-test-{uuid.uuid4().hex[:12]}-'
+        self.numbers = itertools.count(1)
+        self.numbers_lock = threading.Lock()
+        # Requests are served on their own threads and database connections,
+        # which a transaction opened here cannot roll back, so the rows they
+        # write are deleted instead
+        try:
+            with FakePaystackServer() as server:
+                with override_settings(
+                    PAYSTACK_BASE_URL=server.url,
+                    PAYSTACK_SECRET_KEY=server.secret_key,
+                    ALLOWED_HOSTS=['testserver'],
+                ):
+                    baseline = self.run_phase('provider fast', server, 0, slots, options)
+                    self.clear_verifications()
+                    slow = self.run_phase(
+                        f"provider slow ({options['delay']:.1f}s)", server, options['delay'], slots, options
+                    )
+        finally:
+            self.clear_verifications()
+
+        if baseline:
+            change = (slow - baseline) / baseline * 100
+            self.stdout.write(self.style.SUCCESS(f'Home page throughput change under a slow provider: {change:+.1f}%'))
+
+    def clear_verifications(self):
+        PaymentVerification.objects.filter(reference__startswith=self.prefix).delete()
+
+    def new_reference(self, server):
+        with self.numbers_lock:
+            reference = f'{self.prefix}{next(self.numbers)}'
+        server.add_transaction(reference, amount=2000000)
+        return reference
+
+    def run_phase(self, label, server, delay, slots, options):
+        server.delay = delay
+        deadline = time.monotonic() + options['duration']
+        page_timings = []
+        verify_timings = []
+        lock = threading.Lock()
+
+        def serve(method, path, **kwargs):
+            try:
+                started = time.perf_counter()
+                getattr(Client(), method)(path, **kwargs)
+                return (time.perf_counter() - started) * 1000
+            finally:
+                connections.close_all()
+
+        def verification():
+            return {'data': {'reference': self.new_reference(server)}, 'content_type': 'application/json'}
+
+        def client(method, path, timings, request=dict):
+            while time.monotonic() < deadline:
+                # Time spent queueing for a free slot counts as latency
+                started = time.perf_counter()
+                pool.submit(serve, method, path, **request()).result()
+                with lock:
+                    timings.append((time.perf_counter() - started) * 1000)
+
+        with ThreadPoolExecutor(max_workers=slots) as pool:
+            clients = [
+                threading.Thread(target=client, args=(
+                    'post', reverse('verify_payment'), verify_timings, verification
+                ))
+                for _ in range(options['verifications'])
+            ] + [
+                threading.Thread(target=client, args=('get', reverse('home'), page_timings))
+                for _ in range(options['visitors'])
+            ]
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+
+        throughput = len(page_timings) / options['duration']
+        self.stdout.write(self.style.SUCCESS(label))
+        if page_timings:
+            self.stdout.write(f'  home page: {throughput:.1f} req/s, p50 {percentile(page_timings, 50):.1f} ms, '
+                              f'p99 {percentile(page_timings, 99):.1f} ms')
+        else:
+            self.stdout.write('  home page: no requests served')
+        if verify_timings:
+            self.stdout.write(f'  verify payment: {len(verify_timings)} completed, '
+                              f'p50 {percentile(verify_timings, 50):.1f} ms')
+        return throughput
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from hotel.payment_events import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Apply stored Paystack webhook events to their bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Events claimed per batch')
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running as a worker, polling for new events',
+        )
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls when idle')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_pending(options['batch_size'])
+            total += processed
+            if processed:
+                self.stdout.write(f'Processed {processed} payment event(s)')
+            if not options['loop']:
+                break
+            if processed < options['batch_size']:
+                close_old_connections()
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully processed {total} payment event(s)'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from hotel.rollups import rebuild_rollups, check_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily booking rollups from bookings, or check them for drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only compare the rollups with bookings and fail on any mismatch',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = check_rollups()
+            for mismatch in mismatches[:50]:
+                self.stdout.write(
+                    f"{mismatch['date']} room type {mismatch['room_type_id']} {mismatch['status']}: "
+                    f"expected {mismatch['expected']}, stored {mismatch['stored']}"
+                )
+            if mismatches:
+                raise CommandError(f'Rollups are inconsistent: {len(mismatches)} row(s) differ')
+            self.stdout.write(self.style.SUCCESS('Rollups are consistent with bookings'))
+            return
+
+        self.stdout.write('Rebuilding daily booking rollups...')
+        with transaction.atomic():
+            rows = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt {rows} rollup rows'))
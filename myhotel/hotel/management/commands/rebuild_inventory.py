@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from hotel.inventory import rebuild_inventory, check_inventory
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-night room inventory from bookings, or check it for drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only compare the inventory with bookings and fail on any mismatch',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = check_inventory()
+            for mismatch in mismatches[:50]:
+                self.stdout.write(
+                    f"room type {mismatch['room_type_id']} on {mismatch['date']}: "
+                    f"expected {mismatch['expected']}, stored {mismatch['stored']}"
+                )
+            if mismatches:
+                raise CommandError(f'Inventory is inconsistent: {len(mismatches)} night(s) differ')
+            self.stdout.write(self.style.SUCCESS('Inventory is consistent with bookings'))
+            return
+
+        self.stdout.write('Rebuilding room inventory...')
+        with transaction.atomic():
+            rows = rebuild_inventory()
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt {rows} inventory rows'))
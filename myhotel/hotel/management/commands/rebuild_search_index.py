@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from hotel.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the admin search documents for every booking and user'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding search documents...')
+        with transaction.atomic():
+            written = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Successfully indexed {written} bookings and users'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0017_userprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('capacity', models.PositiveIntegerField(default=0)),
+                ('sold', models.IntegerField(default=0)),
+                ('held', models.IntegerField(default=0)),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='hotel.roomtype')),
+            ],
+            options={
+                'ordering': ['room_type', 'date'],
+                'unique_together': {('room_type', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0020_bookingdailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checkin', models.DateField()),
+                ('checkout', models.DateField()),
+                ('rooms', models.PositiveIntegerField(default=1)),
+                ('reference', models.CharField(max_length=100, unique=True)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='hotel.roomtype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room_type', 'expires_at'], name='roomhold_type_expiry_idx'), models.Index(fields=['expires_at'], name='roomhold_expiry_idx')],
+            },
+        ),
+    ]
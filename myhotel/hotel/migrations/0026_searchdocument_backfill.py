@@ -0,0 +1,92 @@
+import re
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+# Copies of hotel.search as of this migration, so later changes there do not
+# change what the migration writes
+BOOKING = 'booking'
+USER = 'user'
+
+_separators = re.compile(r'[^\w@.+-]+')
+
+
+def normalize(*values):
+    words = []
+    for value in values:
+        if value not in (None, ''):
+            words.extend(word for word in _separators.split(str(value).lower()) if word)
+    return f" {' '.join(words)} "
+
+
+def booking_text(booking_id, room_number, room_type_name, guests):
+    values = [booking_id, f'#{booking_id}', room_number, room_type_name]
+    for guest in guests:
+        values.extend(guest)
+    return normalize(*values)
+
+
+def user_text(username, first_name, last_name, email):
+    return normalize(username, first_name, last_name, email)
+
+
+def create_trigram_index(apps, schema_editor):
+    # Substring search needs pg_trgm; other databases scan the documents table
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS searchdocument_text_trgm_idx '
+        'ON hotel_searchdocument USING gin (text gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS searchdocument_text_trgm_idx')
+
+
+def backfill_documents(apps, schema_editor):
+    SearchDocument = apps.get_model('hotel', 'SearchDocument')
+    Booking = apps.get_model('hotel', 'Booking')
+    Guest = apps.get_model('hotel', 'Guest')
+    User = apps.get_model('auth', 'User')
+
+    guests = {}
+    for booking_id, *guest in Guest.objects.filter(is_deleted=False, booking__isnull=False).order_by('id').values_list(
+        'booking_id', 'first_name', 'last_name', 'email', 'phone'
+    ):
+        guests.setdefault(booking_id, []).append(guest)
+
+    documents = [
+        SearchDocument(kind=BOOKING, object_id=booking_id,
+                       text=booking_text(booking_id, room_number, room_type_name, guests.get(booking_id, [])))
+        for booking_id, room_number, room_type_name in Booking.objects.filter(is_deleted=False).values_list(
+            'id', 'room__room_number', 'room__room_type__name'
+        ).iterator()
+    ]
+    documents.extend(
+        SearchDocument(kind=USER, object_id=user_id, text=user_text(username, first_name, last_name, email))
+        for user_id, username, first_name, last_name, email in User.objects.values_list(
+            'id', 'username', 'first_name', 'last_name', 'email'
+        ).iterator()
+    )
+    SearchDocument.objects.bulk_create(documents, batch_size=BATCH_SIZE)
+
+
+def remove_documents(apps, schema_editor):
+    apps.get_model('hotel', 'SearchDocument').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0025_searchdocument'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(backfill_documents, remove_documents),
+    ]
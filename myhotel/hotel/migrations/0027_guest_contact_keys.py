@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:47
+
+import re
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Copies of hotel.contact as of this migration, so later changes there do not
+# change the keys it writes
+NIGERIA_COUNTRY_CODE = '234'
+
+_non_digits = re.compile(r'\D+')
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def normalize_phone(phone):
+    digits = _non_digits.sub('', phone or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    if digits.startswith(NIGERIA_COUNTRY_CODE) and len(digits) == 13:
+        return '0' + digits[3:]
+    if len(digits) == 10 and digits[0] in '789':
+        return '0' + digits
+    return digits
+
+
+def backfill_contact_keys(apps, schema_editor):
+    Guest = apps.get_model('hotel', 'Guest')
+    last_id = 0
+    while True:
+        guests = list(Guest.objects.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+        if not guests:
+            return
+        for guest in guests:
+            guest.email_key = normalize_email(guest.email)
+            guest.phone_key = normalize_phone(guest.phone)
+        Guest.objects.bulk_update(guests, ['email_key', 'phone_key'])
+        last_id = guests[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0026_searchdocument_backfill'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guest',
+            name='email_key',
+            field=models.CharField(blank=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='guest',
+            name='phone_key',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='guest',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['email_key'], name='guest_email_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guest',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['phone_key'], name='guest_phone_key_idx'),
+        ),
+        migrations.RunPython(backfill_contact_keys, migrations.RunPython.noop),
+    ]
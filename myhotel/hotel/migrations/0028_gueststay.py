@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0027_guest_contact_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GuestStay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='guest_stays', to='hotel.booking')),
+                ('guest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stays', to='hotel.guest')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='guest',
+            name='bookings',
+            field=models.ManyToManyField(related_name='registered_guests', through='hotel.GuestStay', to='hotel.booking'),
+        ),
+        migrations.AddIndex(
+            model_name='gueststay',
+            index=models.Index(fields=['booking', 'guest'], name='gueststay_booking_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='gueststay',
+            unique_together={('guest', 'booking')},
+        ),
+    ]
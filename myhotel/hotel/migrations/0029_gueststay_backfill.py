@@ -0,0 +1,37 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_stays(apps, schema_editor):
+    # Guests only remember their latest booking, so that is all the history there is
+    Guest = apps.get_model('hotel', 'Guest')
+    GuestStay = apps.get_model('hotel', 'GuestStay')
+    last_id = 0
+    while True:
+        rows = list(
+            Guest.objects.filter(id__gt=last_id, booking__isnull=False).order_by('id')
+            .values_list('id', 'booking_id')[:BATCH_SIZE]
+        )
+        if not rows:
+            return
+        GuestStay.objects.bulk_create(
+            [GuestStay(guest_id=guest_id, booking_id=booking_id) for guest_id, booking_id in rows],
+            ignore_conflicts=True,
+        )
+        last_id = rows[-1][0]
+
+
+def remove_stays(apps, schema_editor):
+    apps.get_model('hotel', 'GuestStay').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0028_gueststay'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_stays, remove_stays),
+    ]
@@ -1,9 +1,12 @@
+from datetime import timedelta
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.core.exceptions import ValidationError
 from django.contrib.contenttypes.models import ContentType
-from .soft_delete import SoftDeleteModel
+from .contact import normalize_email, normalize_phone
+from .soft_delete import SoftDeleteManager, SoftDeleteModel, SoftDeleteQuerySet, alive_prefetch
 from cloudinary.models import CloudinaryField
 
 class UserProfile(models.Model):
@@ -31,6 +34,10 @@ class Hotel(SoftDeleteModel):
     def __str__(self):
         return self.name
 
+    @cached_property
+    def logo_url(self):
+        return self.hotel_logo.url if self.hotel_logo else ''
+
 class HotelAmenity(SoftDeleteModel):
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -46,6 +53,13 @@ class RoomAmenity(SoftDeleteModel):
     def __str__(self):
         return self.name
 
+class RoomTypeQuerySet(SoftDeleteQuerySet):
+    def catalogue(self):
+        """
+        Room types for listing pages, with their live amenities prefetched
+        """
+        return self.prefetch_related(alive_prefetch('amenities'))
+
 class RoomType(SoftDeleteModel):
     name = models.CharField(max_length=200, unique=True)
     description = models.TextField()
@@ -55,6 +69,12 @@ class RoomType(SoftDeleteModel):
     amenities = models.ManyToManyField(RoomAmenity)
     image = CloudinaryField('image', blank=True, null=True)
 
+    objects = SoftDeleteManager.from_queryset(RoomTypeQuerySet)()
+
+    @cached_property
+    def image_url(self):
+        return self.image.url if self.image else ''
+
     def clean(self):
         # Skip validation for unsaved instances
         if self.pk is None:
@@ -67,15 +87,58 @@ class RoomType(SoftDeleteModel):
     def __str__(self):
         return self.name
 
+class RoomQuerySet(SoftDeleteQuerySet):
+    def board(self, day, lookahead=7):
+        """
+        Rooms with their type and hotel joined and, for the night of the given
+        day, the occupying booking and the next arrival within lookahead days
+        annotated as current_* and upcoming_* fields, in one query
+        """
+        bookings = Booking.objects.filter(room=models.OuterRef('pk'), status__in=BLOCKING_STATUSES)
+        current = bookings.filter(checkin__lte=day, checkout__gt=day).order_by('checkin', 'id')
+        upcoming = bookings.filter(
+            checkin__gt=day, checkin__lte=day + timedelta(days=lookahead)
+        ).order_by('checkin', 'id')
+
+        annotations = {'is_occupied': models.Exists(current)}
+        for prefix, queryset in (('current', current), ('upcoming', upcoming)):
+            for field in ('checkin', 'checkout', 'status'):
+                annotations[f'{prefix}_{field}'] = models.Subquery(queryset.values(field)[:1])
+        return self.select_related('room_type', 'hotel').annotate(**annotations)
+
+    def with_board_status(self, status):
+        """Filter board() rows by occupied, available or disabled; any other value keeps all rows"""
+        if status == 'occupied':
+            return self.filter(is_occupied=True)
+        if status == 'available':
+            return self.filter(is_available=True, is_occupied=False)
+        if status == 'disabled':
+            return self.filter(is_available=False)
+        return self
+
 class Room(SoftDeleteModel):
     hotel = models.ForeignKey(Hotel, on_delete=models.SET_NULL, null=True)
     room_type = models.ForeignKey(RoomType, on_delete=models.SET_NULL, null=True)
     room_number = models.CharField(max_length=10, unique=True)
     is_available = models.BooleanField(default=True)
 
+    objects = SoftDeleteManager.from_queryset(RoomQuerySet)()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['room_type', 'is_available'],
+                name='room_type_available_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+        ]
+
     def __str__(self):
         return f'{self.room_type} - {self.room_number}'
 
+# Booking statuses that occupy a room for their date range
+BLOCKING_STATUSES = ('confirmed', 'pending')
+
 class Booking(SoftDeleteModel):
     room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True)
     checkin = models.DateField()
@@ -89,6 +152,35 @@ class Booking(SoftDeleteModel):
                                                       ('cancelled', 'Cancelled')],
                               default='pending')
     transaction_id = models.CharField(max_length=100, blank=True, null=True)
+    payment_reference = models.CharField(max_length=100, blank=True, null=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Overlap checks: room + status equality, then the date range
+            models.Index(
+                fields=['room', 'status', 'checkin', 'checkout'],
+                name='booking_room_overlap_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+            # Type-wide overlap checks and inventory rebuilds filter on dates first
+            models.Index(
+                fields=['checkin', 'checkout'],
+                name='booking_stay_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+            # Dashboard date ranges and newest-first admin listing
+            models.Index(
+                fields=['created_at', 'status'],
+                name='booking_created_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+            # Keyset pagination of the admin booking list on (-created_at, -id)
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='booking_keyset_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+        ]
 
     def clean(self):
         # Ensure check-in is before check-out
@@ -101,15 +193,16 @@ class Booking(SoftDeleteModel):
                 f"({self.room.room_type.capacity}) for this room type.")
         if self.guests <= 0:
             raise ValidationError("Number of guests must be at least 1.")
-        # Check for overlapping bookings
-        overlapping_bookings = Booking.objects.filter(
-            room=self.room,
-            checkin__lt=self.checkout,
-            checkout__gt=self.checkin,
-            status='confirmed'
-        ).exclude(id=self.id)
-        if overlapping_bookings.exists():
-            raise ValidationError("The room is not available for the selected dates.")
+        # A booking that occupies the room must not overlap any other that does
+        if self.status in BLOCKING_STATUSES:
+            overlapping_bookings = Booking.objects.filter(
+                room=self.room,
+                checkin__lt=self.checkout,
+                checkout__gt=self.checkin,
+                status__in=BLOCKING_STATUSES
+            ).exclude(id=self.id)
+            if overlapping_bookings.exists():
+                raise ValidationError("The room is not available for the selected dates.")
 
     def save(self, *args, **kwargs):
         # Calculate total price based on number of nights
@@ -124,16 +217,156 @@ class Booking(SoftDeleteModel):
     def __str__(self):
         return f"Booking for {self.room} - {self.checkin} to {self.checkout}"
 
+class RoomInventory(models.Model):
+    """Per-night inventory for a room type, maintained from booking writes"""
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='inventory')
+    date = models.DateField()
+    capacity = models.PositiveIntegerField(default=0)
+    sold = models.IntegerField(default=0)  # confirmed bookings
+    held = models.IntegerField(default=0)  # pending bookings
+
+    class Meta:
+        unique_together = ('room_type', 'date')
+        ordering = ['room_type', 'date']
+
+    @property
+    def free(self):
+        return self.capacity - self.sold - self.held
+
+    def __str__(self):
+        return f"{self.room_type} - {self.date}: {self.free}/{self.capacity} free"
+
+class BookingDailyRollup(models.Model):
+    """Bookings created per day, room type and status, maintained from booking writes"""
+    date = models.DateField()
+    room_type = models.ForeignKey(RoomType, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=30)
+    count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    nights = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'room_type', 'status')
+        ordering = ['date', 'room_type', 'status']
+
+    def __str__(self):
+        return f"{self.date} - {self.room_type} - {self.status}: {self.count}"
+
+class RoomHold(models.Model):
+    """Rooms of a type set aside for a guest while their payment is in progress"""
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='holds')
+    checkin = models.DateField()
+    checkout = models.DateField()
+    rooms = models.PositiveIntegerField(default=1)
+    reference = models.CharField(max_length=100, unique=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room_type', 'expires_at'], name='roomhold_type_expiry_idx'),
+            models.Index(fields=['expires_at'], name='roomhold_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"Hold {self.reference}: {self.rooms} x {self.room_type} {self.checkin} to {self.checkout}"
+
+class SearchDocument(models.Model):
+    """Normalized searchable text for one booking or user, maintained by hotel.search"""
+    kind = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+    text = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+class PaymentVerification(models.Model):
+    """A Paystack reference confirmed as paid, kept so it is never verified twice"""
+    reference = models.CharField(max_length=100, unique=True)
+    transaction_id = models.CharField(max_length=100)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)  # Naira
+    verified_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.reference}: ₦{self.amount}"
+
+class PaymentEvent(models.Model):
+    """Inbox of Paystack webhook events, stored once per reference and event"""
+    reference = models.CharField(max_length=100)
+    event = models.CharField(max_length=50)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = ('reference', 'event')
+        indexes = [
+            # The worker scans unprocessed events oldest first
+            models.Index(
+                fields=['received_at'],
+                name='paymentevent_pending_idx',
+                condition=models.Q(processed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.reference}"
+
 class Guest(SoftDeleteModel):
+    # The most recent stay; every stay is recorded in GuestStay
     booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, null=True)
+    bookings = models.ManyToManyField(Booking, through='GuestStay', related_name='registered_guests')
     first_name = models.CharField(max_length=50)
     last_name = models.CharField(max_length=50)
     email = models.EmailField()
     phone = models.CharField(max_length=15)
+    # Lookup keys, kept in step with email and phone by save()
+    email_key = models.CharField(max_length=254, blank=True, editable=False)
+    phone_key = models.CharField(max_length=20, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['email_key'], name='guest_email_key_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['phone_key'], name='guest_phone_key_idx', condition=models.Q(is_deleted=False)),
+        ]
+
+    def set_contact_keys(self):
+        """Recompute the lookup keys; bulk_create callers must call this themselves"""
+        self.email_key = normalize_email(self.email)
+        self.phone_key = normalize_phone(self.phone)
+
+    def save(self, *args, **kwargs):
+        self.set_contact_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'email', 'phone'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'email_key', 'phone_key'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+class GuestStay(models.Model):
+    """A guest registered on a booking; together they are the guest's stay history"""
+    guest = models.ForeignKey(Guest, on_delete=models.CASCADE, related_name='stays')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='guest_stays')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # The unique index serves "stays of a guest", the second "guests of a booking"
+        unique_together = ('guest', 'booking')
+        indexes = [
+            models.Index(fields=['booking', 'guest'], name='gueststay_booking_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.guest} on booking {self.booking_id}"
+
 class ContactForm(models.Model):
     name = models.CharField(max_length=200)
     email = models.EmailField()
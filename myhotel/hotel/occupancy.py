@@ -0,0 +1,137 @@
+"""
+In-memory room occupancy index.
+
+OccupancyIndex is built from one bulk fetch of bookings and then answers
+overlap, free-slot and next-occupied questions per room without touching the
+database. Each room's bookings are kept sorted by check-in together with a
+running maximum of check-out dates (a static interval tree laid out as
+arrays), so overlap tests are a single binary search.
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from .availability import BLOCKING_STATUSES
+from .models import Booking
+
+
+class RoomTimeline:
+    """Bookings of a single room, indexed for date range queries"""
+
+    def __init__(self, bookings):
+        bookings = sorted(bookings, key=lambda booking: (booking.checkin, booking.checkout))
+        self.bookings = bookings
+        self.starts = [booking.checkin for booking in bookings]
+        self.ends = [booking.checkout for booking in bookings]
+
+        # max_ends[i] is the latest checkout among bookings[0..i]
+        self.max_ends = []
+        latest = None
+        for end in self.ends:
+            latest = end if latest is None or end > latest else latest
+            self.max_ends.append(latest)
+
+        # Disjoint busy periods, used for gap searches
+        self.busy_starts = []
+        self.busy_ends = []
+        for start, end in zip(self.starts, self.ends):
+            if self.busy_ends and start <= self.busy_ends[-1]:
+                self.busy_ends[-1] = max(self.busy_ends[-1], end)
+            else:
+                self.busy_starts.append(start)
+                self.busy_ends.append(end)
+
+    def is_free(self, checkin, checkout):
+        """True if no booking overlaps [checkin, checkout)"""
+        candidates = bisect_left(self.starts, checkout)
+        return candidates == 0 or self.max_ends[candidates - 1] <= checkin
+
+    def overlapping(self, checkin, checkout):
+        """Bookings overlapping [checkin, checkout), ordered by check-in"""
+        found = []
+        index = bisect_left(self.starts, checkout) - 1
+        # Once the running maximum drops to checkin nothing earlier can overlap
+        while index >= 0 and self.max_ends[index] > checkin:
+            if self.ends[index] > checkin:
+                found.append(self.bookings[index])
+            index -= 1
+        found.reverse()
+        return found
+
+    def next_booking(self, day):
+        """First booking checking in strictly after the given day"""
+        index = bisect_right(self.starts, day)
+        return self.bookings[index] if index < len(self.bookings) else None
+
+    def next_occupied(self, day):
+        """First night on or after the given day that the room is occupied"""
+        index = bisect_right(self.busy_starts, day) - 1
+        if index >= 0 and self.busy_ends[index] > day:
+            return day
+        index += 1
+        return self.busy_starts[index] if index < len(self.busy_starts) else None
+
+    def free_slot(self, start, nights):
+        """Earliest check-in on or after start with the given number of free nights"""
+        candidate = start
+        index = bisect_right(self.busy_starts, candidate) - 1
+        if index >= 0 and self.busy_ends[index] > candidate:
+            candidate = self.busy_ends[index]
+        index += 1
+        while index < len(self.busy_starts) and (self.busy_starts[index] - candidate).days < nights:
+            candidate = self.busy_ends[index]
+            index += 1
+        return candidate
+
+
+EMPTY_TIMELINE = RoomTimeline([])
+
+
+class OccupancyIndex:
+    """Occupancy of many rooms, answered in memory"""
+
+    def __init__(self, bookings):
+        by_room = defaultdict(list)
+        for booking in bookings:
+            by_room[booking.room_id].append(booking)
+        self.timelines = {room_id: RoomTimeline(items) for room_id, items in by_room.items()}
+
+    @classmethod
+    def for_rooms(cls, rooms=None, start=None, end=None, exclude_booking_id=None, statuses=BLOCKING_STATUSES):
+        """
+        Build an index with one query over the bookings of the given rooms
+        that touch [start, end). Open bounds fetch the whole history.
+        """
+        bookings = Booking.objects.filter(status__in=statuses)
+        if rooms is not None:
+            bookings = bookings.filter(room__in=rooms)
+        if start is not None:
+            bookings = bookings.filter(checkout__gt=start)
+        if end is not None:
+            bookings = bookings.filter(checkin__lt=end)
+        if exclude_booking_id:
+            bookings = bookings.exclude(id=exclude_booking_id)
+        return cls(bookings)
+
+    def timeline(self, room):
+        room_id = getattr(room, 'pk', room)
+        return self.timelines.get(room_id, EMPTY_TIMELINE)
+
+    def is_free(self, room, checkin, checkout):
+        return self.timeline(room).is_free(checkin, checkout)
+
+    def overlapping(self, room, checkin, checkout):
+        return self.timeline(room).overlapping(checkin, checkout)
+
+    def current_booking(self, room, day):
+        """Booking occupying the room on the night of the given day"""
+        bookings = self.overlapping(room, day, day + timedelta(days=1))
+        return bookings[0] if bookings else None
+
+    def next_booking(self, room, day):
+        return self.timeline(room).next_booking(day)
+
+    def next_occupied(self, room, day):
+        return self.timeline(room).next_occupied(day)
+
+    def free_slot(self, room, start, nights):
+        return self.timeline(room).free_slot(start, nights)
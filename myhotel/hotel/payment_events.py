@@ -0,0 +1,101 @@
+"""
+Paystack webhook inbox.
+
+The webhook view only checks the signature and stores the event with
+record_event(), which is one insert keyed by (reference, event), so
+Paystack's retries are acknowledged without storing anything twice. The
+process_payment_events command drains the inbox in the background and
+moves the bookings paid with that reference to the status the event implies.
+Bookings are confirmed by submit_booking once the payment is verified, so
+charge.success events are only recorded; failures and refunds cancel.
+
+Several workers may run at once: each batch is claimed with
+SELECT ... FOR UPDATE SKIP LOCKED where the database supports it.
+"""
+import logging
+from django.db import transaction
+from django.utils import timezone
+from .models import Booking, PaymentEvent
+
+logger = logging.getLogger(__name__)
+
+# Booking status each Paystack event moves paid bookings to
+EVENT_STATUSES = {
+    'charge.failed': 'cancelled',
+    'refund.processed': 'cancelled',
+}
+# Statuses an event may move a booking out of
+EVENT_SOURCE_STATUSES = {
+    'cancelled': ('pending', 'confirmed'),
+}
+MAX_EVENT_ATTEMPTS = 5
+
+
+def event_reference(payload):
+    data = payload.get('data') or {}
+    # Refund events carry the charge reference under transaction_reference
+    return data.get('reference') or data.get('transaction_reference')
+
+
+def record_event(payload):
+    """
+    Store a webhook payload unless the same event for the reference is already
+    stored, in one INSERT ... ON CONFLICT DO NOTHING. Returns the event, or
+    None if the payload has no event or reference.
+    """
+    reference = event_reference(payload)
+    event = payload.get('event')
+    if not reference or not event:
+        return None
+    event = PaymentEvent(reference=str(reference)[:100], event=str(event)[:50], payload=payload)
+    PaymentEvent.objects.bulk_create([event], ignore_conflicts=True)
+    return event
+
+
+def apply_event(event):
+    """
+    Move the bookings paid with the event's reference; returns how many changed
+    """
+    status = EVENT_STATUSES.get(event.event)
+    if status is None:
+        return 0
+    bookings = Booking.objects.filter(
+        payment_reference=event.reference,
+        status__in=EVENT_SOURCE_STATUSES[status]
+    )
+    changed = 0
+    for booking in bookings:
+        # Saved one by one so the inventory and rollup signals follow the change
+        booking.status = status
+        booking.save(update_fields=['status'])
+        changed += 1
+    return changed
+
+
+def process_pending(limit=100):
+    """
+    Apply up to limit unprocessed events, oldest first; returns how many were processed
+    """
+    processed = 0
+    with transaction.atomic():
+        events = list(
+            PaymentEvent.objects.filter(processed_at__isnull=True, attempts__lt=MAX_EVENT_ATTEMPTS)
+            .select_for_update(skip_locked=True)
+            .order_by('received_at')[:limit]
+        )
+        for event in events:
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    changed = apply_event(event)
+            except Exception as e:
+                logger.error(f"Payment event {event} failed: {str(e)}", exc_info=True)
+                event.last_error = str(e)
+                event.save(update_fields=['attempts', 'last_error'])
+                continue
+            event.processed_at = timezone.now()
+            event.last_error = ''
+            event.save(update_fields=['attempts', 'processed_at', 'last_error'])
+            logger.info(f"Payment event {event} processed: {changed} booking(s) updated")
+            processed += 1
+    return processed
@@ -0,0 +1,51 @@
+"""
+Verified payment references.
+
+A reference Paystack has confirmed as paid is stored in PaymentVerification
+for good, so repeated verify_payment calls (double clicks, refreshes,
+retries) and submit_booking read it from the database instead of asking
+Paystack again. References Paystack declined are remembered in the cache for
+FAILED_VERIFICATION_TIMEOUT seconds only, since a pending payment may still
+succeed. Network errors and timeouts are never remembered.
+"""
+from decimal import Decimal
+from django.core.cache import cache
+from .models import PaymentVerification
+
+FAILED_VERIFICATION_TIMEOUT = 30
+
+
+def failed_key(reference):
+    return f'payments:failed:{reference}'
+
+
+def get_verification(reference):
+    """The stored verification for a reference, or None"""
+    if not reference:
+        return None
+    return PaymentVerification.objects.filter(reference=reference).first()
+
+
+def record_verification(reference, data):
+    """
+    Store a successful Paystack transaction; data is the 'data' object of the
+    verify response, with the amount in kobo
+    """
+    verification, _ = PaymentVerification.objects.get_or_create(
+        reference=reference,
+        defaults={
+            'transaction_id': str(data['id']),
+            'amount': Decimal(data['amount']) / 100,
+        }
+    )
+    cache.delete(failed_key(reference))
+    return verification
+
+
+def get_failure(reference):
+    """The message Paystack declined the reference with recently, or None"""
+    return cache.get(failed_key(reference))
+
+
+def remember_failure(reference, message):
+    cache.set(failed_key(reference), message, FAILED_VERIFICATION_TIMEOUT)
@@ -0,0 +1,98 @@
+"""
+Paystack API client.
+
+All calls share one pooled requests.Session per process, so verifications
+reuse keep-alive connections instead of doing a TCP and TLS handshake each
+time. Timeouts are tight and a read timeout is never retried: a slow
+provider costs a worker thread PAYSTACK_CONNECT_TIMEOUT +
+PAYSTACK_READ_TIMEOUT seconds at most, not the old 30. Connection errors and
+gateway errors (502/503/504) are retried with a short backoff.
+
+Webhook requests are authenticated with valid_signature().
+
+PAYSTACK_BASE_URL points the client at the fake server in
+hotel.fake_paystack for tests and load tests.
+"""
+import hashlib
+import hmac
+import threading
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+PAYSTACK_BASE_URL = 'https://api.paystack.co'
+PAYSTACK_CONNECT_TIMEOUT = 3.05
+PAYSTACK_READ_TIMEOUT = 10
+PAYSTACK_POOL_SIZE = 20
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def build_session():
+    retry = Retry(
+        total=2,
+        connect=2,
+        read=False,
+        status=2,
+        backoff_factor=0.25,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({'GET'}),
+        raise_on_status=False,
+    )
+    pool_size = getattr(settings, 'PAYSTACK_POOL_SIZE', PAYSTACK_POOL_SIZE)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """
+    The process-wide pooled session, created on first use
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def base_url():
+    return getattr(settings, 'PAYSTACK_BASE_URL', PAYSTACK_BASE_URL).rstrip('/')
+
+
+def timeout():
+    return (
+        getattr(settings, 'PAYSTACK_CONNECT_TIMEOUT', PAYSTACK_CONNECT_TIMEOUT),
+        getattr(settings, 'PAYSTACK_READ_TIMEOUT', PAYSTACK_READ_TIMEOUT),
+    )
+
+
+def verify_transaction(reference):
+    """
+    Ask Paystack for the state of a transaction; returns the raw response.
+    Raises requests.RequestException on network errors and timeouts.
+    """
+    return get_session().get(
+        f'{base_url()}/transaction/verify/{reference}',
+        headers={
+            'Authorization': f'Bearer {settings.PAYSTACK_SECRET_KEY}',
+            'Content-Type': 'application/json'
+        },
+        timeout=timeout()
+    )
+
+
+def valid_signature(body, signature):
+    """
+    True if signature is the HMAC-SHA512 of the raw request body under our secret key,
+    as Paystack sends it in the X-Paystack-Signature header
+    """
+    if not signature or not settings.PAYSTACK_SECRET_KEY:
+        return False
+    expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
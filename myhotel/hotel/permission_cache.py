@@ -0,0 +1,77 @@
+"""
+Per-user permission sets.
+
+A user's permission codenames are loaded with one query, memoized on the user
+object (request.user lives for one request) and stored in the Django cache
+under a version number. Signals bump the version whenever roles, role
+permissions, user role assignments or permissions change, which makes every
+cached set stale at once.
+"""
+from django.core.cache import cache
+from .cache_versions import get_version, bump_version
+from .models import Permission, Role
+
+PERMISSIONS_VERSION_KEY = 'permissions:version'
+PERMISSIONS_CACHE_TIMEOUT = 60 * 60
+
+
+def permissions_version():
+    return get_version(PERMISSIONS_VERSION_KEY)
+
+
+def bump_permissions_version():
+    bump_version(PERMISSIONS_VERSION_KEY)
+
+
+def load_permission_codenames(user):
+    """
+    Permission codenames granted to a user, in one query
+    """
+    permissions = Permission.objects.all()
+    if not user.is_superuser:
+        permissions = permissions.filter(role__userrole__user=user, role__is_active=True)
+    return frozenset(permissions.order_by().values_list('codename', flat=True).distinct())
+
+
+def load_role_names(user):
+    """
+    Names of the user's active roles, in one query
+    """
+    return tuple(Role.objects.filter(userrole__user=user, is_active=True).values_list('name', flat=True))
+
+
+def cached_for_user(user, name, loader, empty):
+    """
+    Value computed by loader(user), memoized on the user object and cached per version
+    """
+    if user is None or not user.is_authenticated:
+        return empty
+
+    attribute = f'_{name}_cache'
+    value = getattr(user, attribute, None)
+    if value is not None:
+        return value
+
+    key = f'permissions:{permissions_version()}:{name}:{user.pk}:{int(user.is_superuser)}'
+    value = cache.get(key)
+    if value is None:
+        value = loader(user)
+        cache.set(key, value, PERMISSIONS_CACHE_TIMEOUT)
+
+    setattr(user, attribute, value)
+    return value
+
+
+def get_permission_codenames(user):
+    """
+    Frozenset of the user's permission codenames, cached per request and per version
+    """
+    return cached_for_user(user, 'permission_codenames', load_permission_codenames, frozenset())
+
+
+def get_role_names(user):
+    """
+    Tuple of the user's active role names, cached like the permission set
+    """
+    return cached_for_user(user, 'role_names', load_role_names, ())
+
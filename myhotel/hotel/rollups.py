@@ -0,0 +1,143 @@
+"""
+Daily booking rollups for analytics.
+
+BookingDailyRollup keeps one row per creation day (local time), room type and
+status with the number of bookings, their revenue and the nights booked. Rows
+are adjusted incrementally whenever a booking is saved, soft deleted,
+restored or deleted, so dashboards aggregate a few rows per day instead of
+scanning every booking ever made.
+
+Bulk writes (queryset.update, bulk_create) bypass the signals; run the
+rebuild_booking_rollups management command after those.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Booking, BookingDailyRollup, Room
+
+
+def rollup_date(created_at):
+    """Local calendar day a booking was created on"""
+    if timezone.is_aware(created_at):
+        return timezone.localdate(created_at)
+    return created_at.date()
+
+
+def booking_footprint(booking):
+    """
+    The part of a booking that the rollups count, or None if it is not counted
+    """
+    if booking.is_deleted or not booking.created_at or not booking.status:
+        return None
+    nights = 0
+    if booking.checkin and booking.checkout and booking.checkin < booking.checkout:
+        nights = (booking.checkout - booking.checkin).days
+    return (
+        booking.room_id,
+        rollup_date(booking.created_at),
+        booking.status,
+        Decimal(str(booking.total_price or 0)),
+        nights,
+    )
+
+
+def apply_footprint(footprint, delta):
+    """
+    Add (delta=1) or remove (delta=-1) one booking from its rollup row
+    """
+    room_id, day, status, revenue, nights = footprint
+    room_type_id = None
+    if room_id:
+        room_type_id = Room.all_objects.filter(id=room_id).values_list('room_type_id', flat=True).first()
+
+    rows = BookingDailyRollup.objects.filter(date=day, room_type_id=room_type_id, status=status)
+    changes = {
+        'count': F('count') + delta,
+        'revenue': F('revenue') + revenue * delta,
+        'nights': F('nights') + nights * delta,
+    }
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            BookingDailyRollup.objects.create(
+                date=day, room_type_id=room_type_id, status=status,
+                count=delta, revenue=revenue * delta, nights=nights * delta
+            )
+    except IntegrityError:
+        # Another writer created the row first
+        rows.update(**changes)
+
+
+def sync_booking(previous, current):
+    """
+    Move a booking from its previous rollup row to its current one
+    """
+    if previous == current:
+        return
+    if previous:
+        apply_footprint(previous, -1)
+    if current:
+        apply_footprint(current, 1)
+
+
+def expected_rollups():
+    """
+    Rollups computed from scratch from the bookings table
+    """
+    totals = defaultdict(lambda: {'count': 0, 'revenue': Decimal('0'), 'nights': 0})
+    bookings = Booking.objects.values_list(
+        'room__room_type_id', 'created_at', 'status', 'total_price', 'checkin', 'checkout'
+    )
+    for room_type_id, created_at, status, total_price, checkin, checkout in bookings.iterator():
+        row = totals[(rollup_date(created_at), room_type_id, status)]
+        row['count'] += 1
+        row['revenue'] += total_price or 0
+        if checkin < checkout:
+            row['nights'] += (checkout - checkin).days
+    return totals
+
+
+def rebuild_rollups(batch_size=1000):
+    """
+    Replace the rollup table with rows recomputed from bookings
+    """
+    expected = expected_rollups()
+    BookingDailyRollup.objects.all().delete()
+    BookingDailyRollup.objects.bulk_create([
+        BookingDailyRollup(date=day, room_type_id=room_type_id, status=status, **values)
+        for (day, room_type_id, status), values in expected.items()
+    ], batch_size=batch_size)
+    return len(expected)
+
+
+def check_rollups():
+    """
+    Compare the stored rollups with bookings; returns a list of mismatches
+    """
+    empty = {'count': 0, 'revenue': Decimal('0'), 'nights': 0}
+    expected = expected_rollups()
+    stored = defaultdict(lambda: dict(empty))
+    rows = BookingDailyRollup.objects.values_list('date', 'room_type_id', 'status', 'count', 'revenue', 'nights')
+    for day, room_type_id, status, count, revenue, nights in rows:
+        # Summed so duplicate rows for bookings without a room type still compare
+        row = stored[(day, room_type_id, status)]
+        row['count'] += count
+        row['revenue'] += revenue
+        row['nights'] += nights
+
+    mismatches = []
+    for key in set(expected) | set(stored):
+        want = expected.get(key, empty)
+        have = stored.get(key, empty)
+        if want != have:
+            mismatches.append({
+                'date': key[0],
+                'room_type_id': key[1],
+                'status': key[2],
+                'expected': want,
+                'stored': have,
+            })
+    return sorted(mismatches, key=lambda item: (item['date'], item['room_type_id'] or 0, item['status']))
@@ -1,7 +1,10 @@
 import logging
 from datetime import datetime
 from django.utils import timezone
-from .models import RoomType, Booking, Room
+from .models import RoomType
+from .availability import count_available_rooms
+from .inventory import free_rooms
+from .holds import held_rooms
 
 logger = logging.getLogger(__name__)
 
@@ -50,23 +53,15 @@ class RoomAvailabilityChecker:
             except (TypeError, ValueError):
                 requested_rooms = 1
 
-            # Check availability logic (improved)
-            # Get all rooms of the specified room type
-            rooms = Room.objects.filter(
-                room_type=room_type,
-                is_available=True
-            )
-            # Only count rooms that have no overlapping bookings for the requested period
-            available_rooms = 0
-            for room in rooms:
-                overlapping_bookings = Booking.objects.filter(
-                    room=room,
-                    checkin__lt=checkout,
-                    checkout__gt=checkin,
-                    status__in=['confirmed', 'pending']
-                )
-                if not overlapping_bookings.exists():
-                    available_rooms += 1
+            # Fewest unsold rooms on any night of the stay, from the inventory
+            # calendar. That is only an upper bound: one room free on the first
+            # night and another on the second is not a room for the whole stay,
+            # so a non-zero answer is confirmed with the per-room overlap check
+            available_rooms = free_rooms(room_type, checkin, checkout)
+            if available_rooms:
+                available_rooms = min(available_rooms, count_available_rooms(room_type, checkin, checkout))
+            # Less rooms held for payments in progress
+            available_rooms = max(available_rooms - held_rooms(room_type, checkin, checkout), 0)
             if available_rooms >= requested_rooms:
                 number_of_nights = (checkout - checkin).days
                 base_price = room_type.base_price
@@ -0,0 +1,152 @@
+"""
+Admin search.
+
+Every booking and user has one SearchDocument row holding its searchable
+values (booking number, room, room type, guest names, emails and phones;
+username, names and email) as lowercase words. A search matches documents
+containing every term of the query and ranks whole-word matches above word
+prefixes and prefixes above substrings.
+
+On PostgreSQL the text column carries a pg_trgm GIN index (migration 0026),
+so the substring filters are index scans rather than scans of the bookings,
+guests and users tables. Other databases scan the one narrow documents table.
+
+Documents are kept in sync by signals in hotel.signals; bulk writes call
+index_bookings() themselves. rebuild_search_index recreates them all.
+"""
+import re
+from django.contrib.auth.models import User
+from django.db.models import Case, IntegerField, Value, When
+from .models import Booking, GuestStay, SearchDocument
+from .soft_delete import alive
+
+BOOKING = 'booking'
+USER = 'user'
+# Terms beyond this are ignored so a pasted paragraph cannot build a huge query
+MAX_TERMS = 6
+
+_separators = re.compile(r'[^\w@.+-]+')
+
+
+def normalize(*values):
+    """Lowercase words of the given values, space separated with a leading and trailing space"""
+    words = []
+    for value in values:
+        if value not in (None, ''):
+            words.extend(word for word in _separators.split(str(value).lower()) if word)
+    return f" {' '.join(words)} "
+
+
+def query_terms(query):
+    return normalize(query).split()[:MAX_TERMS]
+
+
+def booking_text(booking_id, room_number, room_type_name, guests):
+    """
+    Document text for a booking; guests are (first_name, last_name, email, phone) tuples
+    """
+    values = [booking_id, f'#{booking_id}', room_number, room_type_name]
+    for guest in guests:
+        values.extend(guest)
+    return normalize(*values)
+
+
+def user_text(username, first_name, last_name, email):
+    return normalize(username, first_name, last_name, email)
+
+
+def save_documents(kind, texts):
+    """Insert or update the documents in {object_id: text}"""
+    SearchDocument.objects.bulk_create(
+        [SearchDocument(kind=kind, object_id=object_id, text=text) for object_id, text in texts.items()],
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['text', 'updated_at'],
+        batch_size=500,
+    )
+
+
+def index_bookings(booking_ids):
+    """
+    Refresh the documents of the given bookings, in three queries;
+    documents of deleted bookings are removed
+    """
+    booking_ids = {booking_id for booking_id in booking_ids if booking_id}
+    if not booking_ids:
+        return
+    guests = {}
+    for booking_id, *guest in alive(GuestStay.objects.filter(booking_id__in=booking_ids), 'guest').order_by(
+        'guest_id'
+    ).values_list(
+        'booking_id', 'guest__first_name', 'guest__last_name', 'guest__email', 'guest__phone'
+    ):
+        guests.setdefault(booking_id, []).append(guest)
+
+    texts = {
+        booking_id: booking_text(booking_id, room_number, room_type_name, guests.get(booking_id, []))
+        for booking_id, room_number, room_type_name in Booking.objects.filter(id__in=booking_ids).values_list(
+            'id', 'room__room_number', 'room__room_type__name'
+        )
+    }
+    save_documents(BOOKING, texts)
+    remove_documents(BOOKING, booking_ids - set(texts))
+
+
+def index_users(user_ids):
+    user_ids = set(user_ids)
+    texts = {
+        user_id: user_text(username, first_name, last_name, email)
+        for user_id, username, first_name, last_name, email in User.objects.filter(id__in=user_ids).values_list(
+            'id', 'username', 'first_name', 'last_name', 'email'
+        )
+    }
+    save_documents(USER, texts)
+    remove_documents(USER, user_ids - set(texts))
+
+
+def remove_documents(kind, object_ids):
+    if object_ids:
+        SearchDocument.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def search(kind, query):
+    """
+    Documents of the given kind matching every term of the query, annotated
+    with rank and ordered best first; None if the query has no terms
+    """
+    terms = query_terms(query)
+    if not terms:
+        return None
+    documents = SearchDocument.objects.filter(kind=kind)
+    rank = Value(0)
+    for term in terms:
+        documents = documents.filter(text__contains=term)
+        rank = rank + Case(
+            When(text__contains=f' {term} ', then=Value(3)),
+            When(text__contains=f' {term}', then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    return documents.annotate(rank=rank).order_by('-rank', '-object_id')
+
+
+def search_ids(kind, query, limit):
+    """Ids of the best matching objects, best first"""
+    documents = search(kind, query)
+    if documents is None:
+        return []
+    return list(documents.values_list('object_id', flat=True)[:limit])
+
+
+def rebuild_search_index(batch_size=1000):
+    """
+    Recreate every document from bookings and users; returns how many were written
+    """
+    SearchDocument.objects.all().delete()
+    written = 0
+    for kind, model, index in ((BOOKING, Booking, index_bookings), (USER, User, index_users)):
+        ids = list(model.objects.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(ids), batch_size):
+            index(ids[start:start + batch_size])
+        written += len(ids)
+    return written
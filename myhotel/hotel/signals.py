@@ -1,7 +1,18 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import (
+    UserProfile, Booking, Guest, GuestStay, Room, Role, UserRole, Permission, Hotel, RoomType, RoomAmenity, HotelAmenity
+)
+from .availability import bump_availability_version
+from .permission_cache import bump_permissions_version
+from .hotel_settings import invalidate_hotel
+from .catalogue import bump_catalogue_version
+from . import inventory, rollups, search
+
+# Fields a Booking snapshot reads; deferred instances are not snapshotted
+INVENTORY_FIELDS = {'room_id', 'checkin', 'checkout', 'status', 'is_deleted'}
+ROLLUP_FIELDS = INVENTORY_FIELDS | {'created_at', 'total_price'}
 
 
 @receiver(post_save, sender=User)
@@ -17,4 +28,222 @@ def save_user_profile(sender, instance, **kwargs):
     if hasattr(instance, 'profile'):
         instance.profile.save()
     else:
-        UserProfile.objects.create(user=instance)
\ No newline at end of file
+        UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_availability(sender, **kwargs):
+    """Expire cached availability when bookings or rooms change"""
+    bump_availability_version()
+
+
+@receiver(post_init, sender=Booking)
+def snapshot_booking_inventory(sender, instance, **kwargs):
+    """Remember what the booking occupied when it was loaded"""
+    if instance.pk and INVENTORY_FIELDS & instance.get_deferred_fields():
+        instance._inventory_footprint = None
+        instance._inventory_unknown = True
+    else:
+        instance._inventory_footprint = inventory.booking_footprint(instance) if instance.pk else None
+        instance._inventory_unknown = False
+
+
+@receiver(post_save, sender=Booking)
+def update_booking_inventory(sender, instance, created, **kwargs):
+    """Move the booking's nights in the inventory calendar"""
+    current = inventory.booking_footprint(instance)
+    if not created and instance._inventory_unknown:
+        # Loaded with deferred fields, so the old footprint is unknown;
+        # rebuild_inventory will reconcile it
+        instance._inventory_unknown = False
+    else:
+        inventory.sync_booking(instance._inventory_footprint, current)
+    instance._inventory_footprint = current
+
+
+@receiver(post_delete, sender=Booking)
+def release_booking_inventory(sender, instance, **kwargs):
+    """Give a hard-deleted booking's nights back to the inventory"""
+    inventory.sync_booking(instance._inventory_footprint, None)
+
+
+@receiver(post_init, sender=Booking)
+def snapshot_booking_rollup(sender, instance, **kwargs):
+    """Remember which daily rollup the booking was counted in when loaded"""
+    if instance.pk and ROLLUP_FIELDS & instance.get_deferred_fields():
+        instance._rollup_footprint = None
+        instance._rollup_unknown = True
+    else:
+        instance._rollup_footprint = rollups.booking_footprint(instance) if instance.pk else None
+        instance._rollup_unknown = False
+
+
+@receiver(post_save, sender=Booking)
+def update_booking_rollup(sender, instance, created, **kwargs):
+    """Move the booking between daily rollup rows"""
+    current = rollups.booking_footprint(instance)
+    if not created and instance._rollup_unknown:
+        # rebuild_booking_rollups will reconcile deferred loads
+        instance._rollup_unknown = False
+    else:
+        rollups.sync_booking(instance._rollup_footprint, current)
+    instance._rollup_footprint = current
+
+
+@receiver(post_delete, sender=Booking)
+def release_booking_rollup(sender, instance, **kwargs):
+    """Remove a hard-deleted booking from the daily rollups"""
+    rollups.sync_booking(instance._rollup_footprint, None)
+
+
+# Fields a Room snapshot reads
+ROOM_INVENTORY_FIELDS = {'room_type_id', 'is_available', 'is_deleted'}
+
+
+@receiver(post_init, sender=Room)
+def snapshot_room_type(sender, instance, **kwargs):
+    if 'room_type_id' not in instance.get_deferred_fields():
+        instance._inventory_room_type_id = instance.room_type_id
+    if instance.pk and ROOM_INVENTORY_FIELDS & instance.get_deferred_fields():
+        instance._inventory_counted = None
+        instance._inventory_unknown = True
+    else:
+        instance._inventory_counted = inventory.counted_room_type(instance) if instance.pk else None
+        instance._inventory_unknown = False
+
+
+@receiver(post_save, sender=Room)
+def move_room_inventory(sender, instance, created, **kwargs):
+    """Move the room's bookings when it leaves or returns to service or changes type"""
+    current = inventory.counted_room_type(instance)
+    if not created and instance._inventory_unknown:
+        # Loaded with deferred fields; rebuild_inventory will reconcile it
+        instance._inventory_unknown = False
+    else:
+        inventory.move_room(instance.pk, instance._inventory_counted, current)
+    instance._inventory_counted = current
+
+
+@receiver(pre_delete, sender=Room)
+def release_room_inventory(sender, instance, **kwargs):
+    """Take a hard-deleted room's bookings out before they lose their room"""
+    if not instance._inventory_unknown:
+        inventory.move_room(instance.pk, instance._inventory_counted, None)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def update_room_capacity(sender, instance, **kwargs):
+    """Recount capacity for the room's old and new room type"""
+    inventory.refresh_capacity([
+        getattr(instance, '_inventory_room_type_id', None),
+        instance.room_type_id
+    ])
+    instance._inventory_room_type_id = instance.room_type_id
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions(sender, **kwargs):
+    """Expire every cached permission set when roles or permissions change"""
+    bump_permissions_version()
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def invalidate_role_permissions(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_permissions_version()
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def invalidate_hotel_settings(sender, **kwargs):
+    """Reload the cached hotel after it is edited, soft deleted or deleted"""
+    invalidate_hotel()
+
+
+@receiver(post_save, sender=RoomType)
+@receiver(post_delete, sender=RoomType)
+@receiver(post_save, sender=RoomAmenity)
+@receiver(post_delete, sender=RoomAmenity)
+@receiver(post_save, sender=HotelAmenity)
+@receiver(post_delete, sender=HotelAmenity)
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def invalidate_catalogue(sender, **kwargs):
+    """Expire cached home page fragments and ETags when the catalogue changes"""
+    bump_catalogue_version()
+
+
+@receiver(m2m_changed, sender=RoomType.amenities.through)
+def invalidate_room_type_amenities(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_catalogue_version()
+
+
+@receiver(post_save, sender=Booking)
+def index_booking(sender, instance, **kwargs):
+    """Refresh the booking's search document; soft-deleted bookings lose it"""
+    search.index_bookings([instance.pk])
+
+
+@receiver(post_delete, sender=Booking)
+def unindex_booking(sender, instance, **kwargs):
+    search.remove_documents(search.BOOKING, [instance.pk])
+
+
+@receiver(post_save, sender=Guest)
+def index_guest_bookings(sender, instance, **kwargs):
+    """Refresh the documents of every booking the guest stays on"""
+    search.index_bookings(instance.stays.values_list('booking_id', flat=True))
+
+
+@receiver(post_save, sender=GuestStay)
+@receiver(post_delete, sender=GuestStay)
+def index_stay_booking(sender, instance, **kwargs):
+    search.index_bookings([instance.booking_id])
+
+
+@receiver(post_init, sender=Room)
+def snapshot_room_search(sender, instance, **kwargs):
+    if not {'room_number', 'room_type_id'} & instance.get_deferred_fields():
+        instance._search_key = (instance.room_number, instance.room_type_id)
+
+
+@receiver(post_save, sender=Room)
+def index_room_bookings(sender, instance, created, **kwargs):
+    """Bookings show the room number and type, so refresh them when those change"""
+    key = (instance.room_number, instance.room_type_id)
+    if not created and getattr(instance, '_search_key', None) != key:
+        search.index_bookings(Booking.objects.filter(room=instance).values_list('id', flat=True))
+    instance._search_key = key
+
+
+@receiver(post_init, sender=RoomType)
+def snapshot_room_type_name(sender, instance, **kwargs):
+    if 'name' not in instance.get_deferred_fields():
+        instance._search_name = instance.name
+
+
+@receiver(post_save, sender=RoomType)
+def index_room_type_bookings(sender, instance, created, **kwargs):
+    if not created and getattr(instance, '_search_name', None) != instance.name:
+        search.index_bookings(Booking.objects.filter(room__room_type=instance).values_list('id', flat=True))
+    instance._search_name = instance.name
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, **kwargs):
+    search.index_users([instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    search.remove_documents(search.USER, [instance.pk])
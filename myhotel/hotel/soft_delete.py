@@ -1,13 +1,78 @@
+"""
+Soft deletion.
+
+SoftDeleteModel rows are flagged is_deleted instead of being removed. The
+default manager, objects, hides them, and Django builds every reverse
+related manager (booking.guest_set, room_type.amenities, ...) from a
+model's default manager, so those and their plain prefetch_related() calls
+hide them too. What the managers cannot see are joins: rows reached through
+a foreign key in a filter, select_related() or a link table that is not
+itself soft-deletable. alive(), alive_q() and alive_prefetch() express those
+conditions in the same query, so excluding deleted rows never costs an
+extra round trip.
+
+Forward foreign key access (guest.booking, booking.room) is left to the
+unfiltered base manager on purpose. Django also uses the base manager to
+save, refresh and delete rows, so a filtering one would make a deleted
+row impossible to restore or even save. Code that must not follow a link
+to a deleted row checks is_deleted, or filters with alive_q() on the
+relation.
+"""
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
 
 
-class SoftDeleteManager(models.Manager):
+def alive_q(relation=None):
+    """
+    Q for rows that are not soft deleted, or whose row at the end of the
+    relation (e.g. 'booking' or 'room__room_type') is not
+    """
+    return models.Q(**{f'{relation}__is_deleted' if relation else 'is_deleted': False})
+
+
+def alive(queryset, *relations):
+    """
+    The queryset without soft-deleted rows, and without rows whose related
+    rows along the given relations are soft deleted; works for any model
+    """
+    conditions = [alive_q(relation) for relation in relations]
+    if issubclass(queryset.model, SoftDeleteModel):
+        conditions.insert(0, alive_q())
+    return queryset.filter(*conditions)
+
+
+def alive_prefetch(lookup, queryset=None, relations=(), to_attr=None):
+    """
+    Prefetch for lookup that leaves out soft-deleted rows. Without a queryset
+    the related manager already does; a queryset is filtered with alive(),
+    which also covers link tables through relations, e.g.
+    alive_prefetch('stays', GuestStay.objects.all(), relations=['booking'])
+    """
+    if queryset is not None:
+        queryset = alive(queryset, *relations)
+    return models.Prefetch(lookup, queryset=queryset, to_attr=to_attr)
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """QuerySet of a SoftDeleteModel"""
+
+    def alive(self, *relations):
+        """Rows that are not soft deleted, nor are their rows along the given relations"""
+        return alive(self, *relations)
+
+    def dead(self):
+        """Soft-deleted rows"""
+        return self.filter(is_deleted=True)
+    # Not offered on managers: objects has already filtered these rows out
+    dead.queryset_only = True
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
     """Manager that excludes soft-deleted objects by default"""
     
     def get_queryset(self):
-        return super().get_queryset().filter(is_deleted=False)
+        return super().get_queryset().alive()
     
     def with_deleted(self):
         """Include soft-deleted objects"""
@@ -15,7 +80,7 @@ class SoftDeleteManager(models.Manager):
     
     def deleted_only(self):
         """Only soft-deleted objects"""
-        return super().get_queryset().filter(is_deleted=True)
+        return super().get_queryset().dead()
 
 
 class SoftDeleteModel(models.Model):
@@ -32,7 +97,7 @@ class SoftDeleteModel(models.Model):
     )
     
     objects = SoftDeleteManager()
-    all_objects = models.Manager()  # Access to all objects including deleted
+    all_objects = SoftDeleteQuerySet.as_manager()  # Access to all objects including deleted
     
     class Meta:
         abstract = True
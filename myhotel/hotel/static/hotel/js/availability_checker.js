@@ -175,6 +175,59 @@ document.addEventListener('DOMContentLoaded', function () {
         };
     };
 
+    // Fetch free rooms and prices for every room type in a single request
+    window.fetchAvailabilityMatrix = async function (checkin, checkout, rooms) {
+        const params = new URLSearchParams({ checkin, checkout, rooms: rooms || 1 });
+        try {
+            const response = await fetch(`${window.availabilityMatrixUrl}?${params}`, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' }
+            });
+            return await response.json();
+        } catch (error) {
+            console.error('Availability matrix request failed:', error);
+            return { errors: ['Error checking availability. Please try again.'], success: false };
+        }
+    };
+
+    // Show each room card how many rooms are left for the searched dates
+    function updateRoomCards(roomTypes) {
+        roomTypes.forEach(roomType => {
+            const badge = document.querySelector(`.room-card[data-room-type-id="${roomType.id}"] .room-availability`);
+            if (!badge) return;
+            badge.textContent = roomType.available_rooms > 0
+                ? `${roomType.available_rooms} room(s) left for your dates`
+                : 'Sold out for your dates';
+            badge.classList.toggle('text-success', roomType.available_rooms > 0);
+            badge.classList.toggle('text-danger', roomType.available_rooms === 0);
+        });
+    }
+
+    // The selected room type's answer, in the shape check_availability_ajax returns
+    async function availabilityFromMatrix(checkin, checkout, roomTypeId, rooms) {
+        if (!checkin || !checkout || !roomTypeId || !rooms) {
+            return { errors: ['All fields (check-in, check-out, room type, number of rooms) are required.'] };
+        }
+        const data = await window.fetchAvailabilityMatrix(checkin, checkout, rooms);
+        if (data.errors && data.errors.length > 0) {
+            return data;
+        }
+        updateRoomCards(data.room_types);
+
+        const roomType = data.room_types.find(type => String(type.id) === String(roomTypeId));
+        if (!roomType) {
+            return { errors: ['Selected room type does not exist.'] };
+        }
+        if (roomType.available_rooms >= rooms) {
+            return { availability_message: 'Room available' };
+        }
+        if (roomType.available_rooms > 0) {
+            return {
+                availability_message: `Only ${roomType.available_rooms} room(s) available for the selected type and dates.`
+            };
+        }
+        return { errors: ['No rooms available for the selected type and dates.'] };
+    }
+
     // Handle form submission via AJAX
     form.addEventListener('submit', async function (event) {
         event.preventDefault();
@@ -185,14 +238,13 @@ document.addEventListener('DOMContentLoaded', function () {
         feedbackDiv.innerHTML = '<div class="text-center"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Loading...</span></div></div>';
 
         const formData = new FormData(form);
-        console.log("Submitting availability check with data:", Object.fromEntries(formData));
-
-        const data = await window.checkRoomAvailability(
+        const requestedRooms = parseInt(formData.get('rooms') || 1);
+        // One request answers for the selected room type and every room card
+        const data = await availabilityFromMatrix(
             formData.get('checkin'),
             formData.get('checkout'),
             formData.get('room_type'),
-            formData.get('rooms'),
-            formData.get('guests')
+            requestedRooms
         );
 
         feedbackDiv.innerHTML = '';
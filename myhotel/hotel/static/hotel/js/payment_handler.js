@@ -23,6 +23,41 @@ document.addEventListener('DOMContentLoaded', function () {
         return cookieValue;
     }
 
+    // Hold the rooms for this payment so they cannot be sold while the guest pays
+    async function placeRoomHold(formData, reference, csrfToken) {
+        const holdData = new FormData();
+        holdData.append('checkin', formData.get('modalCheckin'));
+        holdData.append('checkout', formData.get('modalCheckout'));
+        holdData.append('roomType', formData.get('roomType'));
+        holdData.append('rooms', formData.get('modalRooms'));
+        holdData.append('reference', reference);
+
+        const holdResponse = await fetch('/hotel/place-hold', {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': csrfToken,
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            body: holdData
+        });
+        const holdResult = await holdResponse.json();
+        if (!holdResponse.ok || !holdResult.success) {
+            throw new Error(holdResult.errors || 'The selected rooms are no longer available');
+        }
+        formData.set('hold_reference', reference);
+    }
+
+    // Give the rooms back when the guest abandons the payment
+    function releaseRoomHold(reference) {
+        const releaseData = new FormData();
+        releaseData.append('reference', reference);
+        fetch('/hotel/release-hold', {
+            method: 'POST',
+            headers: { 'X-CSRFToken': getCSRFToken(), 'X-Requested-With': 'XMLHttpRequest' },
+            body: releaseData
+        }).catch(error => console.error('Error releasing room hold:', error));
+    }
+
     // Enhanced fetch with retry mechanism
     async function fetchWithRetry(url, options, maxRetries = 3) {
         let lastError = null;
@@ -221,6 +256,8 @@ document.addEventListener('DOMContentLoaded', function () {
                     throw new Error(storeData.errors || 'Failed to prepare payment');
                 }
 
+                await placeRoomHold(formData, reference, csrfToken);
+
                 console.log('Initiating payment with:', { totalCost, email, phone, reference });
 
                 // Use modern Paystack API
@@ -260,6 +297,7 @@ document.addEventListener('DOMContentLoaded', function () {
                             },
                             onClose: function() {
                                 console.log('Payment modal closed');
+                                releaseRoomHold(reference);
                                 confirmationModal.hide();
                                 paymentResultModal.show();
                                 feedbackDiv.innerHTML = `<div class="alert alert-warning" role="alert">Payment was not completed. Please try again.</div>`;
@@ -303,6 +341,7 @@ document.addEventListener('DOMContentLoaded', function () {
                             },
                             onCancel: function() {
                                 console.log('Payment modal closed');
+                                releaseRoomHold(reference);
                                 confirmationModal.hide();
                                 paymentResultModal.show();
                                 feedbackDiv.innerHTML = `<div class="alert alert-warning" role="alert">Payment was not completed. Please try again.</div>`;
@@ -455,9 +494,9 @@ async function handlePaymentSuccess(verifyReference, formData, confirmationModal
         if (verifyData.status === 'success') {
             console.log('Payment verified successfully, submitting booking...');
             
-            // Add payment verification data to form
-            formData.append('transaction_id', verifyData.transaction_id || verifyReference);
-            formData.append('payment_status', 'success');
+            // The server looks the payment up by its Paystack reference; bookings
+            // keep it so webhook events can find them
+            formData.set('reference', verifyReference);
             
             // Submit booking with retry mechanism
             const bookingResponse = await fetchWithRetry('/hotel/submit-booking', {
@@ -492,7 +531,7 @@ async function handlePaymentSuccess(verifyReference, formData, confirmationModal
                 document.getElementById('retryBookingBtn').style.display = 'none';
                 
                 // Populate booking details
-                document.getElementById('resultBookingId').textContent = bookingData.booking_id || 'N/A';
+                document.getElementById('resultBookingId').textContent = (bookingData.booking_ids || [bookingData.booking_id]).filter(Boolean).join(', ') || 'N/A';
                 document.getElementById('resultGuestName').textContent = `${firstName} ${lastName}`;
                 document.getElementById('resultEmail').textContent = email;
                 document.getElementById('resultPhone').textContent = phone;
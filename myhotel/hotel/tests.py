@@ -1,3 +1,995 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+from io import StringIO
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.core.management import call_command
+from django.utils import timezone
+from .models import RoomType, Room, Booking, RoomInventory, BookingDailyRollup, Hotel, HotelAmenity, RoomAmenity, Guest, RoomHold, PaymentEvent, PaymentVerification, SearchDocument, GuestStay
+from .availability import count_available_rooms, find_available_rooms, availability_matrix
+from .inventory import free_rooms, rebuild_inventory, check_inventory
+from .occupancy import OccupancyIndex
+from .rollups import rebuild_rollups, check_rollups
+from .hotel_settings import get_hotel
+from .contact import normalize_phone
+from .guests import find_guest
+from .forms import GuestForm
+from .booking_service import create_booking, create_bookings, place_hold, release_hold
+from .holds import held_rooms
+from .fake_paystack import FakePaystackServer
+from .payment_events import process_pending
+from . import search
+from . import paystack
+from .room_availability import RoomAvailabilityChecker
+from .soft_delete import alive, alive_prefetch, alive_q
 
-# Create your tests here.
+
+class AvailabilityEngineTests(TestCase):
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe',
+            description='Deluxe room',
+            base_price=Decimal('10000.00'),
+            capacity=2
+        )
+        self.rooms = [
+            Room.objects.create(room_type=self.room_type, room_number=f'10{i}')
+            for i in range(4)
+        ]
+        self.checkin = date.today() + timedelta(days=10)
+        self.checkout = self.checkin + timedelta(days=3)
+
+    def book(self, room, checkin, checkout, status='confirmed'):
+        return Booking.objects.create(
+            room=room, checkin=checkin, checkout=checkout,
+            guests=1, total_price=0, status=status
+        )
+
+    def test_all_rooms_free(self):
+        """Test that every bookable room is counted when nothing overlaps"""
+        self.assertEqual(count_available_rooms(self.room_type, self.checkin, self.checkout), 4)
+
+    def test_overlapping_bookings_block_rooms(self):
+        """Test that confirmed and pending overlaps block, cancelled ones do not"""
+        self.book(self.rooms[0], self.checkin - timedelta(days=1), self.checkin + timedelta(days=1))
+        self.book(self.rooms[1], self.checkout - timedelta(days=1), self.checkout + timedelta(days=2), 'pending')
+        self.book(self.rooms[2], self.checkin, self.checkout, 'cancelled')
+        self.assertEqual(count_available_rooms(self.room_type, self.checkin, self.checkout), 2)
+
+    def test_back_to_back_stays_do_not_overlap(self):
+        """Test that a checkout on the checkin day leaves the room free"""
+        self.book(self.rooms[0], self.checkin - timedelta(days=2), self.checkin)
+        self.book(self.rooms[1], self.checkout, self.checkout + timedelta(days=2))
+        self.assertEqual(count_available_rooms(self.room_type, self.checkin, self.checkout), 4)
+
+    def test_unavailable_rooms_excluded(self):
+        """Test that rooms flagged unavailable are never offered"""
+        self.rooms[3].is_available = False
+        self.rooms[3].save()
+        self.assertNotIn(self.rooms[3], find_available_rooms(self.room_type, self.checkin, self.checkout))
+
+    def test_exclude_booking(self):
+        """Test that a booking being edited does not block its own room"""
+        booking = self.book(self.rooms[0], self.checkin, self.checkout)
+        rooms = find_available_rooms(self.room_type, self.checkin, self.checkout, exclude_booking_id=booking.id)
+        self.assertIn(self.rooms[0], rooms)
+
+    def test_single_query(self):
+        """Test that the count is answered with one query regardless of room count"""
+        with self.assertNumQueries(1):
+            count_available_rooms(self.room_type, self.checkin, self.checkout)
+
+
+class AvailabilityMatrixTests(TestCase):
+    def setUp(self):
+        self.deluxe = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        self.suite = RoomType.objects.create(
+            name='Suite', description='Suite', base_price=Decimal('25000.00'), capacity=4
+        )
+        deluxe_rooms = [Room.objects.create(room_type=self.deluxe, room_number=f'D{i}') for i in range(3)]
+        Room.objects.create(room_type=self.suite, room_number='S1')
+        self.checkin = date.today() + timedelta(days=5)
+        self.checkout = self.checkin + timedelta(days=2)
+        Booking.objects.create(
+            room=deluxe_rooms[0], checkin=self.checkin, checkout=self.checkout,
+            guests=1, total_price=0, status='confirmed'
+        )
+
+    def test_matrix_counts_every_room_type(self):
+        """Test that two queries return free counts and prices for all room types"""
+        with self.assertNumQueries(2):
+            matrix = {row['id']: row for row in availability_matrix(self.checkin, self.checkout)}
+        self.assertEqual(matrix[self.deluxe.id]['available_rooms'], 2)
+        self.assertEqual(matrix[self.suite.id]['available_rooms'], 1)
+        self.assertEqual(matrix[self.suite.id]['stay_price'], Decimal('50000.00'))
+
+    def test_matrix_endpoint(self):
+        """Test the JSON endpoint prices the requested rooms per type"""
+        response = self.client.get(reverse('availability_matrix_ajax'), {
+            'checkin': str(self.checkin), 'checkout': str(self.checkout), 'rooms': 2
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['success'])
+        deluxe = next(row for row in data['room_types'] if row['id'] == self.deluxe.id)
+        self.assertEqual(deluxe['total_cost'], '₦40000.00')
+
+    def test_matrix_endpoint_rejects_bad_dates(self):
+        """Test that an inverted stay is rejected"""
+        response = self.client.get(reverse('availability_matrix_ajax'), {
+            'checkin': str(self.checkout), 'checkout': str(self.checkin)
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class InventoryCalendarTests(TestCase):
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        self.rooms = [Room.objects.create(room_type=self.room_type, room_number=f'10{i}') for i in range(3)]
+        self.checkin = date.today() + timedelta(days=3)
+        self.checkout = self.checkin + timedelta(days=2)
+
+    def book(self, room, status='confirmed'):
+        return Booking.objects.create(
+            room=room, checkin=self.checkin, checkout=self.checkout,
+            guests=1, total_price=0, status=status
+        )
+
+    def night(self):
+        return RoomInventory.objects.get(room_type=self.room_type, date=self.checkin)
+
+    def test_booking_save_updates_nights(self):
+        """Test that a new booking is counted on each night of the stay"""
+        self.book(self.rooms[0])
+        self.book(self.rooms[1], status='pending')
+        self.assertEqual(RoomInventory.objects.filter(room_type=self.room_type).count(), 2)
+        self.assertEqual((self.night().capacity, self.night().sold, self.night().held), (3, 1, 1))
+        self.assertEqual(free_rooms(self.room_type, self.checkin, self.checkout), 1)
+
+    def test_status_change_soft_delete_and_restore(self):
+        """Test that status changes, soft delete and restore move the counts"""
+        booking = self.book(self.rooms[0], status='pending')
+        booking.status = 'confirmed'
+        booking.save()
+        self.assertEqual((self.night().sold, self.night().held), (1, 0))
+        booking.soft_delete()
+        self.assertEqual((self.night().sold, self.night().held), (0, 0))
+        Booking.all_objects.get(pk=booking.pk).restore()
+        self.assertEqual((self.night().sold, self.night().held), (1, 0))
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.night().sold, 0)
+
+    def test_room_changes_update_capacity(self):
+        """Test that taking a room out of service lowers future capacity"""
+        self.book(self.rooms[0])
+        self.rooms[2].is_available = False
+        self.rooms[2].save()
+        self.assertEqual(self.night().capacity, 2)
+        self.assertEqual(free_rooms(self.room_type, self.checkin, self.checkout), 1)
+
+    def test_bookings_on_rooms_out_of_service(self):
+        """Test that a disabled or deleted room's bookings are not subtracted twice"""
+        self.book(self.rooms[0])
+        self.book(self.rooms[2])
+        self.rooms[2].is_available = False
+        self.rooms[2].save()
+
+        def checker_rooms():
+            return (free_rooms(self.room_type, self.checkin, self.checkout)
+                    - held_rooms(self.room_type, self.checkin, self.checkout))
+
+        self.assertEqual((self.night().capacity, self.night().sold), (2, 1))
+        self.assertEqual(checker_rooms(), 1)
+        self.assertEqual(checker_rooms(), find_available_rooms(self.room_type, self.checkin, self.checkout).count())
+        self.assertEqual(check_inventory(), [])
+
+        # Bookings on the disabled room can change without touching the counts
+        booking = Booking.objects.get(room=self.rooms[2])
+        booking.status = 'pending'
+        booking.save()
+        self.assertEqual((self.night().sold, self.night().held), (1, 0))
+
+        self.rooms[2].is_available = True
+        self.rooms[2].save()
+        self.assertEqual((self.night().capacity, self.night().sold, self.night().held), (3, 1, 1))
+        self.rooms[2].soft_delete()
+        self.assertEqual((self.night().capacity, self.night().held), (2, 0))
+        self.assertEqual(checker_rooms(), find_available_rooms(self.room_type, self.checkin, self.checkout).count())
+        self.assertEqual(check_inventory(), [])
+
+    def test_checker_needs_one_room_for_the_whole_stay(self):
+        """Test that a different free room each night is not reported as available"""
+        self.rooms[2].is_available = False
+        self.rooms[2].save()
+        middle = self.checkin + timedelta(days=1)
+        Booking.objects.create(room=self.rooms[0], checkin=self.checkin, checkout=middle,
+                               guests=1, total_price=0, status='confirmed')
+        Booking.objects.create(room=self.rooms[1], checkin=middle, checkout=self.checkout,
+                               guests=1, total_price=0, status='confirmed')
+        self.assertEqual(free_rooms(self.room_type, self.checkin, self.checkout), 1)
+        self.assertEqual(count_available_rooms(self.room_type, self.checkin, self.checkout), 0)
+
+        result = RoomAvailabilityChecker().check_availability(
+            self.checkin.isoformat(), self.checkout.isoformat(), self.room_type.id, 1, 1
+        )
+        self.assertIn('No rooms available for the selected type and dates.', result['errors'])
+
+    def test_free_rooms_without_rows(self):
+        """Test that nights with no inventory rows fall back to capacity"""
+        self.assertEqual(free_rooms(self.room_type, self.checkin, self.checkout), 3)
+
+    def test_rebuild_and_check(self):
+        """Test that drift is detected and repaired by a rebuild"""
+        self.book(self.rooms[0])
+        self.assertEqual(check_inventory(), [])
+        RoomInventory.objects.update(sold=5)
+        self.assertEqual(len(check_inventory()), 2)
+        rebuild_inventory()
+        self.assertEqual(check_inventory(), [])
+        self.assertEqual(self.night().sold, 1)
+
+
+class BookingRollupTests(TestCase):
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        self.rooms = [Room.objects.create(room_type=self.room_type, room_number=f'10{i}') for i in range(2)]
+        self.checkin = date.today() + timedelta(days=3)
+
+    def book(self, status='confirmed', nights=2, price='20000.00', room=0):
+        return Booking.objects.create(
+            room=self.rooms[room], checkin=self.checkin, checkout=self.checkin + timedelta(days=nights),
+            guests=1, total_price=Decimal(price), status=status
+        )
+
+    def totals(self, status):
+        row = BookingDailyRollup.objects.get(room_type=self.room_type, status=status)
+        return row.count, row.revenue, row.nights
+
+    def test_booking_writes_update_rollup(self):
+        """Test that new bookings add count, revenue and nights to today's row"""
+        self.book()
+        self.book(nights=3, price='30000.00', room=1)
+        self.assertEqual(BookingDailyRollup.objects.count(), 1)
+        self.assertEqual(self.totals('confirmed'), (2, Decimal('50000.00'), 5))
+
+    def test_status_change_and_deletes(self):
+        """Test that status changes, soft and hard deletes move the booking between rows"""
+        booking = self.book(status='pending')
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.totals('pending'), (0, Decimal('0.00'), 0))
+        self.assertEqual(self.totals('cancelled'), (1, Decimal('20000.00'), 2))
+        booking.soft_delete()
+        self.assertEqual(self.totals('cancelled')[0], 0)
+        Booking.all_objects.get(pk=booking.pk).restore()
+        self.assertEqual(self.totals('cancelled')[0], 1)
+        Booking.objects.get(pk=booking.pk).hard_delete()
+        self.assertEqual(self.totals('cancelled')[0], 0)
+        self.assertEqual(check_rollups(), [])
+
+    def test_rebuild_and_check(self):
+        """Test that drift is detected and repaired by a rebuild"""
+        self.book()
+        self.assertEqual(check_rollups(), [])
+        BookingDailyRollup.objects.update(count=7)
+        self.assertEqual(len(check_rollups()), 1)
+        rebuild_rollups()
+        self.assertEqual(check_rollups(), [])
+        self.assertEqual(self.totals('confirmed'), (1, Decimal('20000.00'), 2))
+
+
+class OccupancyIndexOracleTests(SimpleTestCase):
+    """Compare OccupancyIndex with brute-force scans over random bookings"""
+
+    def setUp(self):
+        self.rng = random.Random(7)
+        self.origin = date(2030, 1, 1)
+        self.bookings = []
+        for booking_id in range(400):
+            checkin = self.origin + timedelta(days=self.rng.randint(0, 120))
+            self.bookings.append(SimpleNamespace(
+                id=booking_id,
+                room_id=self.rng.randint(1, 8),
+                checkin=checkin,
+                checkout=checkin + timedelta(days=self.rng.randint(1, 6)),
+            ))
+        self.index = OccupancyIndex(self.bookings)
+
+    def random_stay(self):
+        checkin = self.origin + timedelta(days=self.rng.randint(-5, 130))
+        return checkin, checkin + timedelta(days=self.rng.randint(1, 5))
+
+    def brute_overlapping(self, room_id, checkin, checkout):
+        return sorted(
+            (b for b in self.bookings if b.room_id == room_id and b.checkin < checkout and b.checkout > checkin),
+            key=lambda b: (b.checkin, b.checkout)
+        )
+
+    def brute_busy(self, room_id, day):
+        return any(b.room_id == room_id and b.checkin <= day < b.checkout for b in self.bookings)
+
+    def test_overlap_queries(self):
+        """Test is_free and overlapping against a linear scan"""
+        for _ in range(500):
+            room_id = self.rng.randint(1, 9)
+            checkin, checkout = self.random_stay()
+            expected = self.brute_overlapping(room_id, checkin, checkout)
+            self.assertEqual(self.index.overlapping(room_id, checkin, checkout), expected)
+            self.assertEqual(self.index.is_free(room_id, checkin, checkout), not expected)
+
+    def test_next_occupied(self):
+        """Test next_occupied against a day-by-day walk"""
+        for _ in range(200):
+            room_id = self.rng.randint(1, 9)
+            day = self.origin + timedelta(days=self.rng.randint(-5, 130))
+            expected = None
+            probe = day
+            while probe < self.origin + timedelta(days=140):
+                if self.brute_busy(room_id, probe):
+                    expected = probe
+                    break
+                probe += timedelta(days=1)
+            self.assertEqual(self.index.next_occupied(room_id, day), expected)
+
+    def test_free_slot(self):
+        """Test free_slot returns the earliest run of free nights"""
+        for _ in range(200):
+            room_id = self.rng.randint(1, 9)
+            start = self.origin + timedelta(days=self.rng.randint(-5, 130))
+            nights = self.rng.randint(1, 6)
+            expected = start
+            while not all(not self.brute_busy(room_id, expected + timedelta(days=n)) for n in range(nights)):
+                expected += timedelta(days=1)
+            self.assertEqual(self.index.free_slot(room_id, start, nights), expected)
+
+    def test_next_booking(self):
+        """Test next_booking returns the first arrival after a day"""
+        for _ in range(200):
+            room_id = self.rng.randint(1, 9)
+            day = self.origin + timedelta(days=self.rng.randint(-5, 130))
+            arrivals = sorted(
+                (b for b in self.bookings if b.room_id == room_id and b.checkin > day),
+                key=lambda b: (b.checkin, b.checkout)
+            )
+            self.assertEqual(self.index.next_booking(room_id, day), arrivals[0] if arrivals else None)
+
+
+class HomePageQueryTests(TestCase):
+    def test_home_page_skips_permission_queries(self):
+        """Test that the public home page never loads permissions or roles"""
+        self.client.force_login(User.objects.create_user('staff', 'staff@example.com', 'password'))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        tables = ('hotel_permission', 'hotel_role', 'hotel_userrole')
+        self.assertFalse([query['sql'] for query in captured if any(table in query['sql'] for table in tables)])
+
+
+class HotelSettingsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(
+            name='Grand', address='1 Marina', contact_email='info@grand.ng', contact_phone='0800'
+        )
+
+    def test_hotel_is_cached(self):
+        """Test that the hotel is loaded once and then served without queries"""
+        with self.assertNumQueries(1):
+            self.assertEqual(get_hotel().name, 'Grand')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_hotel().name, 'Grand')
+            self.assertEqual(get_hotel().logo_url, '')
+
+    def test_save_and_soft_delete_invalidate(self):
+        """Test that edits and soft deletes are visible on the next read"""
+        get_hotel()
+        self.hotel.name = 'Grand Lagos'
+        self.hotel.save()
+        self.assertEqual(get_hotel().name, 'Grand Lagos')
+        self.hotel.soft_delete()
+        self.assertIsNone(get_hotel())
+
+    def test_home_page_reads_hotel_from_cache(self):
+        """Test that a warm home page render runs no hotel queries"""
+        self.client.get(reverse('home'))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['hotel'].name, 'Grand')
+        self.assertFalse([query['sql'] for query in captured if 'hotel_hotel"' in query['sql']])
+
+
+class HomePageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        HotelAmenity.objects.create(name='Pool', description='Outdoor pool', icon_name='swimmer')
+
+    def test_conditional_get(self):
+        """Test that an unchanged home page answers 304 and a catalogue edit changes the ETag"""
+        self.client.get(reverse('home'))
+        response = self.client.get(reverse('home'))
+        etag = response['ETag']
+        self.assertEqual(self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        HotelAmenity.objects.create(name='Spa', description='Full spa', icon_name='spa')
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Full spa')
+
+    def test_amenities_fragment_is_cached(self):
+        """Test that a warm render does not query hotel amenities"""
+        self.client.get(reverse('home'))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Outdoor pool')
+        self.assertFalse([query['sql'] for query in captured if 'hotel_hotelamenity' in query['sql']])
+
+
+class RoomCatalogueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.wifi = RoomAmenity.objects.create(name='Wi-Fi')
+        self.minibar = RoomAmenity.objects.create(name='Minibar')
+        for i in range(5):
+            room_type = RoomType.objects.create(
+                name=f'Type {i}', description='Room', base_price=Decimal('10000.00'), capacity=2
+            )
+            room_type.amenities.add(self.wifi, self.minibar)
+        self.minibar.soft_delete()
+
+    def test_catalogue_prefetches_live_amenities(self):
+        """Test that amenities are prefetched in one query without soft-deleted ones"""
+        with self.assertNumQueries(2):
+            amenities = [[amenity.name for amenity in room_type.amenities.all()]
+                         for room_type in RoomType.objects.catalogue()]
+        self.assertEqual(amenities, [['Wi-Fi']] * 5)
+
+    def test_home_page_query_count(self):
+        """Test that the home page query count does not grow with room types"""
+        # Hotel, room types, their amenities and hotel amenities
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Type 4')
+        self.assertNotContains(response, 'Minibar')
+
+
+class GroupBookingTests(TestCase):
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        for i in range(4):
+            Room.objects.create(room_type=self.room_type, room_number=f'10{i}')
+        self.checkin = date.today() + timedelta(days=5)
+        self.checkout = self.checkin + timedelta(days=2)
+        self.guest = {'first_name': 'Ada', 'last_name': 'Obi', 'email': 'ada@example.com', 'phone': '08000000001'}
+
+    def test_books_all_rooms_in_one_transaction(self):
+        """Test that a party gets distinct rooms and the side tables stay consistent"""
+        bookings, guest = create_bookings(self.room_type, self.checkin, self.checkout, 3, self.guest, guests=5)
+        self.assertEqual(len({booking.room_id for booking in bookings}), 3)
+        self.assertEqual([booking.guests for booking in bookings], [2, 2, 1])
+        self.assertEqual(bookings[0].total_price, Decimal('20000.00'))
+        self.assertEqual(Guest.objects.filter(email='ada@example.com').count(), 1)
+        self.assertEqual(set(guest.bookings.values_list('id', flat=True)), {booking.id for booking in bookings})
+        self.assertEqual(RoomInventory.objects.get(room_type=self.room_type, date=self.checkin).sold, 3)
+        self.assertEqual(BookingDailyRollup.objects.get(status='confirmed').count, 3)
+        self.assertEqual(check_inventory(), [])
+        self.assertEqual(check_rollups(), [])
+        self.assertEqual(count_available_rooms(self.room_type, self.checkin, self.checkout), 1)
+
+    def test_not_enough_rooms_books_nothing(self):
+        """Test that a party that does not fit leaves no partial bookings"""
+        with self.assertRaises(ValidationError):
+            create_bookings(self.room_type, self.checkin, self.checkout, 5, self.guest, guests=5)
+        with self.assertRaises(ValidationError):
+            create_bookings(self.room_type, self.checkin, self.checkout, 2, self.guest, guests=5)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(Guest.objects.exists())
+
+
+class RoomHoldTests(TestCase):
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        for i in range(2):
+            Room.objects.create(room_type=self.room_type, room_number=f'10{i}')
+        self.checkin = date.today() + timedelta(days=5)
+        self.checkout = self.checkin + timedelta(days=2)
+        self.guest = {'first_name': 'Ada', 'last_name': 'Obi', 'email': 'ada@example.com', 'phone': '08000000001'}
+
+    def test_hold_is_kept_for_its_owner(self):
+        """Test that held rooms are hidden from other guests but bookable by the holder"""
+        place_hold(self.room_type, self.checkin, self.checkout, 2, 'ref-1')
+
+        matrix = {row['id']: row for row in availability_matrix(self.checkin, self.checkout)}
+        self.assertEqual(matrix[self.room_type.id]['available_rooms'], 0)
+        result = RoomAvailabilityChecker().check_availability(
+            self.checkin.isoformat(), self.checkout.isoformat(), self.room_type.id, 1, 1
+        )
+        self.assertIn('No rooms available for the selected type and dates.', result['errors'])
+        with self.assertRaises(ValidationError):
+            place_hold(self.room_type, self.checkin, self.checkout, 1, 'ref-2')
+        with self.assertRaises(ValidationError):
+            create_bookings(self.room_type, self.checkin, self.checkout, 1, self.guest, guests=1)
+
+        bookings, _ = create_bookings(
+            self.room_type, self.checkin, self.checkout, 2, self.guest, guests=2, hold_reference='ref-1'
+        )
+        self.assertEqual(len(bookings), 2)
+        self.assertFalse(RoomHold.objects.exists())
+
+    def test_released_and_expired_holds_free_rooms(self):
+        """Test that released or expired holds no longer count and are cleaned up"""
+        place_hold(self.room_type, self.checkin, self.checkout, 1, 'ref-1')
+        place_hold(self.room_type, self.checkin, self.checkout, 1, 'ref-2')
+        self.assertEqual(held_rooms(self.room_type, self.checkin, self.checkout), 2)
+
+        release_hold('ref-1')
+        RoomHold.objects.filter(reference='ref-2').update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(held_rooms(self.room_type, self.checkin, self.checkout), 0)
+
+        call_command('expire_room_holds', stdout=StringIO())
+        self.assertFalse(RoomHold.objects.exists())
+
+    def test_place_hold_endpoint(self):
+        """Test that the hold endpoint refuses rooms that are already held"""
+        data = {
+            'checkin': self.checkin.isoformat(), 'checkout': self.checkout.isoformat(),
+            'roomType': self.room_type.id, 'rooms': 2, 'reference': 'ref-1'
+        }
+        self.assertEqual(self.client.post(reverse('place_room_hold'), data).status_code, 200)
+        response = self.client.post(reverse('place_room_hold'), dict(data, reference='ref-2'))
+        self.assertEqual(response.status_code, 409)
+        self.client.post(reverse('release_room_hold'), {'reference': 'ref-1'})
+        self.assertFalse(RoomHold.objects.exists())
+
+
+class PaymentVerificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.server = FakePaystackServer().start()
+        self.addCleanup(self.server.stop)
+        self.server.add_transaction('ref-1', amount=2000000)
+        settings_override = override_settings(PAYSTACK_BASE_URL=self.server.url, PAYSTACK_SECRET_KEY='sk')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def verify(self, reference):
+        return self.client.post(reverse('verify_payment'), {'reference': reference}, content_type='application/json')
+
+    def test_verifies_against_provider(self):
+        """Test that a paid reference is verified and an unknown one is rejected"""
+        self.client.post(reverse('store_expected_amount'), {'amount': '20000'})
+        response = self.verify('ref-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['payment_status'], 'success')
+        self.assertEqual(self.verify('unknown').status_code, 400)
+        self.assertIs(paystack.get_session(), paystack.get_session())
+
+    def test_repeated_verifications_reuse_the_first_answer(self):
+        """Test that Paystack is asked once per reference, for successes and failures"""
+        self.client.post(reverse('store_expected_amount'), {'amount': '20000'})
+        for _ in range(3):
+            self.assertEqual(self.verify('ref-1').status_code, 200)
+            self.assertEqual(self.verify('unknown').status_code, 400)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(PaymentVerification.objects.get().amount, Decimal('20000.00'))
+
+    def test_booking_requires_a_verified_reference(self):
+        """Test that bookings need a stored verification and resubmitting returns the same bookings"""
+        room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        Room.objects.create(room_type=room_type, room_number='101')
+        Room.objects.create(room_type=room_type, room_number='102')
+        checkin = date.today() + timedelta(days=5)
+        data = {
+            'modalCheckin': checkin.isoformat(), 'modalCheckout': (checkin + timedelta(days=2)).isoformat(),
+            'roomType': room_type.id, 'modalGuests': 1, 'modalRooms': 1,
+            'first_name': 'Ada', 'last_name': 'Obi', 'email': 'ada@example.com', 'phone': '08000000001',
+            'reference': 'ref-1', 'payment_status': 'success', 'transaction_id': '1',
+        }
+        self.client.post(reverse('store_expected_amount'), {'amount': '20000'})
+        self.assertEqual(self.client.post(reverse('submit_booking'), data).status_code, 400)
+
+        self.verify('ref-1')
+        # The payment covers one room for two nights, whatever the browser claims
+        for overrides in ({'modalRooms': 2}, {'modalCheckout': (checkin + timedelta(days=4)).isoformat()}):
+            response = self.client.post(reverse('submit_booking'), {**data, **overrides})
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+
+        first = self.client.post(reverse('submit_booking'), data).json()
+        second = self.client.post(reverse('submit_booking'), data).json()
+        self.assertTrue(first['success'])
+        self.assertEqual(first['booking_ids'], second['booking_ids'])
+        self.assertEqual(Booking.objects.get().payment_reference, 'ref-1')
+        self.assertEqual(self.server.requests, 1)
+
+    def test_slow_provider_times_out_quickly(self):
+        """Test that a slow provider costs one read timeout and no retries"""
+        self.server.delay = 1
+        with override_settings(PAYSTACK_READ_TIMEOUT=0.2):
+            started = time.monotonic()
+            response = self.verify('ref-1')
+        self.assertEqual(response.status_code, 504)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.server.requests, 1)
+
+
+@override_settings(PAYSTACK_SECRET_KEY='sk')
+class PaymentWebhookTests(TestCase):
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        Room.objects.create(room_type=self.room_type, room_number='101')
+        self.checkin = date.today() + timedelta(days=5)
+        self.checkout = self.checkin + timedelta(days=2)
+        self.bookings, _ = create_bookings(
+            self.room_type, self.checkin, self.checkout, 1,
+            {'first_name': 'Ada', 'last_name': 'Obi', 'email': 'ada@example.com', 'phone': '08000000001'},
+            guests=1, status='pending', payment_reference='ref-1'
+        )
+
+    def send(self, event, reference='ref-1', secret='sk'):
+        body = json.dumps({'event': event, 'data': {'reference': reference, 'status': 'success'}}).encode()
+        signature = hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+        return self.client.post(
+            reverse('webhook'), body, content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=signature
+        )
+
+    def test_events_are_stored_once_and_acknowledged(self):
+        """Test that retried events are acknowledged without new rows or booking changes"""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.send('charge.success').status_code, 200)
+        self.assertEqual(self.send('charge.success').status_code, 200)
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+        self.assertEqual(Booking.objects.get().status, 'pending')
+
+    def test_unsigned_events_are_rejected(self):
+        """Test that an event signed with another key is not stored"""
+        self.assertEqual(self.send('charge.success', secret='other').status_code, 401)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_worker_records_success_and_cancels_bookings(self):
+        """Test that success events are only recorded and refunds free the paid rooms"""
+        self.send('charge.success')
+        self.assertEqual(process_pending(), 1)
+        self.assertEqual(Booking.objects.get().status, 'pending')
+        self.assertIsNotNone(PaymentEvent.objects.get(event='charge.success').processed_at)
+        self.assertEqual(process_pending(), 0)
+
+        self.send('refund.processed')
+        process_pending()
+        self.assertEqual(Booking.objects.get().status, 'cancelled')
+        self.assertEqual(count_available_rooms(self.room_type, self.checkin, self.checkout), 1)
+        self.assertEqual(check_inventory(), [])
+        self.assertEqual(check_rollups(), [])
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        for i in range(3):
+            Room.objects.create(room_type=self.room_type, room_number=f'10{i}')
+        self.checkin = date.today() + timedelta(days=5)
+        self.checkout = self.checkin + timedelta(days=2)
+
+    def book(self, first_name, last_name, email):
+        bookings, _ = create_bookings(
+            self.room_type, self.checkin, self.checkout, 1,
+            {'first_name': first_name, 'last_name': last_name, 'email': email, 'phone': email},
+            guests=1
+        )
+        return bookings[0]
+
+    def found(self, query):
+        return search.search_ids(search.BOOKING, query, limit=10)
+
+    def test_ranks_word_matches_first(self):
+        """Test that every term must match and whole words outrank prefixes and substrings"""
+        ada = self.book('Ada', 'Obi', 'ada@example.com')
+        adaeze = self.book('Adaeze', 'Okafor', 'adaeze@example.com')
+        nkada = self.book('Nkada', 'Obi', 'nkada@example.com')
+        self.assertEqual(self.found('ada'), [ada.id, adaeze.id, nkada.id])
+        self.assertEqual(self.found('ada obi'), [ada.id, nkada.id])
+        self.assertEqual(self.found('deluxe 101'), [adaeze.id])
+        self.assertEqual(self.found('   '), [])
+
+    def test_documents_follow_changes(self):
+        """Test that signals keep documents in step with bookings, guests, rooms and room types"""
+        booking = self.book('Ada', 'Obi', 'ada@example.com')
+        self.room_type.name = 'Executive'
+        self.room_type.save()
+        self.assertEqual(self.found('executive'), [booking.id])
+
+        guest = Guest.objects.get(booking=booking)
+        guest.last_name = 'Okafor'
+        guest.save()
+        self.assertEqual(self.found('okafor'), [booking.id])
+        self.assertEqual(self.found('obi'), [])
+
+        booking.soft_delete()
+        self.assertEqual(self.found('okafor'), [])
+        booking.restore()
+        stored = set(SearchDocument.objects.values_list('kind', 'object_id', 'text'))
+        search.rebuild_search_index()
+        self.assertEqual(set(SearchDocument.objects.values_list('kind', 'object_id', 'text')), stored)
+
+    def test_admin_views_use_the_index(self):
+        """Test that the booking list and user search answer from the documents"""
+        booking = self.book('Ada', 'Obi', 'ada@example.com')
+        admin = User.objects.create_superuser('ngozi', 'ngozi@example.com', 'password', first_name='Ngozi')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin_panel:admin_bookings'), {'search': 'ada'})
+        self.assertEqual([b.id for b in response.context['bookings']], [booking.id])
+        response = self.client.get(reverse('admin_panel:user_manager_search_ajax'), {'q': 'ngo'})
+        self.assertEqual([user['username'] for user in response.json()['users']], ['ngozi'])
+
+
+class GuestLookupTests(TestCase):
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        for i in range(3):
+            Room.objects.create(room_type=self.room_type, room_number=f'10{i}')
+        self.checkin = date.today() + timedelta(days=5)
+        self.checkout = self.checkin + timedelta(days=2)
+
+    def test_normalized_keys(self):
+        """Test that differently written emails and Nigerian numbers share one key"""
+        for phone in ('+234 803 123 4567', '2348031234567', '0803-123-4567', '803 123 4567', '00234 8031234567'):
+            self.assertEqual(normalize_phone(phone), '08031234567')
+        guest = Guest.objects.create(first_name='Ada', last_name='Obi', email=' Ada@Example.com', phone='+234 803 123 4567')
+        self.assertEqual((guest.email_key, guest.phone_key), ('ada@example.com', '08031234567'))
+        self.assertEqual(find_guest('ADA@example.com', ''), guest)
+        self.assertEqual(find_guest('other@example.com', '08031234567'), guest)
+        self.assertIsNone(find_guest('other@example.com', '08039999999'))
+
+    def test_booking_and_form_share_the_lookup(self):
+        """Test that checkout reuses a guest typed differently and the guest form rejects it"""
+        guest = Guest.objects.create(first_name='Ada', last_name='Obi', email='ada@example.com', phone='08031234567')
+        form = GuestForm(instance=guest, data={'first_name': 'Ada', 'last_name': 'Obi', 'email': 'ada@example.com', 'phone': '08031234567'})
+        self.assertTrue(form.is_valid())
+        bookings, booked_guest = create_bookings(
+            self.room_type, self.checkin, self.checkout, 2,
+            {'first_name': 'Ada', 'last_name': 'Obi', 'email': 'ADA@example.com', 'phone': '+2348031234567'},
+            guests=2
+        )
+        self.assertEqual(booked_guest.id, guest.id)
+        self.assertEqual(bookings[1].registered_guests.get(), guest)
+
+        form = GuestForm(data={'first_name': 'A', 'last_name': 'O', 'email': 'Ada@Example.com', 'phone': '0803 123 4567'})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(set(form.errors), {'email', 'phone'})
+
+    def test_returning_guest_keeps_history(self):
+        """Test that a second booking adds a stay instead of moving the guest"""
+        details = {'first_name': 'Ada', 'last_name': 'Obi', 'email': 'ada@example.com', 'phone': '08031234567'}
+        first, guest = create_booking(self.room_type, self.checkin, self.checkout, details, guests=1)
+        second, returning = create_booking(
+            self.room_type, self.checkout, self.checkout + timedelta(days=1), details, guests=1
+        )
+        self.assertEqual(returning, guest)
+        self.assertEqual(list(guest.stays.order_by('id').values_list('booking_id', flat=True)), [first.id, second.id])
+        self.assertEqual(list(first.registered_guests.all()), [guest])
+        self.assertEqual(search.search_ids(search.BOOKING, 'obi', limit=10), [second.id, first.id])
+
+    def test_dedupe_guests(self):
+        """Test that duplicates are merged into the oldest record with the newest details and every stay"""
+        first, oldest = create_booking(
+            self.room_type, self.checkin, self.checkout,
+            {'first_name': 'Ada', 'last_name': 'Obi', 'email': 'ada@example.com', 'phone': '08031234567'}, guests=1
+        )
+        second, bola = create_booking(
+            self.room_type, self.checkin, self.checkout,
+            {'first_name': 'Bola', 'last_name': 'Ade', 'email': 'bola@example.com', 'phone': '08020000000'}, guests=1
+        )
+        duplicate = Guest.objects.create(booking=second, first_name='Ada', last_name='Obi', email='ADA@example.com', phone='0803 123 4567')
+        GuestStay.objects.create(guest=duplicate, booking=second)
+        by_phone = Guest.objects.create(first_name='Ada', last_name='Okafor', email='ada@work.com', phone='+2348031234567')
+
+        call_command('dedupe_guests', '--dry-run', stdout=StringIO())
+        self.assertEqual(Guest.objects.count(), 4)
+
+        call_command('dedupe_guests', '--batch-size', '1', stdout=StringIO())
+        self.assertEqual(set(Guest.objects.all()), {oldest, bola})
+        oldest.refresh_from_db()
+        self.assertEqual((oldest.last_name, oldest.email, oldest.booking_id), ('Okafor', by_phone.email, second.id))
+        self.assertEqual(set(oldest.stays.values_list('booking_id', flat=True)), {first.id, second.id})
+        self.assertEqual(search.search_ids(search.BOOKING, 'okafor', limit=10), [second.id, first.id])
+
+
+class SoftDeleteQueryTests(TestCase):
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        self.rooms = [Room.objects.create(room_type=self.room_type, room_number=f'10{i}') for i in range(2)]
+        checkin = date.today() + timedelta(days=5)
+        details = {'first_name': 'Ada', 'last_name': 'Obi', 'email': 'ada@example.com', 'phone': '08031234567'}
+        self.bookings, self.guest = create_bookings(self.room_type, checkin, checkin + timedelta(days=2), 2, details, guests=2)
+
+    def test_alive_and_dead(self):
+        """Test that alive() follows relations and dead() is only offered where deleted rows are visible"""
+        booking = self.bookings[0]
+        booking.room.soft_delete()
+        self.assertEqual(Booking.objects.count(), 2)
+        self.assertEqual(list(Booking.objects.alive('room')), [self.bookings[1]])
+        booking.soft_delete()
+        self.assertEqual(list(Booking.all_objects.all().dead()), [booking])
+        self.assertEqual(list(Booking.objects.deleted_only()), [booking])
+        self.assertFalse(hasattr(Booking.objects, 'dead'))
+        self.assertEqual(list(alive(GuestStay.objects.all(), 'booking')), [self.guest.stays.get(booking=self.bookings[1])])
+
+    def test_prefetches_skip_deleted_rows(self):
+        """Test that related managers and alive_prefetch leave out deleted rows without extra queries"""
+        self.bookings[0].soft_delete()
+        with self.assertNumQueries(2):
+            guest = Guest.objects.prefetch_related(
+                alive_prefetch('stays', GuestStay.objects.all(), relations=['booking']),
+            ).get()
+            self.assertEqual([stay.booking_id for stay in guest.stays.all()], [self.bookings[1].id])
+        self.assertEqual(list(self.guest.bookings.all()), [self.bookings[1]])
+
+        self.guest.soft_delete()
+        with self.assertNumQueries(2):
+            bookings = list(Booking.objects.prefetch_related(alive_prefetch('registered_guests')))
+            self.assertEqual([list(booking.registered_guests.all()) for booking in bookings], [[]])
+
+    def test_forward_links_reach_deleted_rows(self):
+        """Test that forward foreign keys use the unfiltered base manager, so deleted rows can be restored"""
+        room = self.bookings[0].room
+        room.soft_delete()
+        booking = Booking.objects.get(pk=self.bookings[0].pk)
+        self.assertTrue(booking.room.is_deleted)
+        self.assertFalse(Booking.objects.filter(alive_q('room'), pk=booking.pk).exists())
+
+        room.refresh_from_db()
+        room.restore()
+        self.assertTrue(Booking.objects.filter(alive_q('room'), pk=booking.pk).exists())
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    threads = 24
+
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        for i in range(4):
+            Room.objects.create(room_type=self.room_type, room_number=f'10{i}')
+        self.checkin = date.today() + timedelta(days=5)
+        self.checkout = self.checkin + timedelta(days=2)
+
+    def book(self, index, start, outcomes):
+        start.wait()
+        deadline = time.monotonic() + 30
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    booking, _ = create_booking(
+                        self.room_type, self.checkin, self.checkout,
+                        guest_details={'first_name': 'Guest', 'last_name': str(index),
+                                       'email': f'guest{index}@example.com', 'phone': f'0800{index:04d}'},
+                        guests=1
+                    )
+                    outcomes[index] = booking.room_id
+                    return
+                except DatabaseError as error:
+                    # The shared-cache test database refuses concurrent writers
+                    # instead of queueing them; retry until the deadline
+                    outcomes[index] = error
+                    time.sleep(random.uniform(0.001, 0.02))
+        except ValidationError as error:
+            outcomes[index] = error  # Sold out
+        except Exception as error:
+            outcomes[index] = error
+        finally:
+            connections.close_all()
+
+    def test_parallel_checkouts_never_share_a_room(self):
+        """Test that many parallel bookings for the same stay never double book a room"""
+        start = threading.Barrier(self.threads)
+        outcomes = {}
+        workers = [threading.Thread(target=self.book, args=(i, start, outcomes)) for i in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        booked = [outcome for outcome in outcomes.values() if isinstance(outcome, int)]
+        refused = [outcome for outcome in outcomes.values() if isinstance(outcome, ValidationError)]
+        others = [outcome for outcome in outcomes.values() if not isinstance(outcome, (int, ValidationError))]
+        self.assertEqual(len(outcomes), self.threads)
+        self.assertEqual(others, [])
+        self.assertEqual(len(booked), 4)
+        self.assertEqual(len(refused), self.threads - 4)
+
+        room_nights = [
+            (room_id, night)
+            for room_id, checkin, checkout in Booking.objects.values_list('room_id', 'checkin', 'checkout')
+            for night in (checkin + timedelta(days=offset) for offset in range((checkout - checkin).days))
+        ]
+        self.assertEqual(len(room_nights), 4 * 2)
+        self.assertEqual(len(room_nights), len(set(room_nights)))
+        self.assertEqual(sorted(booked), sorted(Booking.objects.values_list('room_id', flat=True)))
+        # Booking and guest are written in one transaction
+        self.assertEqual(Guest.objects.filter(booking__isnull=False).count(), 4)
+
+
+class ConcurrentPaymentSubmissionTests(TransactionTestCase):
+    threads = 8
+
+    def setUp(self):
+        self.room_type = RoomType.objects.create(
+            name='Deluxe', description='Deluxe room', base_price=Decimal('10000.00'), capacity=2
+        )
+        for i in range(6):
+            Room.objects.create(room_type=self.room_type, room_number=f'10{i}')
+        self.checkin = date.today() + timedelta(days=5)
+        self.checkout = self.checkin + timedelta(days=2)
+        PaymentVerification.objects.create(reference='ref-1', transaction_id='1', amount=Decimal('40000.00'))
+
+    def submit(self, index, start, outcomes):
+        start.wait()
+        deadline = time.monotonic() + 30
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    bookings, _ = create_bookings(
+                        self.room_type, self.checkin, self.checkout, 2,
+                        guest_details={'first_name': 'Ada', 'last_name': 'Obi',
+                                       'email': 'ada@example.com', 'phone': '08000000000'},
+                        guests=2, payment_reference='ref-1'
+                    )
+                    outcomes[index] = [booking.id for booking in bookings]
+                    return
+                except DatabaseError as error:
+                    # The shared-cache test database refuses concurrent writers; retry
+                    outcomes[index] = error
+                    time.sleep(random.uniform(0.001, 0.02))
+        except Exception as error:
+            outcomes[index] = error
+        finally:
+            connections.close_all()
+
+    def test_same_reference_books_once(self):
+        """Test that parallel submissions of one payment share a single set of bookings"""
+        start = threading.Barrier(self.threads)
+        outcomes = {}
+        workers = [threading.Thread(target=self.submit, args=(i, start, outcomes)) for i in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        booking_ids = list(Booking.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual(len(booking_ids), 2)
+        self.assertEqual(list(outcomes.values()), [booking_ids] * self.threads)
+        self.assertEqual(free_rooms(self.room_type, self.checkin, self.checkout), 4)
@@ -1,14 +1,17 @@
 from django.urls import path, include
 from . import views, booking
 from .booking import submit_booking
-from .views import check_availability_ajax, contact_submit
+from .views import check_availability_ajax, availability_matrix_ajax, contact_submit
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('check-availability', check_availability_ajax, name='check_availability_ajax'),
+    path('availability-matrix', availability_matrix_ajax, name='availability_matrix_ajax'),
     path('contact-submit', contact_submit, name='contact_submit'),
     path('submit-booking', submit_booking, name='submit_booking'),
     path('verify-payment', booking.verify_payment, name='verify_payment'),
     path('store-expected-amount', booking.store_expected_amount, name='store_expected_amount'),
+    path('place-hold', booking.place_room_hold, name='place_room_hold'),
+    path('release-hold', booking.release_room_hold, name='release_room_hold'),
     path('webhook', booking.webhook, name='webhook'),
 ]
\ No newline at end of file
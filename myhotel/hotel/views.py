@@ -1,23 +1,31 @@
+from datetime import datetime
 from django.shortcuts import render
 from django.http import JsonResponse
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import condition, require_http_methods
 from .contact_form import ContactFormHandler
-from .models import RoomType, Hotel, HotelAmenity, Room, Booking
+from .models import RoomType, HotelAmenity, Room, Booking
+from .hotel_settings import get_hotel
+from .catalogue import CATALOGUE_FRAGMENT_TIMEOUT, catalogue_version, home_etag
 from .room_availability import RoomAvailabilityChecker
+from .availability import cached_availability_matrix
 import logging
 
 logger = logging.getLogger(__name__)
 
+@condition(etag_func=home_etag)
 def home(request):
-    room_types = RoomType.objects.all()
-    hotel = Hotel.objects.first()
+    room_types = RoomType.objects.catalogue()
+    hotel = get_hotel(request)
     hotel_amenities = HotelAmenity.objects.all()
     context = {
         'room_types': room_types,
         'hotel': hotel,
         'hotel_amenities': hotel_amenities,
+        'catalogue_version': catalogue_version(),
+        'catalogue_fragment_timeout': CATALOGUE_FRAGMENT_TIMEOUT,
     }
 
     if request.method == 'POST' and 'form1_submit' in request.POST:
@@ -75,6 +83,58 @@ def check_availability_ajax(request):
         }, status=500)
 
 
+@require_http_methods(["GET"])
+def availability_matrix_ajax(request):
+    """
+    AJAX endpoint returning free rooms and stay cost for every room type.
+    Replaces one check_availability_ajax call per room card with a single request.
+    """
+    try:
+        checkin = datetime.strptime(request.GET.get('checkin', ''), '%Y-%m-%d').date()
+        checkout = datetime.strptime(request.GET.get('checkout', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'errors': ['Invalid date format. Use YYYY-MM-DD.'], 'success': False}, status=400)
+
+    if checkin >= checkout:
+        return JsonResponse({'errors': ['Check-out date must be after check-in date.'], 'success': False}, status=400)
+    if checkin < timezone.now().date():
+        return JsonResponse({'errors': ['Check-in date cannot be in the past.'], 'success': False}, status=400)
+
+    try:
+        requested_rooms = max(int(request.GET.get('rooms', 1)), 1)
+    except (TypeError, ValueError):
+        requested_rooms = 1
+
+    try:
+        room_types = []
+        for room_type in cached_availability_matrix(checkin, checkout):
+            rooms_priced = min(requested_rooms, room_type['available_rooms'])
+            room_types.append({
+                'id': room_type['id'],
+                'name': room_type['name'],
+                'capacity': room_type['capacity'],
+                'available_rooms': room_type['available_rooms'],
+                'base_price': f'₦{room_type["base_price"]}',
+                'total_cost': f'₦{room_type["stay_price"] * rooms_priced}',
+            })
+
+        return JsonResponse({
+            'checkin': str(checkin),
+            'checkout': str(checkout),
+            'number_of_nights': (checkout - checkin).days,
+            'requested_rooms': requested_rooms,
+            'room_types': room_types,
+            'success': True
+        })
+
+    except Exception as e:
+        logger.error(f"Error in availability_matrix_ajax: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'errors': [f'Server error: {str(e)}'],
+            'success': False
+        }, status=500)
+
+
 def contact_submit(request):
     if request.method == 'POST':
         name = request.POST.get('name', '')
@@ -3,5 +3,6 @@
 # Navigate to the Django project directory
 cd myhotel
 
-# Start the Gunicorn server
-gunicorn --bind 0.0.0.0:$PORT --workers 3 --timeout 120 myhotel.wsgi:application
\ No newline at end of file
+# Start the Gunicorn server. Threaded workers keep serving pages while a
+# request waits on Paystack.
+gunicorn --bind 0.0.0.0:$PORT --workers 3 --worker-class gthread --threads 4 --timeout 120 myhotel.wsgi:application
\ No newline at end of file